@@ -6,13 +6,41 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import config
-from core.data_loader import load_processed_data
+from core.parallel_loader import evaluate_sources
 from core.logger_config import logger
 from core.business_rules import find_overtime_employees
+from core.state_store import WatermarkStore, NotificationTracker
+from core.history_store import HistoryStore
+from core.kpi_rollups import KpiRollupStore
 
 from core.utils import get_target_date
 from core.gsheets_service import log_dataframe_to_sheet
-from core.email_service import send_bulk_notifications
+from core.email_service import send_bulk_notifications_from_frame
+
+# colunas necessárias para os logs, os e-mails e o controle incremental
+RESULT_COLUMNS = [
+    'EMPLOYEE_ID', 'LAST_UPDATE', 'CONTRIBUTOR_NAME', 'CONTRIBUTOR_EMAIL',
+    'HOURS_WORKED', 'TEAM', 'AREA', 'COST_CENTER', 'MANAGER_NAME', 'MANAGER_EMAIL'
+]
+
+def _log_alerts(sent_df, target_date) -> None:
+    """Registra os alertas enviados no 'Log de Alertas' e no histórico local."""
+    log_cols = ['CONTRIBUTOR_NAME', 'HOURS_WORKED', 'MANAGER_EMAIL']
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    log_df = sent_df[log_cols].copy()
+    log_df['Timestamp'] = timestamp
+    log_df['Automation'] = 'a1_individual_contributor'
+    log_dataframe_to_sheet(
+        df=log_df,
+        spreadsheet_id=config.GOOGLE_SHEET_ID,
+        worksheet_name='Log de Alertas',
+        mode='append'
+    )
+
+    # histórico local com as linhas completas (time, área...), para consultas sem a API do Sheets
+    history_df = sent_df.copy()
+    history_df['Timestamp'] = timestamp
+    HistoryStore().append(history_df, 'd1_individual_contributor', target_date)
 
 def run():
     """
@@ -23,60 +51,86 @@ def run():
     
     target_date = get_target_date()
     
-    df = load_processed_data(config.CONTRIBUTORS_FILE)
-    if df is None:
-        return 0, 0
+    # avalia apenas as linhas novas ou alteradas desde a última execução
+    watermark = WatermarkStore('d1_individual_contributor', target_date) if config.INCREMENTAL_PROCESSING else None
 
-    overtime_list_df = find_overtime_employees(df, target_date)
-    if overtime_list_df is None or overtime_list_df.empty:
+    # carrega e aplica a regra em cada exportação (em paralelo quando há mais de uma)
+    overtime_list_df, evaluated_keys, total_rows = evaluate_sources(
+        config.CONTRIBUTORS_FILE,
+        find_overtime_employees,
+        target_date,
+        columns=RESULT_COLUMNS,
+        row_filter=watermark.filter_pending if watermark else None
+    )
+    if evaluated_keys.empty:
+        if total_rows:
+            logger.info("No new or changed rows since the last run. Nothing to do.")
         return 0, 0
-    
+
+    # agregados diários por time/área/centro de custo/gestor: só o dia avaliado é
+    # recalculado, com todas as linhas avaliadas (inclusive as já notificadas)
+    KpiRollupStore().apply(overtime_list_df, target_date, evaluated_ids=evaluated_keys['EMPLOYEE_ID'])
 
     # 1. logar os resultados no Google Sheets
-    # log para o Dashboard Diário (sobrescreve)
-    dashboard_cols = ['EMPLOYEE_ID', 'CONTRIBUTOR_NAME', 'HOURS_WORKED', 'TEAM', 'MANAGER_NAME']
-    log_dataframe_to_sheet(
-        df=overtime_list_df[dashboard_cols],
-        spreadsheet_id=config.GOOGLE_SHEET_ID,
-        worksheet_name='Dashboard Horas Extras',
-        mode='overwrite'
-    )
+    # log para o Dashboard Diário, montado antes de tirar os já notificados (eles
+    # continuam no dashboard): a avaliação completa sobrescreve com a lista do dia e
+    # as incrementais só adicionam as linhas que ainda não foram publicadas; se um
+    # colaborador já publicado mudou de versão, a linha dele é substituída (upsert
+    # por EMPLOYEE_ID) em vez de aparecer duas vezes
+    if overtime_list_df is not None and not overtime_list_df.empty:
+        full_list = not watermark or watermark.full_refresh
+        dashboard_df = overtime_list_df if full_list else watermark.exclude_published(overtime_list_df)
+        if full_list:
+            mode = 'overwrite'
+        else:
+            mode = 'upsert' if watermark.previously_published(dashboard_df).any() else 'append'
+        dashboard_cols = ['EMPLOYEE_ID', 'CONTRIBUTOR_NAME', 'HOURS_WORKED', 'TEAM', 'MANAGER_NAME']
+        published = log_dataframe_to_sheet(
+            df=dashboard_df[dashboard_cols],
+            spreadsheet_id=config.GOOGLE_SHEET_ID,
+            worksheet_name='Dashboard Horas Extras',
+            mode=mode,
+            key_column='EMPLOYEE_ID'
+        )
+        if published and watermark:
+            watermark.mark_published(dashboard_df, replace=full_list)
 
-    # log para o Histórico (adiciona)
-    log_cols = ['CONTRIBUTOR_NAME', 'HOURS_WORKED', 'MANAGER_EMAIL']
-    log_df = overtime_list_df[log_cols].copy()
-    log_df['Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    log_df['Automation'] = 'a1_individual_contributor'
-    log_dataframe_to_sheet(
-        df=log_df,
-        spreadsheet_id=config.GOOGLE_SHEET_ID,
-        worksheet_name='Log de Alertas',
-        mode='append'
-    )
+    if watermark:
+        overtime_list_df = watermark.exclude_notified(overtime_list_df)
+        # as linhas a notificar só contam como avaliadas depois de um envio com sucesso
+        watermark.mark_evaluated(evaluated_keys, exclude=overtime_list_df)
+    if overtime_list_df is None or overtime_list_df.empty:
+        if watermark:
+            watermark.save()
+        return 0, 0
     
+
     # 2. preparar e enviar os e-mails
     logger.info("Preparing emails for individual contributors...")
     
-    # cria a lista de "jobs" para o serviço de e-mail
-    jobs_data = []
-    for _, row in overtime_list_df.iterrows():
-        recipient = config.EMAIL_TEST_RECIPIENT if config.EMAIL_TEST_RECIPIENT else row['CONTRIBUTOR_EMAIL']
-        context = {
-            'nome': row['CONTRIBUTOR_NAME'], # Os nomes devem bater com o template
+    # só as linhas enviadas com sucesso vão para o log e o histórico; as do digest
+    # entram quando ele é enviado, no fim da execução (ver NotificationTracker)
+    tracker = NotificationTracker(watermark, overtime_list_df, on_sent=lambda sent_df: _log_alerts(sent_df, target_date))
+    # monta os contextos direto das colunas; os valores comuns são compartilhados
+    success, failed = send_bulk_notifications_from_frame(
+        overtime_list_df,
+        column_mapping={'nome': 'CONTRIBUTOR_NAME', 'horas_trabalhadas': 'HOURS_WORKED'}, # os nomes devem bater com o template
+        constants={
             'data': target_date.strftime('%d/%m/%Y'),
-            'horas_trabalhadas': row['HOURS_WORKED'],
             'limite_horas': config.HOURS_LIMIT,
             'dashboard_url': f"https://docs.google.com/spreadsheets/d/{config.GOOGLE_SHEET_ID}"
-        }
-        jobs_data.append({'recipient': recipient, 'context': context})
-
-    # chama o serviço de envio de e-mail em lote
-    success, failed = send_bulk_notifications(
-        jobs_data=jobs_data,
+        },
+        recipient_column='CONTRIBUTOR_EMAIL',
         template_name='email/alerts/overtime_alert.html',
         subject_template="⚠️ Alerta de Horas Extras",
-        test_limit=config.EMAIL_TEST_LIMIT
+        test_limit=config.EMAIL_TEST_LIMIT,
+        # só os envios com sucesso contam como notificados
+        on_result=tracker
     )
+
+    tracker.flush()
+    if watermark:
+        logger.info(f"{tracker.notified} rows marked as notified.")
     
     logger.info("--- Automation Finished ---")
     return success, failed
@@ -6,12 +6,38 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import config
-from core.data_loader import load_processed_data
+from core.parallel_loader import evaluate_sources
 from core.logger_config import logger
 from core.business_rules import find_work_anniversaries
+from core.state_store import WatermarkStore, NotificationTracker
+from core.history_store import HistoryStore
 from core.utils import get_target_date
 from core.gsheets_service import log_dataframe_to_sheet
-from core.email_service import send_bulk_notifications
+from core.email_service import send_bulk_notifications_from_frame
+
+# colunas necessárias para os logs, os e-mails e o controle incremental
+RESULT_COLUMNS = [
+    'EMPLOYEE_ID', 'LAST_UPDATE', 'CONTRIBUTOR_NAME', 'CONTRIBUTOR_EMAIL', 'TEAM', 'AREA', 'YEARS_COMPLETED'
+]
+
+def _log_anniversaries(sent_df, target_date) -> None:
+    """Registra as mensagens enviadas no 'Log de Aniversários' e no histórico local."""
+    log_df = sent_df[['CONTRIBUTOR_NAME', 'YEARS_COMPLETED', 'AREA']].copy()
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    log_df['Timestamp'] = timestamp
+    log_df['Automation'] = 'd2_work_anniversary'
+
+    log_dataframe_to_sheet(
+        df=log_df,
+        spreadsheet_id=config.GOOGLE_SHEET_ID,
+        worksheet_name='Log de Aniversários',
+        mode='append'
+    )
+
+    # histórico local com as linhas completas (time, área...), para consultas sem a API do Sheets
+    history_df = sent_df.copy()
+    history_df['Timestamp'] = timestamp
+    HistoryStore().append(history_df, 'd4_work_anniversary', target_date)
 
 def run():
     """Runs the work anniversary automation and returns email stats."""
@@ -19,47 +45,54 @@ def run():
     
     target_date = get_target_date()
     
-    df = load_processed_data(config.CONTRIBUTORS_FILE)
-    if df is None: return 0, 0
+    # avalia apenas as linhas novas ou alteradas desde a última execução
+    watermark = WatermarkStore('d4_work_anniversary', target_date) if config.INCREMENTAL_PROCESSING else None
 
-    anniversary_df = find_work_anniversaries(df, target_date)
+    # carrega e aplica a regra em cada exportação (em paralelo quando há mais de uma)
+    anniversary_df, evaluated_keys, total_rows = evaluate_sources(
+        config.CONTRIBUTORS_FILE,
+        find_work_anniversaries,
+        target_date,
+        columns=RESULT_COLUMNS,
+        row_filter=watermark.filter_pending if watermark else None
+    )
+    if evaluated_keys.empty:
+        if total_rows:
+            logger.info("No new or changed rows since the last run. Nothing to do.")
+        return 0, 0
+
+    if watermark:
+        anniversary_df = watermark.exclude_notified(anniversary_df)
+        # as linhas a notificar só contam como avaliadas depois de um envio com sucesso
+        watermark.mark_evaluated(evaluated_keys, exclude=anniversary_df)
     if anniversary_df is None or anniversary_df.empty:
+        if watermark:
+            watermark.save()
         return 0, 0
 
-    # 1. logar os resultados no Google Sheets
-    # prepara o DataFrame com as colunas certas para o log
-    log_df = anniversary_df[['CONTRIBUTOR_NAME', 'YEARS_COMPLETED', 'AREA']].copy()
-    log_df['Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    log_df['Automation'] = 'd2_work_anniversary'
-    
-    log_dataframe_to_sheet(
-        df=log_df,
-        spreadsheet_id=config.GOOGLE_SHEET_ID,
-        worksheet_name='Log de Aniversários',
-        mode='append'
-    )
-    
-    # 2. prepara e envia os e-mails
+    # 1. prepara e envia os e-mails
     logger.info("Preparing work anniversary emails...")
     
-    jobs_data = []
-    for _, row in anniversary_df.iterrows():
-        recipient = config.EMAIL_TEST_RECIPIENT if config.EMAIL_TEST_RECIPIENT else row['CONTRIBUTOR_EMAIL']
-        context = {
-            'nome': row['CONTRIBUTOR_NAME'],
-            'anos_empresa': row['YEARS_COMPLETED'],
-            'dashboard_url': f"https://docs.google.com/spreadsheets/d/{config.GOOGLE_SHEET_ID}"
-        }
-        jobs_data.append({'recipient': recipient, 'context': context})
-
-    # chama o serviço de envio de e-mail em lote
+    # só as linhas enviadas com sucesso vão para o log e o histórico; as do digest
+    # entram quando ele é enviado, no fim da execução (ver NotificationTracker)
+    tracker = NotificationTracker(watermark, anniversary_df, on_sent=lambda sent_df: _log_anniversaries(sent_df, target_date))
+    # monta os contextos direto das colunas; os valores comuns são compartilhados
     subject = "🎉 Parabéns pelo seu Aniversário de Empresa!"
-    success, failed = send_bulk_notifications(
-        jobs_data=jobs_data,
+    success, failed = send_bulk_notifications_from_frame(
+        anniversary_df,
+        column_mapping={'nome': 'CONTRIBUTOR_NAME', 'anos_empresa': 'YEARS_COMPLETED'},
+        constants={'dashboard_url': f"https://docs.google.com/spreadsheets/d/{config.GOOGLE_SHEET_ID}"},
+        recipient_column='CONTRIBUTOR_EMAIL',
         template_name='email/alerts/anniversary_alert.html',
         subject_template=subject,
-        test_limit=config.EMAIL_TEST_LIMIT
+        test_limit=config.EMAIL_TEST_LIMIT,
+        # só os envios com sucesso contam como notificados
+        on_result=tracker
     )
+
+    tracker.flush()
+    if watermark:
+        logger.info(f"{tracker.notified} rows marked as notified.")
     
     logger.info("--- Automation Finished ---")
     return success, failed
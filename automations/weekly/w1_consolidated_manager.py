@@ -1,16 +1,49 @@
 import os
 import sys
+from typing import Optional
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import config
-from core.data_loader import load_processed_data
+from core.parallel_loader import evaluate_sources, dataset_hierarchy
 from core.logger_config import logger
 from core.business_rules import find_overtime_employees
+from core.hierarchy import HierarchyIndex, result_groups
 from core.utils import get_target_date
 from core.gsheets_service import log_dataframe_to_sheet
-from core.email_service import send_bulk_notifications
+from core.email_service import send_bulk_notifications_from_frame
+
+# colunas necessárias para montar os resumos
+RESULT_COLUMNS = ['EMPLOYEE_ID', 'MANAGER_EMAIL', 'MANAGER_NAME', 'CONTRIBUTOR_NAME', 'HOURS_WORKED']
+
+def _member_cards_html(names: np.ndarray, hours: np.ndarray, members: np.ndarray) -> str:
+    """Gera o HTML dos cards dos membros, ordenados pelo nome."""
+    ordered = members[np.argsort(names[members], kind='stable')]
+    return "".join(f"""
+            <tr><td style="padding-bottom: 15px;">
+                <table class="employee-card" width="100%" cellspacing="0" cellpadding="0">
+                    <tr><td class="label">Name:</td><td class="value">{names[i]}</td></tr>
+                    <tr><td class="label">Hours Worked:</td><td class="value">{hours[i]:.1f}</td></tr>
+                </table>
+            </td></tr>
+            """ for i in ordered)
+
+def build_summary_frame(overtime_list_df: pd.DataFrame, hierarchy: Optional[HierarchyIndex] = None) -> pd.DataFrame:
+    """Uma linha por gestor com o HTML dos cards da equipe; hierarchy é o índice do dataset, se houver (ver result_groups)."""
+    names = overtime_list_df['CONTRIBUTOR_NAME'].to_numpy()
+    hours = overtime_list_df['HOURS_WORKED'].to_numpy()
+
+    # um grupo por gestor (em ordem de e-mail, como no antigo groupby), com os membros já indexados
+    groups = result_groups(overtime_list_df, 'manager', hierarchy)
+    return pd.DataFrame({
+        'MANAGER_EMAIL': [email for email, _, _ in groups],
+        'MANAGER_NAME': [name for _, name, _ in groups],
+        # gera o HTML dos cards para a equipe de cada gestor
+        'TEAM_SUMMARY_HTML': [_member_cards_html(names, hours, members) for _, _, members in groups],
+    })
 
 def run():
     """Runs the automation that sends a consolidated summary to managers and returns email stats."""
@@ -18,44 +51,27 @@ def run():
     
     target_date = get_target_date()
     
-    df = load_processed_data(config.CONTRIBUTORS_FILE)
-    if df is None: return 0, 0
-
-    overtime_list_df = find_overtime_employees(df, target_date)
+    # carrega e aplica a regra em cada exportação (em paralelo quando há mais de uma)
+    overtime_list_df, _, _ = evaluate_sources(
+        config.CONTRIBUTORS_FILE, find_overtime_employees, target_date, columns=RESULT_COLUMNS
+    )
     if overtime_list_df is None or overtime_list_df.empty:
         return 0, 0
     
     logger.info(f"Preparing consolidated summary emails for {overtime_list_df['MANAGER_EMAIL'].nunique()} managers.")
     
-    jobs_data = []
-    # agrupa a lista de horas extras por gestor
-    for manager_email, team_df in overtime_list_df.groupby('MANAGER_EMAIL'):
-        manager_name = team_df['MANAGER_NAME'].iloc[0]
-        
-        # gera o HTML dos cards para a equipe deste gestor
-        team_summary_html = ""
-        for _, member in team_df.sort_values('CONTRIBUTOR_NAME').iterrows():
-            team_summary_html += f"""
-            <tr><td style="padding-bottom: 15px;">
-                <table class="employee-card" width="100%" cellspacing="0" cellpadding="0">
-                    <tr><td class="label">Name:</td><td class="value">{member['CONTRIBUTOR_NAME']}</td></tr>
-                    <tr><td class="label">Hours Worked:</td><td class="value">{member['HOURS_WORKED']:.1f}</td></tr>
-                </table>
-            </td></tr>
-            """
-        
-        recipient = config.EMAIL_TEST_RECIPIENT if config.EMAIL_TEST_RECIPIENT else manager_email
-        context = {
-            'nome_gestor': manager_name,
+    # o índice da hierarquia montado na carga mapeia cada colaborador ao seu gestor
+    summary_df = build_summary_frame(overtime_list_df, dataset_hierarchy())
+
+    # chama o serviço de envio de e-mail em lote, com os contextos montados das colunas
+    success, failed = send_bulk_notifications_from_frame(
+        summary_df,
+        column_mapping={'nome_gestor': 'MANAGER_NAME', 'tabela_horas': 'TEAM_SUMMARY_HTML'},
+        constants={
             'data_resumo': target_date.strftime('%d/%m/%Y'),
-            'tabela_horas': team_summary_html,
             'dashboard_url': f"https://docs.google.com/spreadsheets/d/{config.GOOGLE_SHEET_ID}"
-        }
-        jobs_data.append({'recipient': recipient, 'context': context})
-
-    # chama o serviço de envio de e-mail em lote
-    success, failed = send_bulk_notifications(
-        jobs_data=jobs_data,
+        },
+        recipient_column='MANAGER_EMAIL',
         template_name='email/reports/manager_summary.html',
         subject_template="📈 Resumo Diário - Gerência",
         test_limit=config.EMAIL_TEST_LIMIT
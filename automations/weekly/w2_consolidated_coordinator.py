@@ -1,15 +1,50 @@
 import os
 import sys
+from typing import Optional
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import config
-from core.data_loader import load_processed_data
+from core.parallel_loader import evaluate_sources, dataset_hierarchy
 from core.logger_config import logger
 from core.business_rules import find_overtime_employees
+from core.hierarchy import HierarchyIndex, result_groups
 from core.utils import get_target_date
-from core.email_service import send_bulk_notifications
+from core.email_service import send_bulk_notifications_from_frame
+
+# colunas necessárias para montar os resumos
+RESULT_COLUMNS = ['EMPLOYEE_ID', 'COORDINATOR_EMAIL', 'COORDINATOR_NAME', 'AREA', 'CONTRIBUTOR_NAME', 'HOURS_WORKED']
+
+def _member_cards_html(names: np.ndarray, hours: np.ndarray, members: np.ndarray) -> str:
+    """Gera o HTML dos cards dos membros, ordenados pelo nome."""
+    ordered = members[np.argsort(names[members], kind='stable')]
+    return "".join(f"""
+            <tr><td style="padding-bottom: 15px;">
+                <table class="employee-card" width="100%" cellspacing="0" cellpadding="0">
+                    <tr><td class="label">Name:</td><td class="value">{names[i]}</td></tr>
+                    <tr><td class="label">Hours Worked:</td><td class="value">{hours[i]:.1f}</td></tr>
+                </table>
+            </td></tr>
+            """ for i in ordered)
+
+def build_summary_frame(overtime_list_df: pd.DataFrame, hierarchy: Optional[HierarchyIndex] = None) -> pd.DataFrame:
+    """Uma linha por coordenador com a área e o HTML dos cards da equipe; hierarchy é o índice do dataset, se houver (ver result_groups)."""
+    names = overtime_list_df['CONTRIBUTOR_NAME'].to_numpy()
+    hours = overtime_list_df['HOURS_WORKED'].to_numpy()
+    areas = overtime_list_df['AREA'].to_numpy()
+
+    # um grupo por coordenador (em ordem de e-mail, como no antigo groupby), com os membros já indexados
+    groups = result_groups(overtime_list_df, 'coordinator', hierarchy)
+    return pd.DataFrame({
+        'COORDINATOR_EMAIL': [email for email, _, _ in groups],
+        'COORDINATOR_NAME': [name for _, name, _ in groups],
+        'AREA': [areas[members[0]] for _, _, members in groups],
+        # gera o HTML dos cards para a área de cada coordenador
+        'AREA_SUMMARY_HTML': [_member_cards_html(names, hours, members) for _, _, members in groups],
+    })
 
 def run():
     """Runs the automation that sends a summary to coordinators and returns email stats."""
@@ -17,47 +52,32 @@ def run():
     
     target_date = get_target_date()
     
-    df = load_processed_data(config.CONTRIBUTORS_FILE)
-    if df is None: return 0, 0
-
-    overtime_list_df = find_overtime_employees(df, target_date)
+    # carrega e aplica a regra em cada exportação (em paralelo quando há mais de uma)
+    overtime_list_df, _, _ = evaluate_sources(
+        config.CONTRIBUTORS_FILE, find_overtime_employees, target_date, columns=RESULT_COLUMNS
+    )
     if overtime_list_df is None or overtime_list_df.empty:
         return 0, 0
 
     logger.info(f"Preparing consolidated summary emails for {overtime_list_df['COORDINATOR_EMAIL'].nunique()} coordinators.")
 
-    jobs_data = []
-    # agrupa a lista de horas extras por coordenador
-    for coordinator_email, area_df in overtime_list_df.groupby('COORDINATOR_EMAIL'):
-        coordinator_name = area_df['COORDINATOR_NAME'].iloc[0]
-        area_name = area_df['AREA'].iloc[0]
+    # o índice da hierarquia montado na carga mapeia cada colaborador ao seu coordenador
+    summary_df = build_summary_frame(overtime_list_df, dataset_hierarchy())
 
-        # gera o HTML dos cards para a área deste coordenador
-        area_summary_html = ""
-        for _, member in area_df.sort_values('CONTRIBUTOR_NAME').iterrows():
-            area_summary_html += f"""
-            <tr><td style="padding-bottom: 15px;">
-                <table class="employee-card" width="100%" cellspacing="0" cellpadding="0">
-                    <tr><td class="label">Name:</td><td class="value">{member['CONTRIBUTOR_NAME']}</td></tr>
-                    <tr><td class="label">Hours Worked:</td><td class="value">{member['HOURS_WORKED']:.1f}</td></tr>
-                </table>
-            </td></tr>
-            """
-            
-        recipient = config.EMAIL_TEST_RECIPIENT if config.EMAIL_TEST_RECIPIENT else coordinator_email
-        context = {
-            'nome_coordenador': coordinator_name,
-            'nome_area': area_name,
+    # chama o serviço de envio de e-mail em lote, com os contextos montados das colunas
+    subject_template = "📋 Resumo da Área - {nome_area}"
+    success, failed = send_bulk_notifications_from_frame(
+        summary_df,
+        column_mapping={
+            'nome_coordenador': 'COORDINATOR_NAME',
+            'nome_area': 'AREA',
+            'resumo_area': 'AREA_SUMMARY_HTML'
+        },
+        constants={
             'data_resumo': target_date.strftime('%d/%m/%Y'),
-            'resumo_area': area_summary_html,
             'dashboard_url': f"https://docs.google.com/spreadsheets/d/{config.GOOGLE_SHEET_ID}"
-        }
-        jobs_data.append({'recipient': recipient, 'context': context})
-
-    # chama o serviço de envio de e-mail em lote
-    subject_template = "📋 Resumo da Área - {nome_area}"
-    success, failed = send_bulk_notifications(
-        jobs_data=jobs_data,
+        },
+        recipient_column='COORDINATOR_EMAIL',
         template_name='email/reports/coordinator_summary.html',
         subject_template=subject_template,
         test_limit=config.EMAIL_TEST_LIMIT
@@ -0,0 +1,164 @@
+"""
+Mede tempo e pico de memória de cada etapa do pipeline em vários tamanhos de
+dados sintéticos (benchmarks/datagen.py) e compara com benchmarks/baselines.json.
+
+Ex:
+    python benchmarks/bench_stages.py                       # compara; sai com código 1 se houver regressão
+    python benchmarks/bench_stages.py --update-baseline     # regrava as referências
+    python benchmarks/bench_stages.py --sizes 10000 --stages load_processed_data
+"""
+import argparse
+import json
+import logging
+import tempfile
+import tracemalloc
+import time
+import sys
+import os
+from datetime import date, timedelta
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/benchmarks)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# adiciona a raiz do projeto à lista de caminhos do Python
+sys.path.insert(0, os.path.dirname(script_dir))
+
+import config
+from core.logger_config import logger
+from core.data_loader import load_processed_data
+from core.business_rules import find_overtime_employees, find_work_anniversaries
+from automations.weekly import w1_consolidated_manager, w2_consolidated_coordinator
+from core.kpi_rollups import KpiRollupStore
+from core.hierarchy import HierarchyIndex
+from benchmarks.datagen import write_contributors_csv
+
+BASELINES_FILE = os.path.join(script_dir, "baselines.json")
+DATA_CACHE_DIR = os.path.join(script_dir, ".data")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# data fixa: os arquivos gerados (e portanto os resultados) não mudam de um dia para o outro
+TARGET_DATE = date(2025, 6, 8)
+# dias anteriores já agregados no store do kpi_rollup_apply, para medir a atualização com histórico
+ROLLUP_HISTORY_DAYS = 14
+
+
+def _prepare(size: int, seed: int, rollup_root: str) -> dict:
+    """
+    Gera (ou reaproveita) o arquivo do tamanho pedido e as entradas de cada etapa.
+    rollup_root deve ser um diretório novo: recebe os agregados dos dias anteriores a TARGET_DATE.
+    """
+    os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+    path = os.path.join(DATA_CACHE_DIR, f"contributors_{size}_{seed}.csv")
+    if not os.path.exists(path):
+        write_contributors_csv(path, size, seed=seed, target_date=TARGET_DATE)
+
+    df = load_processed_data(path)
+    overtime_df = find_overtime_employees(df, TARGET_DATE)
+    rollups = KpiRollupStore(rollup_root)
+    for days_before in range(ROLLUP_HISTORY_DAYS, 0, -1):
+        rollups.apply(overtime_df, TARGET_DATE - timedelta(days=days_before))
+    return {
+        "path": path, "df": df, "overtime_df": overtime_df, "rollups": rollups,
+        # índice do dataset inteiro, como o mantido por parallel_loader na carga
+        "hierarchy": HierarchyIndex(df),
+    }
+
+
+# cada etapa recebe as entradas preparadas e executa só o trecho medido
+STAGES = {
+    "load_processed_data": lambda inputs: load_processed_data(inputs["path"]),
+    "find_overtime_employees": lambda inputs: find_overtime_employees(inputs["df"], TARGET_DATE),
+    "find_work_anniversaries": lambda inputs: find_work_anniversaries(inputs["df"], TARGET_DATE),
+    "w1_build_summary_frame": lambda inputs: w1_consolidated_manager.build_summary_frame(
+        inputs["overtime_df"][w1_consolidated_manager.RESULT_COLUMNS]
+    ),
+    "w1_build_summary_frame_indexed": lambda inputs: w1_consolidated_manager.build_summary_frame(
+        inputs["overtime_df"][w1_consolidated_manager.RESULT_COLUMNS], inputs["hierarchy"]
+    ),
+    "w2_build_summary_frame": lambda inputs: w2_consolidated_coordinator.build_summary_frame(
+        inputs["overtime_df"][w2_consolidated_coordinator.RESULT_COLUMNS]
+    ),
+    # reaplica o mesmo dia a cada execução (idempotente) sobre o histórico preparado
+    "kpi_rollup_apply": lambda inputs: inputs["rollups"].apply(inputs["overtime_df"], TARGET_DATE),
+}
+
+
+def measure(stage, inputs: dict, repeat: int) -> dict:
+    """Melhor tempo de 'repeat' execuções e pico de memória de uma execução extra com tracemalloc."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        stage(inputs)
+        timings.append(time.perf_counter() - started)
+
+    # a memória é medida à parte porque o tracemalloc deixa o código bem mais lento
+    tracemalloc.start()
+    stage(inputs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(min(timings), 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def compare(results: dict, baselines: dict, threshold: float) -> list:
+    """Lista as etapas que ficaram mais lentas ou usaram mais memória que a referência + threshold."""
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if not baseline:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            # pisos para não acusar ruído em medições muito pequenas
+            floor = 0.01 if metric == "seconds" else 1.0
+            limit = max(baseline[metric], floor) * (1 + threshold)
+            if result[metric] > limit:
+                regressions.append(f"{key}: {metric} {result[metric]} > {limit:.4f} (baseline {baseline[metric]})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Tamanhos, separados por vírgula.")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Etapas, separadas por vírgula.")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções cronometradas por etapa.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regressão tolerada (0.25 = 25%%).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--update-baseline", action="store_true", help="Grava os resultados em baselines.json.")
+    args = parser.parse_args()
+
+    # os logs das etapas (um por chamada) só poluiriam a saída
+    logger.setLevel(logging.WARNING)
+    # a quarentena de cada carga fica junto dos dados gerados, fora de data/
+    config.QUARANTINE_DIR = os.path.join(DATA_CACHE_DIR, "quarantine")
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        # um store de agregados novo por tamanho: nada sobra de outros tamanhos ou execuções
+        with tempfile.TemporaryDirectory(prefix="rollups_") as rollup_root:
+            inputs = _prepare(size, args.seed, rollup_root)
+            for name in args.stages.split(","):
+                key = f"{name}@{size}"
+                results[key] = measure(STAGES[name], inputs, args.repeat)
+                print(f"{key:<40} {results[key]['seconds']:>10.4f}s {results[key]['peak_mb']:>10.2f} MB")
+
+    baselines = {}
+    if os.path.exists(BASELINES_FILE):
+        with open(BASELINES_FILE, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update_baseline:
+        baselines.update(results)
+        with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=4)
+            f.write("\n")
+        print(f"Baselines written to {BASELINES_FILE}.")
+        return
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("\nNo regressions against the baselines.")
+
+
+if __name__ == "__main__":
+    main()
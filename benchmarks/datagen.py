@@ -0,0 +1,155 @@
+"""
+Gerador determinístico (seed) de arquivos de colaboradores no formato de
+data/sample_data.csv, para benchmarks e testes de carga.
+
+Ex:
+    python benchmarks/datagen.py --rows 100000 --output /tmp/contributors_100k.csv
+"""
+import argparse
+import os
+import sys
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/benchmarks)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# adiciona a raiz do projeto à lista de caminhos do Python
+sys.path.insert(0, os.path.dirname(script_dir))
+
+import config
+
+COLUMNS = [
+    'EMPLOYEE_ID', 'CONTRIBUTOR_NAME', 'CONTRIBUTOR_EMAIL', 'TEAM', 'MANAGER_NAME', 'MANAGER_EMAIL',
+    'AREA', 'COORDINATOR_NAME', 'COORDINATOR_EMAIL', 'HOURS_WORKED', 'LAST_UPDATE',
+    'ADMISSION_DATE', 'COST_CENTER', 'STATUS'
+]
+
+FIRST_NAMES = np.array([
+    "Ana", "Bruno", "Carla", "Davi", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago", "Vitória", "Yuri",
+])
+LAST_NAMES = np.array([
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento",
+    "Carvalho", "Gomes", "Martins", "Araújo", "Ribeiro", "Dias", "Mota", "Pinto", "Barbosa", "Rocha",
+])
+AREAS = np.array(["Operações", "Marketing", "Financeiro", "Tecnologia", "Vendas", "RH", "Jurídico", "Logística"])
+INVALID_ADMISSION_VALUES = np.array(["", "N/A", "2023-13-45", "31/02/2021", "pendente"])
+
+# tamanhos médios da hierarquia: colaboradores por time, times por coordenador
+TEAM_SIZE = 8
+TEAMS_PER_COORDINATOR = 6
+
+
+def _people(rng: np.random.Generator, count: int) -> np.ndarray:
+    first = rng.choice(FIRST_NAMES, count)
+    last = rng.choice(LAST_NAMES, count)
+    return np.char.add(np.char.add(first, " "), last)
+
+
+def _emails(prefix: str, ids: np.ndarray) -> np.ndarray:
+    return np.char.add(np.char.add(prefix, ids.astype(str)), "@example.com")
+
+
+def generate_contributors(
+    rows: int,
+    seed: int = 42,
+    target_date: Optional[date] = None,
+    updated_rate: float = 0.8,
+    overtime_rate: float = 0.3,
+    invalid_rate: float = 0.01,
+    active_rate: float = 0.94
+) -> pd.DataFrame:
+    """
+    Gera um DataFrame de colaboradores com os mesmos textos que o CSV real.
+
+    - Hierarquia: área -> coordenador -> gestor/time -> colaboradores.
+    - LAST_UPDATE com sufixo de fuso ('dd/mm/aaaa HH:MM:SS -03:00'); uma fração
+      updated_rate das linhas é atualizada na data de referência.
+    - ADMISSION_DATE em formatos mistos (ISO e dd/mm/aaaa) e, em invalid_rate
+      das linhas, valores inválidos; HOURS_WORKED vazio nessas mesmas linhas.
+    - overtime_rate das linhas acima de config.HOURS_LIMIT.
+    """
+    rng = np.random.default_rng(seed)
+    target_date = target_date or date.today()
+    target = pd.Timestamp(target_date)
+
+    teams = max(1, rows // TEAM_SIZE)
+    coordinators = max(1, teams // TEAMS_PER_COORDINATOR)
+    team_ids = np.sort(rng.integers(0, teams, rows))
+    coordinator_of_team = rng.integers(0, coordinators, teams)
+    coordinator_ids = coordinator_of_team[team_ids]
+    area_of_coordinator = rng.integers(0, len(AREAS), coordinators)
+
+    manager_names = _people(rng, teams)
+    coordinator_names = _people(rng, coordinators)
+    employee_ids = np.arange(100000, 100000 + rows)
+
+    # horas: abaixo ou acima do limite conforme overtime_rate
+    overtime = rng.random(rows) < overtime_rate
+    hours = np.where(
+        overtime,
+        config.HOURS_LIMIT + rng.uniform(0.1, 6, rows),
+        rng.uniform(4, config.HOURS_LIMIT, rows)
+    ).round(1)
+
+    # última atualização: na data de referência ou alguns dias antes
+    days_back = np.where(rng.random(rows) < updated_rate, 0, rng.integers(1, 30, rows))
+    seconds = rng.integers(8 * 3600, 22 * 3600, rows)
+    last_update = (target - pd.to_timedelta(days_back, unit="D") + pd.to_timedelta(seconds, unit="s"))
+    last_update_text = last_update.strftime("%d/%m/%Y %H:%M:%S").to_numpy().astype(object) + " -03:00"
+
+    # admissão: 1 a 15 anos atrás, em formato ISO ou brasileiro
+    admission = target - pd.to_timedelta(rng.integers(30, 15 * 365, rows), unit="D")
+    admission_text = np.where(
+        rng.random(rows) < 0.7,
+        admission.strftime("%Y-%m-%d").to_numpy(),
+        admission.strftime("%d/%m/%Y").to_numpy()
+    ).astype(object)
+
+    invalid = rng.random(rows) < invalid_rate
+    admission_text[invalid] = rng.choice(INVALID_ADMISSION_VALUES, invalid.sum())
+    hours = np.where(invalid & (rng.random(rows) < 0.5), np.nan, hours)
+
+    status = np.where(rng.random(rows) < active_rate, "Active", rng.choice(["On Leave", "Inactive"], rows))
+
+    return pd.DataFrame({
+        'EMPLOYEE_ID': employee_ids,
+        'CONTRIBUTOR_NAME': _people(rng, rows),
+        'CONTRIBUTOR_EMAIL': _emails("colaborador", employee_ids),
+        'TEAM': np.char.add("Time ", team_ids.astype(str)),
+        'MANAGER_NAME': manager_names[team_ids],
+        'MANAGER_EMAIL': _emails("gestor", team_ids),
+        'AREA': AREAS[area_of_coordinator[coordinator_ids]],
+        'COORDINATOR_NAME': coordinator_names[coordinator_ids],
+        'COORDINATOR_EMAIL': _emails("coordenador", coordinator_ids),
+        'HOURS_WORKED': hours,
+        'LAST_UPDATE': last_update_text,
+        'ADMISSION_DATE': admission_text,
+        'COST_CENTER': np.char.add("CC-", (100 + coordinator_ids).astype(str)),
+        'STATUS': status,
+    }, columns=COLUMNS)
+
+
+def write_contributors_csv(path: str, rows: int, seed: int = 42, **kwargs) -> str:
+    """Gera e grava o arquivo de colaboradores; kwargs vão para generate_contributors."""
+    generate_contributors(rows, seed=seed, **kwargs).to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic contributors file.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Data de referência (AAAA-MM-DD).")
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    write_contributors_csv(args.output, args.rows, seed=args.seed, target_date=args.date)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Tuple
+
+from core.logger_config import logger
+
+
+class FakeQuotaExceeded(Exception):
+    """Equivalente ao APIError 429 do gspread."""
+
+
+class _Cell:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeWorksheet:
+    """Aba em memória com o subconjunto da API do gspread usado pelo GSheetsClient."""
+
+    def __init__(self, client: "FakeGSheetsClient", title: str):
+        self._client = client
+        self.title = title
+        self.rows: List[List] = []
+
+    def acell(self, label: str) -> _Cell:
+        self._client._consume("read")
+        value = self.rows[0][0] if label == "A1" and self.rows and self.rows[0] else None
+        return _Cell(value)
+
+    def get_all_values(self) -> List[List]:
+        self._client._consume("read")
+        return [list(row) for row in self.rows]
+
+    def append_row(self, row, value_input_option=None) -> None:
+        self._client._consume("write")
+        self.rows.append(list(row))
+
+    def append_rows(self, rows, value_input_option=None) -> None:
+        self._client._consume("write")
+        self.rows.extend(list(row) for row in rows)
+
+    def clear(self) -> None:
+        self._client._consume("write")
+        self.rows = []
+
+    def update(self, range_name, rows, value_input_option=None) -> None:
+        self._client._consume("write")
+        self.rows = [list(row) for row in rows]
+
+
+class FakeGSheetsClient:
+    """
+    Substituto em memória do GSheetsClient (mesmos métodos públicos) com
+    cotas simuladas de leitura e escrita por minuto, como as da API do Google
+    Sheets. Quando a cota estoura, a chamada falha como na API real e o
+    método retorna False/None, registrando a rejeição em 'stats'.
+    """
+
+    def __init__(self, reads_per_minute: int = 300, writes_per_minute: int = 300, api_latency: float = 0.0):
+        self.client = True
+        self.quotas = {"read": reads_per_minute, "write": writes_per_minute}
+        self.api_latency = api_latency
+        self.stats = {"read": 0, "write": 0, "quota_rejections": 0}
+        self._calls: Dict[str, deque] = {"read": deque(), "write": deque()}
+        self._lock = threading.Lock()
+        self._worksheets: Dict[Tuple[str, str], FakeWorksheet] = {}
+
+    def _consume(self, kind: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            calls = self._calls[kind]
+            while calls and now - calls[0] >= 60:
+                calls.popleft()
+            if len(calls) >= self.quotas[kind]:
+                self.stats["quota_rejections"] += 1
+                raise FakeQuotaExceeded(f"Quota exceeded for '{kind}' requests per minute")
+            calls.append(now)
+            self.stats[kind] += 1
+        if self.api_latency:
+            time.sleep(self.api_latency)
+
+    def get_worksheet(self, spreadsheet_id, worksheet_name):
+        if not spreadsheet_id or not worksheet_name:
+            logger.error("Spreadsheet ID and Worksheet name are required.")
+            return None
+        key = (spreadsheet_id, worksheet_name)
+        if key not in self._worksheets:
+            self._worksheets[key] = FakeWorksheet(self, worksheet_name)
+        return self._worksheets[key]
+
+    def forget_worksheet(self, spreadsheet_id, worksheet_name):
+        pass
+
+    def ensure_headers(self, spreadsheet_id, worksheet_name, headers):
+        worksheet = self.get_worksheet(spreadsheet_id, worksheet_name)
+        if not worksheet:
+            return
+        try:
+            if not worksheet.acell('A1').value:
+                worksheet.append_row(headers)
+        except FakeQuotaExceeded as e:
+            logger.error(f"❌ Failed to ensure headers on worksheet '{worksheet_name}': {e}")
+
+    def append_rows(self, spreadsheet_id, worksheet_name, data_rows):
+        worksheet = self.get_worksheet(spreadsheet_id, worksheet_name)
+        if not worksheet:
+            return False
+        try:
+            worksheet.append_rows(data_rows)
+            return True
+        except FakeQuotaExceeded as e:
+            logger.error(f"❌ Error appending rows to Google Sheets: {e}")
+            return False
+
+    def clear_and_write_rows(self, spreadsheet_id, worksheet_name, data_rows):
+        worksheet = self.get_worksheet(spreadsheet_id, worksheet_name)
+        if not worksheet:
+            return False
+        try:
+            worksheet.clear()
+            worksheet.update('A1', data_rows)
+            return True
+        except FakeQuotaExceeded as e:
+            logger.error(f"❌ Error clearing and writing to Google Sheets: {e}")
+            return False
+
+    def row_counts(self) -> Dict[str, int]:
+        return {worksheet.title: len(worksheet.rows) for worksheet in self._worksheets.values()}
@@ -0,0 +1,127 @@
+import time
+import random
+import threading
+import socketserver
+from typing import List, Optional
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Sessão SMTP mínima (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, NOOP, RSET, QUIT), sem TLS."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        server: FakeSMTPServer = self.server.owner
+        server._count("connections")
+        self._reply("220 fake-smtp ESMTP ready")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="ignore").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-fake-smtp\r\n250-AUTH PLAIN\r\n250-SIZE 35882577\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+
+                if server.latency:
+                    time.sleep(server.latency)
+                outcome = server._roll()
+                if outcome == "throttle":
+                    server._count("throttled")
+                    self._reply("421 4.7.0 Try again later, closing connection")
+                    return
+                if outcome == "error":
+                    server._count("rejected")
+                    self._reply("554 5.6.0 Message rejected")
+                    continue
+                server._record_message(size)
+                self._reply("250 2.0.0 OK: queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 5.5.2 Command not implemented")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeSMTPServer:
+    """
+    Relay SMTP local para testes de carga: aceita qualquer login, descarta as
+    mensagens e injeta latência, rejeições (554) e throttling (421 + desconexão)
+    nas taxas configuradas. Use com SMTP_USE_TLS=false.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"connections": 0, "delivered": 0, "rejected": 0, "throttled": 0, "bytes": 0}
+        self.delivery_times: List[float] = []
+
+        self._server = _ThreadingServer((host, port), _SMTPHandler)
+        self._server.owner = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self) -> str:
+        with self._lock:
+            value = self._random.random()
+        if value < self.throttle_rate:
+            return "throttle"
+        if value < self.throttle_rate + self.error_rate:
+            return "error"
+        return "ok"
+
+    def _record_message(self, size: int) -> None:
+        with self._lock:
+            self.stats["delivered"] += 1
+            self.stats["bytes"] += size
+            self.delivery_times.append(time.monotonic())
+
+    def start(self) -> "FakeSMTPServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeSMTPServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,157 @@
+"""
+Teste de carga dos orquestradores diário e semanal contra um relay SMTP local
+(benchmarks/fake_smtp.py) e um Google Sheets em memória (benchmarks/fake_gsheets.py).
+
+Ex:
+    python benchmarks/load_test.py --messages 10000 --latency 0.01 --throttle-rate 0.001
+"""
+import argparse
+import resource
+import tempfile
+import tracemalloc
+import time
+import sys
+import os
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/benchmarks)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# pega o diretório "pai" da pasta do script (a raiz do projeto, ex: .../Automação_RH)
+project_root = os.path.dirname(script_dir)
+# adiciona a raiz do projeto (e scripts/, para os orquestradores) à lista de caminhos do Python
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "scripts"))
+
+import config
+from core import email_sender, gsheets_service
+from core.sender_pool import SenderAccount, SenderPool, UsageTracker
+from benchmarks.fake_smtp import FakeSMTPServer
+from benchmarks.fake_gsheets import FakeGSheetsClient
+from benchmarks.datagen import write_contributors_csv
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _configure(args, workdir: str, smtp: FakeSMTPServer, sheets: FakeGSheetsClient) -> None:
+    """Aponta as automações para os dados sintéticos e os backends falsos."""
+    config.CONTRIBUTORS_FILE = os.path.join(workdir, "contributors.csv")
+    config.QUARANTINE_DIR = os.path.join(workdir, "quarantine")
+    config.HISTORY_DIR = os.path.join(workdir, "history")
+    config.ROLLUP_DIR = os.path.join(workdir, "rollups")
+    config.EMAIL_TEST_LIMIT = args.messages
+    config.EMAIL_TEST_RECIPIENT = None
+    config.INCREMENTAL_PROCESSING = False
+    config.ENABLE_EMAIL_DIGEST = False
+    config.EMAIL_DELIVERY_MODE = "direct"
+    config.GOOGLE_SHEET_ID = config.GOOGLE_SHEET_ID or "benchmark-sheet"
+    config.MAX_PARALLEL_WORKERS = args.workers
+    config.SMTP_USE_TLS = False
+    config.SMTP_THROTTLE_COOLDOWN = args.cooldown
+
+    gsheets_service.gsheets_client = sheets
+    email_sender.sender_pool = SenderPool(
+        [
+            SenderAccount(f"bench-{i}", smtp.host, smtp.port, f"bench-{i}@example.com", "secret")
+            for i in range(args.accounts)
+        ],
+        usage=UsageTracker(os.path.join(workdir, "sender_usage.json"))
+    )
+
+
+def _run_flow(name: str, orchestrator, smtp: FakeSMTPServer, latencies: list, trace_memory: bool) -> dict:
+    delivered_before = smtp.stats["delivered"]
+    latencies.clear()
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    started = time.perf_counter()
+    orchestrator.main()
+    elapsed = time.perf_counter() - started
+
+    delivered = smtp.stats["delivered"] - delivered_before
+    return {
+        "flow": name,
+        "messages": delivered,
+        "seconds": elapsed,
+        "msgs_per_sec": delivered / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "peak_traced_mb": tracemalloc.get_traced_memory()[1] / 2**20 if trace_memory else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the HR automations against local fakes.")
+    parser.add_argument("--messages", type=int, default=1000, help="Linhas de colaboradores (~e-mails do fluxo diário).")
+    parser.add_argument("--flows", default="daily,weekly", help="Fluxos a executar, separados por vírgula.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência (s) do relay por mensagem.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de mensagens rejeitadas (554).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fração de respostas 421 com desconexão.")
+    parser.add_argument("--accounts", type=int, default=2, help="Contas de envio apontando para o relay.")
+    parser.add_argument("--cooldown", type=int, default=1, help="Pausa (s) de uma conta após 421.")
+    parser.add_argument("--workers", type=int, default=config.MAX_PARALLEL_WORKERS, help="Threads de envio.")
+    parser.add_argument("--sheets-writes-per-minute", type=int, default=300, help="Cota simulada de escrita.")
+    parser.add_argument("--trace-memory", action="store_true", help="Mede o pico com tracemalloc (mais lento).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import run_daily_automations
+    import run_weekly_automations
+    orchestrators = {"daily": run_daily_automations, "weekly": run_weekly_automations}
+
+    # latência de cada mensagem, medida na thread de envio
+    latencies = []
+    original_timed_send = email_sender._timed_send
+
+    def _recording_timed_send(email_job):
+        result = original_timed_send(email_job)
+        latencies.append(result.latency)
+        return result
+
+    email_sender._timed_send = _recording_timed_send
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    sheets = FakeGSheetsClient(writes_per_minute=args.sheets_writes_per_minute)
+    with tempfile.TemporaryDirectory() as workdir, FakeSMTPServer(
+        latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=args.seed
+    ) as smtp:
+        _configure(args, workdir, smtp, sheets)
+        # todas as linhas ativas, atualizadas hoje e acima do limite: cada uma gera um alerta diário
+        write_contributors_csv(
+            config.CONTRIBUTORS_FILE, args.messages, seed=args.seed,
+            updated_rate=1.0, overtime_rate=1.0, invalid_rate=0.0, active_rate=1.0
+        )
+
+        results = [
+            _run_flow(name, orchestrators[name], smtp, latencies, args.trace_memory)
+            for name in args.flows.split(",")
+        ]
+        email_sender.sender_pool.close_all()
+
+    print()
+    print(f"{'flow':<8} {'msgs':>8} {'secs':>8} {'msgs/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rss MB':>8} {'traced MB':>10}")
+    for r in results:
+        traced = f"{r['peak_traced_mb']:.1f}" if r['peak_traced_mb'] is not None else "-"
+        print(
+            f"{r['flow']:<8} {r['messages']:>8} {r['seconds']:>8.2f} {r['msgs_per_sec']:>9.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['peak_rss_mb']:>8.1f} {traced:>10}"
+        )
+    print(f"relay: {smtp.stats}")
+    print(f"sheets: {sheets.stats} rows={sheets.row_counts()}")
+
+
+if __name__ == "__main__":
+    main()
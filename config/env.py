@@ -3,6 +3,8 @@ from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .settings import REQUEST_TIMEOUT
+
 load_dotenv()
 
 # paths
@@ -10,11 +12,25 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 LOGS_DIR = BASE_DIR / "logs"
 TEMPLATES_DIR = BASE_DIR / "templates"
+COMPILED_TEMPLATES_DIR = BASE_DIR / "templates_compiled"
+STATE_DIR = BASE_DIR / "state"
+# linhas rejeitadas pela validação, com os motivos (ver core/validation.py)
+QUARANTINE_DIR = DATA_DIR / "quarantine"
+SENDER_USAGE_FILE = STATE_DIR / "sender_usage.json"
+SPOOL_DIR = Path(os.getenv("SPOOL_DIR", BASE_DIR / "spool"))
+# histórico local das execuções em Parquet, particionado por automação e data (ver core/history_store.py)
+HISTORY_DIR = Path(os.getenv("HISTORY_DIR", BASE_DIR / "history"))
+# agregados diários de horas extras por time, área, centro de custo e gestor (ver core/kpi_rollups.py)
+ROLLUP_DIR = Path(os.getenv("ROLLUP_DIR", STATE_DIR / "rollups"))
 CREDENTIALS_FILE = BASE_DIR / "google_credentials.json" 
+# arquivo, diretório ou padrão glob (ex: data/exports/*.csv) com as exportações de colaboradores
+CONTRIBUTORS_FILE = os.getenv("CONTRIBUTORS_FILE", str(DATA_DIR / "sample_data.csv"))
 # business rules
 HOURS_LIMIT = int(os.getenv("HOURS_LIMIT", 10))
 
 # execution
+# processa apenas linhas novas/alteradas desde a última execução (ver core/state_store.py)
+INCREMENTAL_PROCESSING = os.getenv("INCREMENTAL_PROCESSING", "true").lower() == "true"
 DATE_MODE = os.getenv("DATE_MODE", "today")
 SPECIFIC_DATE = (
     datetime.strptime(os.getenv("SPECIFIC_DATE"), "%Y-%m-%d").date()
@@ -26,8 +42,46 @@ SPECIFIC_DATE = (
 EMAIL_TEST_LIMIT = int(os.getenv("EMAIL_TEST_LIMIT", 10))
 EMAIL_TEST_RECIPIENT = os.getenv("EMAIL_TEST_RECIPIENT")
 
+# digest: agrupa as mensagens de uma execução em um único e-mail por destinatário
+ENABLE_EMAIL_DIGEST = os.getenv("ENABLE_EMAIL_DIGEST", "false").lower() == "true"
+# templates que sempre são enviados isoladamente (ex: alertas urgentes), separados por vírgula
+EMAIL_DIGEST_OPT_OUT = [t.strip() for t in os.getenv("EMAIL_DIGEST_OPT_OUT", "").split(",") if t.strip()]
+
 # performance
 MAX_PARALLEL_WORKERS = int(os.getenv("MAX_PARALLEL_WORKERS", 8))
+# processos usados para carregar várias exportações em paralelo (ver core/parallel_loader.py)
+MAX_PROCESS_WORKERS = int(os.getenv("MAX_PROCESS_WORKERS", os.cpu_count() or 1))
+# 'direct' envia na hora; 'spool' grava as mensagens em SPOOL_DIR para scripts/drain_spool.py
+EMAIL_DELIVERY_MODE = os.getenv("EMAIL_DELIVERY_MODE", "direct")
+# contas de envio: JSON com a lista de contas/relays (ver .env.example); sem ele, usa EMAIL_SENDER
+SMTP_SENDERS_FILE = os.getenv("SMTP_SENDERS_FILE")
+# limites da conta única (vazio = sem limite)
+SMTP_PER_MINUTE = int(os.getenv("SMTP_PER_MINUTE")) if os.getenv("SMTP_PER_MINUTE") else None
+SMTP_DAILY_QUOTA = int(os.getenv("SMTP_DAILY_QUOTA")) if os.getenv("SMTP_DAILY_QUOTA") else None
+# pausa (segundos) aplicada a uma conta que respondeu com throttling (ex: 421)
+SMTP_THROTTLE_COOLDOWN = int(os.getenv("SMTP_THROTTLE_COOLDOWN", 300))
+# STARTTLS antes do login (desligue apenas para relays locais/de teste, ex: benchmarks/)
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+# timeout (segundos) para conectar e para cada comando SMTP
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", REQUEST_TIMEOUT))
+# prazo (segundos) para um lote inteiro de envios; o que não terminar é reportado como timeout (vazio = sem prazo)
+EMAIL_BATCH_DEADLINE = float(os.getenv("EMAIL_BATCH_DEADLINE")) if os.getenv("EMAIL_BATCH_DEADLINE") else None
+# conexões SMTP ociosas por mais tempo que isso são fechadas em vez de reutilizadas
+SMTP_IDLE_TIMEOUT = int(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+
+# scheduler (daemon)
+DAILY_RUN_TIME = os.getenv("DAILY_RUN_TIME", "08:00")
+WEEKLY_RUN_DAY = os.getenv("WEEKLY_RUN_DAY", "monday")
+WEEKLY_RUN_TIME = os.getenv("WEEKLY_RUN_TIME", "08:30")
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", 30))
+
+# logging
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # 'text' ou 'json' (json lines)
+LOG_ROTATION = os.getenv("LOG_ROTATION", "time")  # 'time' (meia-noite) ou 'size'
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 14))
+LOG_SAMPLE_SIZE = int(os.getenv("LOG_SAMPLE_SIZE", 5))
+LOG_FILE_NAME = os.getenv("LOG_FILE_NAME")  # padrão: um arquivo por ponto de entrada (ver core/logger_config.py)
 
 # integrations
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
\ No newline at end of file
@@ -5,6 +5,8 @@ BATCH_SIZE = 500
 REQUEST_TIMEOUT = 10
 REPROCESS_INTERVAL = timedelta(days=1)
 ENABLE_DEBUG_LOGS = True
+# limite de HOURS_WORKED aceito na validação (core/validation.py)
+MAX_DAILY_HOURS = 24
 
 # constants
 COL_HOURS = "Horas"
@@ -1,29 +1,117 @@
+import os
+import threading
 import pandas as pd
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from core.logger_config import logger
+from core.validation import validate_contributors
 
-def load_processed_data(filepath: str) -> Optional[pd.DataFrame]:
+# colunas convertidas de texto para data/número durante a carga
+PARSED_COLUMNS = ['LAST_UPDATE', 'ADMISSION_DATE', 'HOURS_WORKED']
+
+# cache opcional dos DataFrames já processados, usado por processos de longa duração
+# (ex: o scheduler); a chave é o caminho e o valor guarda (mtime, tamanho, df)
+_cache_enabled = False
+_cache: Dict[str, Tuple[int, int, pd.DataFrame]] = {}
+_cache_lock = threading.Lock()
+
+
+def enable_cache(enabled: bool = True) -> None:
+    """Liga ou desliga o cache de DataFrames processados."""
+    global _cache_enabled
+    _cache_enabled = enabled
+    if not enabled:
+        invalidate_cache()
+
+
+def cache_enabled() -> bool:
+    return _cache_enabled
+
+
+def invalidate_cache(filepath: Optional[str] = None) -> None:
+    """Remove do cache um arquivo específico ou, sem argumento, todos."""
+    with _cache_lock:
+        if filepath is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(filepath), None)
+
+
+def file_signature(filepath: str) -> Optional[Tuple[int, int]]:
+    """(mtime, tamanho) do arquivo, usado para saber se a versão em cache ainda vale; None se não existir."""
+    try:
+        stat = os.stat(os.path.abspath(filepath))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_cached(filepath: str, signature: Optional[Tuple[int, int]]) -> Optional[pd.DataFrame]:
+    """Cópia do DataFrame em cache se o cache estiver ligado e o arquivo não tiver mudado; senão None."""
+    if not _cache_enabled or signature is None:
+        return None
+    with _cache_lock:
+        cached = _cache.get(os.path.abspath(filepath))
+    if cached and cached[:2] == signature:
+        logger.info(f"Using cached data for {filepath}.")
+        return cached[2].copy()
+    return None
+
+
+def put_cached(filepath: str, signature: Optional[Tuple[int, int]], df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Guarda o DataFrame processado (se o cache estiver ligado) e devolve uma cópia para uso.
+    'signature' deve ser lida antes do arquivo: se ele mudar durante a leitura, a
+    próxima carga não casa com o cache e lê de novo.
+    """
+    if not _cache_enabled or signature is None:
+        return df
+    with _cache_lock:
+        _cache[os.path.abspath(filepath)] = (signature[0], signature[1], df)
+    return df.copy()
+
+
+def load_processed_data(filepath: str, use_cache: bool = True) -> Optional[pd.DataFrame]:
     """
     Loads data directly from a CSV file into a pandas DataFrame,
     validates, and processes all date columns.
+
+    When the cache is enabled, an unchanged file (same mtime and size) is
+    served from memory instead of being parsed again. use_cache=False always
+    parses the file (ex: in a worker process, whose cache would be lost).
     """
+    if not (_cache_enabled and use_cache):
+        return _read_and_process(filepath)
+
+    signature = file_signature(filepath)
+    if signature is None:
+        logger.error(f"File not found: {filepath}")
+        return None
+
+    df = get_cached(filepath, signature)
+    if df is not None:
+        return df
+
+    df = _read_and_process(filepath)
+    return put_cached(filepath, signature, df) if df is not None else None
+
+
+def _read_and_process(filepath: str) -> Optional[pd.DataFrame]:
+    """Reads the CSV and parses its date columns."""
     try:
         # lê o csv diretamente para um dataFrame do pandas
         df = pd.read_csv(filepath, sep=',')
         logger.info(f"Successfully loaded data from {filepath}.")
    
+        # guarda o texto original das colunas convertidas, mostrado na quarentena
+        raw = df[PARSED_COLUMNS].copy()
+
         df['LAST_UPDATE'] = pd.to_datetime(df['LAST_UPDATE'], dayfirst=True, errors='coerce')
         df['ADMISSION_DATE'] = pd.to_datetime(df['ADMISSION_DATE'], format='mixed', dayfirst=True, errors='coerce')
+        df['HOURS_WORKED'] = pd.to_numeric(df['HOURS_WORKED'], errors='coerce')
 
-        # verificação de datas inválidas
-        invalid_dates = df[df['ADMISSION_DATE'].isnull()]
-        if not invalid_dates.empty:
-            logger.warning(
-                f"Found {len(invalid_dates)} rows with invalid dates in 'ADMISSION_DATE'. "
-                "These rows will be ignored by anniversary checks."
-            )
-            for _, row in invalid_dates.iterrows():
-                logger.warning(f" -> Invalid admission date for EMPLOYEE_ID: {row.get('EMPLOYEE_ID', 'N/A')}")
+        # todas as regras de uma vez; as linhas rejeitadas vão para a quarentena
+        # e as etapas seguintes só recebem linhas válidas
+        df = validate_contributors(df, source=filepath, raw=raw).clean
         
         return df
 
@@ -0,0 +1,92 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from core.logger_config import logger
+
+_BODY_RE = re.compile(r"<body[^>]*>(.*)</body>", re.IGNORECASE | re.DOTALL)
+_FOOTER_RE = re.compile(r"<div class=\"footer\"[^>]*>.*?</div>", re.IGNORECASE | re.DOTALL)
+_CONTENT_RE = re.compile(r"<div\b[^>]*\bclass=[\"'][^\"']*\bcontent\b[^\"']*[\"'][^>]*>", re.IGNORECASE)
+_DIV_TAG_RE = re.compile(r"<(/?)div\b[^>]*>", re.IGNORECASE)
+
+
+def _content_block(body: str):
+    """Conteúdo interno do primeiro <div class="content">, casando os <div> aninhados; None se não houver."""
+    start = _CONTENT_RE.search(body)
+    if not start:
+        return None
+    depth = 1
+    for tag in _DIV_TAG_RE.finditer(body, start.end()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return body[start.end():tag.start()].strip()
+    return None
+
+
+def extract_section(body: str) -> str:
+    """
+    Extrai o conteúdo de um e-mail já renderizado para ser usado como seção
+    de um digest: só o bloco .content, sem o container, o cabeçalho e o
+    rodapé da mensagem original (o assunto vira o título da seção).
+    E-mails sem esse bloco usam o <body> inteiro, sem o rodapé.
+    """
+    content = _content_block(body)
+    if content is not None:
+        return content
+    match = _BODY_RE.search(body)
+    section = match.group(1) if match else body
+    return _FOOTER_RE.sub("", section).strip()
+
+
+class DigestCollector:
+    """
+    Agrupa, por destinatário, as mensagens geradas pelas automações durante
+    uma execução, para que sejam enviadas como um único e-mail (digest).
+    """
+
+    def __init__(self):
+        self.active = False
+        # destinatário -> mensagens pendentes ({'subject', 'body', 'on_result', 'key'})
+        self._pending: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Passa a reter as mensagens em vez de enviá-las imediatamente."""
+        with self._lock:
+            self._pending.clear()
+            self.active = True
+        logger.info("Digest coalescing enabled for this run.")
+
+    def add(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        on_result: Optional[Callable] = None,
+        key: Any = None
+    ) -> None:
+        """
+        Registra uma mensagem pendente para o destinatário. on_result é chamado
+        com o resultado (e a 'key' da mensagem) quando o digest for enviado.
+        """
+        with self._lock:
+            self._pending.setdefault(recipient, []).append(
+                {'subject': subject, 'body': body, 'on_result': on_result, 'key': key}
+            )
+
+    def drain(self) -> OrderedDict:
+        """Encerra a coleta e devolve as mensagens pendentes agrupadas por destinatário."""
+        with self._lock:
+            pending = self._pending
+            self._pending = OrderedDict()
+            self.active = False
+        return pending
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(messages) for messages in self._pending.values())
+
+
+# exporta uma instância padrão
+digest_collector = DigestCollector()
@@ -1,65 +1,317 @@
 import smtplib
-import ssl
 from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 import os
+import time
+import atexit
+import logging
+import itertools
 import concurrent.futures
-from typing import List, Dict, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
 
 import config
-from core.logger_config import logger
+from core.logger_config import logger, log_aggregated
+from core.sender_pool import SenderPool, load_sender_accounts, classify_smtp_error
+from core.mail_spool import MailSpool
 
 SMTP_SERVER = config.os.getenv('SMTP_SERVER')
 SMTP_PORT = int(config.os.getenv('SMTP_PORT', '587'))
 EMAIL_SENDER = config.os.getenv('EMAIL_SENDER')
 EMAIL_PASSWORD = config.os.getenv('EMAIL_PASSWORD')
 
-def _send_single_email(email_job: Dict[str, str]) -> Tuple[str, str]:
-    """Internal function to send one email. Meant to be run in a thread."""
-    recipient = email_job.get('recipient', 'unknown_recipient')
+# jobs submetidos por worker à frente do que já terminou (limita memória com geradores)
+SUBMISSION_WINDOW = 4
+# rodadas de espera pelo cooldown quando todas as contas restantes estão em pausa
+THROTTLE_ROUNDS = 3
+# limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 30)
+# prefixos do status dos jobs afetados pelo prazo do lote (ver iter_send_results)
+TIMED_OUT = "Timed out"
+ABANDONED = "Abandoned"
+
+
+class SendResult(NamedTuple):
+    """
+    Resultado de um envio; latency é None quando o job estourou o prazo do lote
+    (status TIMED_OUT ou ABANDONED).
+    key é o valor de 'key' do job (ex: a posição da linha de origem), para que
+    on_result saiba a que registro o resultado se refere.
+    """
+    recipient: str
+    status: str
+    latency: Optional[float]
+    key: Any = None
+
+
+# contas de envio compartilhadas pelas threads (uma única conta se SMTP_SENDERS_FILE não existir)
+sender_pool = SenderPool(load_sender_accounts())
+atexit.register(sender_pool.close_all)
+
+
+def _deliver(account, msg: EmailMessage) -> None:
+    """Envia a mensagem por uma conexão da conta, reabrindo-a uma vez se tiver caído."""
+    connections = account.connections
+    server = connections.acquire()
     try:
-        subject = email_job['subject']
-        body = email_job['body']
-
-        msg = EmailMessage()
-        msg['Subject'] = subject
-        msg['From'] = EMAIL_SENDER
-        msg['To'] = recipient
-        msg.set_content(body, subtype='html')
-
-        context = ssl.create_default_context()
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls(context=context)
-            server.login(EMAIL_SENDER, EMAIL_PASSWORD)
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # a conexão reutilizada foi encerrada pelo servidor; tenta uma vez com uma nova
+            connections.discard(server)
+            server = connections.acquire()
             server.send_message(msg)
-        
-        logger.debug(f"Email sent successfully to {recipient}")
+    except Exception:
+        connections.discard(server)
+        raise
+    connections.release(server)
+
+
+def build_message(email_job: Dict[str, str]) -> EmailMessage:
+    """Monta a mensagem RFC 5322 de um job; o 'From' é definido pela conta que enviar."""
+    msg = EmailMessage()
+    msg['Subject'] = email_job['subject']
+    msg['To'] = email_job['recipient']
+    msg['Date'] = formatdate(localtime=True)
+    msg['Message-ID'] = make_msgid()
+    msg.set_content(email_job['body'], subtype='html')
+    return msg
+
+
+def send_prepared_message(msg: EmailMessage) -> Tuple[str, str]:
+    """
+    Envia uma mensagem já montada (ex: lida do spool), com failover entre as
+    contas de envio. Returns: (recipient, status).
+    """
+    recipient = msg.get('To', 'unknown_recipient')
+    try:
+        # tenta cada conta uma vez por rodada: throttling e cota esgotada passam para a
+        # próxima; se só restarem contas em pausa, uma nova rodada espera o cooldown delas
+        # (o acquire aguarda) em vez de falhar, até THROTTLE_ROUNDS vezes
+        tried, throttled = set(), set()
+        rounds = 0
+        while True:
+            account = sender_pool.acquire(exclude=tried)
+            if account is None and throttled and rounds < THROTTLE_ROUNDS:
+                rounds += 1
+                tried -= throttled
+                throttled.clear()
+                logger.info(f"Only throttled sender accounts left for {recipient}. Waiting for the cooldown.")
+                continue
+            if account is None:
+                raise RuntimeError("No sender account available (all throttled, failed or over quota).")
+            tried.add(account.name)
+
+            del msg['From']
+            msg['From'] = account.from_address
+            try:
+                _deliver(account, msg)
+            except Exception as e:
+                sender_pool.release(account, sent=False)
+                kind = classify_smtp_error(e)
+                if kind == 'permanent':
+                    raise
+                if kind == 'exhausted':
+                    sender_pool.exhaust(account)
+                elif kind == 'throttled':
+                    sender_pool.throttle(account)
+                    throttled.add(account.name)
+                logger.warning(f"Sender '{account.name}' failed for {recipient} ({kind}): {e}. Trying another account.")
+                continue
+
+            sender_pool.release(account, sent=True)
+            break
+
+        logger.debug(f"Email sent successfully to {recipient} via '{account.name}'")
         return (recipient, "Success")
-        
+
     except Exception as e:
         error_message = str(e).strip()
         # add 'exc_info=True' para logar o traceback completo do erro, para identificar problemas de conexão
         logger.error(f"Failed to send email to {recipient}. Error: {error_message}", exc_info=True)
         return (recipient, f"Failed: {error_message}")
 
-def send_emails_in_parallel(email_jobs: List[Dict[str, str]], test_limit: int = None) -> Tuple[int, int]:
+
+def _send_single_email(email_job: Dict[str, str]) -> Tuple[str, str]:
+    """Internal function to send one email. Meant to be run in a thread."""
+    recipient = email_job.get('recipient', 'unknown_recipient')
+    try:
+        msg = build_message(email_job)
+    except Exception as e:
+        logger.error(f"Failed to build email to {recipient}. Error: {e}", exc_info=True)
+        return (recipient, f"Failed: {e}")
+    return send_prepared_message(msg)
+
+def _timed_send(email_job: Dict[str, str]) -> SendResult:
+    """Envia um job e mede a latência dentro da thread (sem o tempo de espera na fila)."""
+    started = time.perf_counter()
+    recipient, status = _send_single_email(email_job)
+    return SendResult(recipient, status, time.perf_counter() - started, email_job.get('key'))
+
+
+def iter_send_results(
+    email_jobs: Iterable[Dict[str, str]],
+    deadline: Optional[float] = None
+) -> Iterator[SendResult]:
     """
-    Receives a list of email jobs and sends them in parallel.
-    Returns: (success_count, failed_count)
+    Envia os jobs em paralelo e produz cada resultado assim que ele termina.
+
+    Os jobs são consumidos sob demanda (no máximo SUBMISSION_WINDOW por worker
+    em voo), então email_jobs pode ser um gerador. Após 'deadline' segundos:
+    - os jobs que nem começaram são cancelados e reportados como TIMED_OUT
+      (com certeza não foram enviados);
+    - os que já estavam enviando são reportados como ABANDONED: continuam em
+      segundo plano e podem ainda ser entregues, então o resultado é desconhecido.
+      O uso das contas é gravado de novo quando eles terminam;
+    - os que ainda não tinham sido lidos de email_jobs ficam sem resultado (e,
+      num gerador, sem renderizar): como os não enviados, voltam na próxima execução.
     """
-    if not email_jobs:
-        return 0, 0
+    jobs = iter(email_jobs)
+    window = config.MAX_PARALLEL_WORKERS * SUBMISSION_WINDOW
+    expires_at = time.monotonic() + deadline if deadline is not None else None
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.MAX_PARALLEL_WORKERS)
+    in_flight = {}
+
+    def _fill() -> None:
+        for email_job in itertools.islice(jobs, window - len(in_flight)):
+            in_flight[executor.submit(_timed_send, email_job)] = email_job
+
+    try:
+        _fill()
+        while in_flight:
+            remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            done, _ = concurrent.futures.wait(
+                in_flight, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                in_flight.pop(future)
+                yield future.result()
+            _fill()
+
+        # prazo estourado: o que não começou é cancelado; o que está enviando fica em segundo plano
+        timeout_status = f"{TIMED_OUT}: batch deadline of {deadline}s exceeded"
+        abandoned_status = f"{ABANDONED}: still sending when the batch deadline of {deadline}s was exceeded; outcome unknown"
+        for future, email_job in list(in_flight.items()):
+            status = timeout_status
+            if not future.cancel():
+                status = abandoned_status
+                # a conta é liberada e contada quando o envio termina; grava o uso de novo nessa hora
+                future.add_done_callback(lambda _: sender_pool.usage.flush())
+            yield SendResult(email_job.get('recipient', 'unknown_recipient'), status, None, email_job.get('key'))
+        if in_flight:
+            # os jobs que ainda não saíram de email_jobs não são lidos: com um gerador,
+            # isso renderizaria cada template restante só para reportá-lo como não enviado
+            logger.warning(
+                f"Email batch deadline of {deadline}s exceeded; any jobs not yet taken from the queue were left unsent."
+            )
+    finally:
+        # não espera as threads presas; o timeout de socket (SMTP_TIMEOUT) as encerra
+        executor.shutdown(wait=False, cancel_futures=True)
+        sender_pool.usage.flush()
 
-    if test_limit is not None and len(email_jobs) > test_limit:
-        logger.info(f"Test limit active. Processing only the first {test_limit} of {len(email_jobs)} jobs.")
-        email_jobs = email_jobs[:test_limit]
 
-    logger.info(f"Preparing to send {len(email_jobs)} emails in parallel...")
+def _latency_bucket(latency: float) -> str:
+    for limit in LATENCY_BUCKETS:
+        if latency <= limit:
+            return f"<={limit}s"
+    return f">{LATENCY_BUCKETS[-1]}s"
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=config.MAX_PARALLEL_WORKERS) as executor:
-        results = list(executor.map(_send_single_email, email_jobs))
 
-    success_count = sum(1 for _, status in results if status == "Success")
-    failed_count = len(results) - success_count
+def send_emails_with_stats(
+    email_jobs: Iterable[Dict[str, str]],
+    test_limit: int = None,
+    on_result: Optional[Callable[[SendResult], None]] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Envia os jobs em paralelo, chamando on_result(SendResult) a cada mensagem
+    concluída (com sua latência), e retorna os totais com um histograma de latência.
 
-    logger.info(f"Email sending task finished: {success_count} succeeded, {failed_count} failed.")
-    return success_count, failed_count
\ No newline at end of file
+    Returns:
+        Dict: {'success', 'failed', 'timed_out', 'abandoned', 'latency_histogram', 'max_latency'}.
+        'timed_out' não foi enviado; 'abandoned' ainda estava enviando no fim do prazo
+        (pode ter sido entregue) e não conta como falha.
+    """
+    deadline = config.EMAIL_BATCH_DEADLINE if deadline is None else deadline
+    stats = {
+        'success': 0,
+        'failed': 0,
+        'timed_out': 0,
+        'abandoned': 0,
+        'latency_histogram': {_latency_bucket(limit): 0 for limit in LATENCY_BUCKETS + (float('inf'),)},
+        'max_latency': 0.0,
+    }
+    if test_limit is not None:
+        logger.info(f"Test limit active. Processing at most {test_limit} jobs.")
+        email_jobs = itertools.islice(email_jobs, test_limit)
+
+    def _notify(result: SendResult) -> None:
+        if on_result is not None:
+            try:
+                on_result(result)
+            except Exception as e:
+                logger.error(f"on_result callback failed for {result.recipient}. Error: {e}", exc_info=True)
+
+    if config.EMAIL_DELIVERY_MODE == 'spool':
+        # só grava as mensagens; o envio fica com scripts/drain_spool.py
+        # (a mensagem gravada no spool conta como entregue: o drenador garante o envio)
+        spool = MailSpool(config.SPOOL_DIR)
+        for email_job in email_jobs:
+            recipient = email_job.get('recipient', 'unknown_recipient')
+            started = time.perf_counter()
+            try:
+                spool.enqueue(build_message(email_job))
+                stats['success'] += 1
+                status = "Success"
+            except Exception as e:
+                logger.error(f"Failed to spool email to {recipient}. Error: {e}", exc_info=True)
+                stats['failed'] += 1
+                status = f"Failed: {e}"
+            _notify(SendResult(recipient, status, time.perf_counter() - started, email_job.get('key')))
+        if stats['success'] or stats['failed']:
+            logger.info(f"Spooled {stats['success']} emails to {config.SPOOL_DIR} for the drain workers.")
+        return stats
+
+    timed_out_recipients, abandoned_recipients = [], []
+    for result in iter_send_results(email_jobs, deadline=deadline):
+        if result.latency is None and result.status.startswith(ABANDONED):
+            stats['abandoned'] += 1
+            abandoned_recipients.append(result.recipient)
+        elif result.latency is None:
+            stats['timed_out'] += 1
+            timed_out_recipients.append(result.recipient)
+        elif result.status == "Success":
+            stats['success'] += 1
+        else:
+            stats['failed'] += 1
+
+        if result.latency is not None:
+            stats['latency_histogram'][_latency_bucket(result.latency)] += 1
+            stats['max_latency'] = max(stats['max_latency'], result.latency)
+
+        _notify(result)
+
+    log_aggregated(logging.ERROR, f"Email batch deadline of {deadline}s exceeded", timed_out_recipients)
+    log_aggregated(
+        logging.WARNING,
+        f"Email batch deadline of {deadline}s exceeded while sending; delivery unknown", abandoned_recipients
+    )
+    total = stats['success'] + stats['failed'] + stats['timed_out'] + stats['abandoned']
+    if total:
+        logger.info(
+            f"Email sending task finished: {stats['success']} succeeded, {stats['failed']} failed, "
+            f"{stats['timed_out']} timed out, {stats['abandoned']} abandoned (outcome unknown). "
+            f"Max latency: {stats['max_latency']:.2f}s."
+        )
+    return stats
+
+
+def send_emails_in_parallel(email_jobs: Iterable[Dict[str, str]], test_limit: int = None) -> Tuple[int, int]:
+    """
+    Receives a list of email jobs and sends them in parallel.
+    Returns: (success_count, failed_count), where failed includes timed out jobs
+    (abandoned ones, whose outcome is unknown, are in neither).
+    """
+    stats = send_emails_with_stats(email_jobs, test_limit=test_limit)
+    return stats['success'], stats['failed'] + stats['timed_out']
@@ -1,19 +1,30 @@
 import os
-from typing import List, Dict, Optional, Tuple
-from jinja2 import Environment, FileSystemLoader
+import itertools
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from jinja2 import Environment
 
 import config
 from core.logger_config import logger
 from core import email_sender
+from core.digest_service import digest_collector, extract_section
+from core.template_compiler import CompiledTemplateLoader
 
 # configurar o ambiente "Jinja2" uma única vez
+# usa os templates compilados (scripts/build_templates.py) quando estiverem em dia
 try:
-    jinja_env = Environment(loader=FileSystemLoader(config.TEMPLATES_DIR))
+    jinja_env = Environment(loader=CompiledTemplateLoader(config.TEMPLATES_DIR, config.COMPILED_TEMPLATES_DIR))
     logger.info("Jinja2 environment configured successfully.")
 except Exception as e:
     logger.error(f"Failed to configure Jinja2 environment: {e}")
     jinja_env = None
 
+def reload_templates() -> None:
+    """Descarta os templates já compilados pelo Jinja2, forçando a releitura dos arquivos."""
+    if jinja_env and jinja_env.cache is not None:
+        jinja_env.cache.clear()
+        logger.info("Jinja2 template cache cleared.")
+
 def render_template_with_jinja(template_name: str, context: Dict) -> Optional[str]:
     """Lê e renderiza um template HTML usando Jinja2."""
     if not jinja_env:
@@ -51,7 +62,9 @@ def send_bulk_notifications(
     jobs_data: List[Dict],
     template_name: str,
     subject_template: str,
-    test_limit: Optional[int] = None
+    test_limit: Optional[int] = None,
+    coalesce: Optional[bool] = None,
+    on_result: Optional[Callable[[email_sender.SendResult], None]] = None
 ) -> Tuple[int, int]:
     """
     Prepara e envia múltiplos e-mails, cada um com seu próprio contexto.
@@ -61,11 +74,16 @@ def send_bulk_notifications(
                    Ex: [{'recipient': 'a@a.com', 'context': {'name': 'John'}}, ...]
         template_name: O nome do arquivo de template HTML.
         subject_template: O template para o assunto do e-mail.
+        coalesce: Se o digest estiver ativo, retém as mensagens para envio agrupado
+                  por destinatário (ver send_pending_digests). Por padrão, vale para
+                  todo template que não esteja em config.EMAIL_DIGEST_OPT_OUT.
+        on_result: Chamado com o SendResult de cada mensagem (key = posição em jobs_data),
+                   inclusive das retidas pelo digest, quando ele for enviado.
     """
     logger.info(f"Preparing bulk email sending task for {len(jobs_data)} jobs.")
     
     email_jobs = []
-    for job_info in jobs_data:
+    for position, job_info in enumerate(jobs_data):
         recipient = job_info.get('recipient')
         context = job_info.get('context', {})
         
@@ -85,9 +103,161 @@ def send_bulk_notifications(
         email_jobs.append({
             'recipient': recipient,
             'subject': subject,
-            'body': body
+            'body': body,
+            'key': position
         })
 
-    # chama o sender com a lista de jobs e retorna o resultado
-    success, failed = email_sender.send_emails_in_parallel(email_jobs, test_limit=test_limit)
-    return success, failed
\ No newline at end of file
+    return _dispatch_jobs(email_jobs, template_name, test_limit, coalesce, on_result)
+
+def _dispatch_jobs(
+    email_jobs: Iterable[Dict],
+    template_name: str,
+    test_limit: Optional[int],
+    coalesce: Optional[bool],
+    on_result: Optional[Callable[[email_sender.SendResult], None]] = None
+) -> Tuple[int, int]:
+    """Envia os jobs já renderizados ou, com o digest ativo, os retém para o envio agrupado."""
+    if coalesce is None:
+        coalesce = template_name not in config.EMAIL_DIGEST_OPT_OUT
+
+    if coalesce and digest_collector.active:
+        if test_limit is not None:
+            email_jobs = itertools.islice(email_jobs, test_limit)
+        queued = 0
+        for email_job in email_jobs:
+            digest_collector.add(
+                email_job['recipient'], email_job['subject'], email_job['body'],
+                on_result=on_result, key=email_job.get('key')
+            )
+            queued += 1
+        logger.info(f"Queued {queued} emails for digest delivery at the end of the run.")
+        return 0, 0
+
+    # chama o sender com os jobs e retorna o resultado
+    stats = email_sender.send_emails_with_stats(email_jobs, test_limit=test_limit, on_result=on_result)
+    return stats['success'], stats['failed'] + stats['timed_out']
+
+def send_bulk_notifications_from_frame(
+    df: pd.DataFrame,
+    column_mapping: Dict[str, str],
+    template_name: str,
+    subject_template: str,
+    recipient_column: str,
+    constants: Optional[Dict] = None,
+    test_limit: Optional[int] = None,
+    coalesce: Optional[bool] = None,
+    on_result: Optional[Callable[[email_sender.SendResult], None]] = None
+) -> Tuple[int, int]:
+    """
+    Versão de send_bulk_notifications que monta os contextos direto das colunas
+    de um DataFrame, sem um dicionário por linha montado de antemão.
+
+    Os valores comuns a todos os e-mails são passados uma vez em 'constants' e
+    juntados ao contexto de cada linha na renderização; os e-mails são
+    renderizados sob demanda, à medida que o envio consome os jobs.
+
+    Args:
+        df: Uma linha por e-mail.
+        column_mapping: Variável do template -> coluna do DataFrame.
+                        Ex: {'nome': 'CONTRIBUTOR_NAME', 'horas_trabalhadas': 'HOURS_WORKED'}
+        template_name: O nome do arquivo de template HTML.
+        subject_template: O template para o assunto do e-mail.
+        recipient_column: Coluna com o destinatário (ignorada se EMAIL_TEST_RECIPIENT estiver definido).
+        constants: Variáveis iguais para todos os e-mails (ex: data, dashboard_url).
+        coalesce: Ver send_bulk_notifications.
+        on_result: Ver send_bulk_notifications; key é a posição da linha em df.
+    """
+    logger.info(f"Preparing bulk email sending task for {len(df)} jobs.")
+    if not jinja_env:
+        logger.error("Jinja2 environment not available. Cannot render template.")
+        return 0, len(df)
+    try:
+        template = jinja_env.get_template(template_name)
+    except Exception as e:
+        logger.error(f"Failed to render template {template_name}: {e}", exc_info=True)
+        return 0, len(df)
+
+    constants = constants or {}
+    variables = list(column_mapping)
+    columns = [df[column].to_numpy() for column in column_mapping.values()]
+    # o destinatário de teste é resolvido uma única vez para o lote todo
+    test_recipient = config.EMAIL_TEST_RECIPIENT
+    recipients = None if test_recipient else df[recipient_column].to_numpy()
+
+    def _email_jobs() -> Iterator[Dict]:
+        # percorre as posições do DataFrame: um mapeamento vazio ainda gera um e-mail por linha
+        for position in range(len(df)):
+            recipient = test_recipient or recipients[position]
+            if not recipient or pd.isna(recipient):
+                logger.warning("Skipping a job due to missing recipient.")
+                continue
+
+            context = {**constants, **{variable: column[position] for variable, column in zip(variables, columns)}}
+            try:
+                body = template.render(context)
+            except Exception as e:
+                logger.warning(f"Skipping email for {recipient} because template rendering failed: {e}")
+                continue
+
+            yield {
+                'recipient': recipient,
+                'subject': subject_template.format_map(context),
+                'body': body,
+                'key': position
+            }
+
+    return _dispatch_jobs(_email_jobs(), template_name, test_limit, coalesce, on_result)
+
+def send_pending_digests(test_limit: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Envia as mensagens retidas pelo digest: um único e-mail por destinatário.
+    Destinatários com apenas uma mensagem a recebem como foi gerada.
+    """
+    pending = digest_collector.drain()
+    if not pending:
+        return 0, 0
+
+    # cada e-mail enviado leva as mensagens originais que ele contém (key = posição em 'groups'),
+    # para que o resultado chegue ao on_result de cada uma
+    email_jobs, groups = [], []
+
+    def _add_job(recipient: str, subject: str, body: str, messages: List[Dict]) -> None:
+        email_jobs.append({'recipient': recipient, 'subject': subject, 'body': body, 'key': len(groups)})
+        groups.append(messages)
+
+    for recipient, messages in pending.items():
+        if len(messages) == 1:
+            _add_job(recipient, messages[0]['subject'], messages[0]['body'], messages)
+            continue
+
+        context = {
+            'secoes': [
+                {'assunto': message['subject'], 'html': extract_section(message['body'])}
+                for message in messages
+            ]
+        }
+        body = render_template_with_jinja('email/reports/digest.html', context)
+        if not body:
+            # sem o digest, envia as mensagens individualmente para não perdê-las
+            logger.warning(f"Digest rendering failed for {recipient}; sending {len(messages)} emails separately.")
+            for message in messages:
+                _add_job(recipient, message['subject'], message['body'], [message])
+            continue
+
+        _add_job(recipient, f"📬 Suas Notificações ({len(messages)})", body, messages)
+
+    def _dispatch_result(result: email_sender.SendResult) -> None:
+        for message in groups[result.key]:
+            if message['on_result'] is not None:
+                message['on_result'](result._replace(key=message['key']))
+
+    total_messages = sum(len(messages) for messages in pending.values())
+    logger.info(f"Coalesced {total_messages} pending emails into {len(email_jobs)} messages.")
+    stats = email_sender.send_emails_with_stats(email_jobs, test_limit=test_limit, on_result=_dispatch_result)
+
+    # quem acompanha os resultados (ex: NotificationTracker) grava o estado depois do lote
+    callbacks = {id(m['on_result']): m['on_result'] for messages in groups for m in messages if m['on_result']}
+    for callback in callbacks.values():
+        if hasattr(callback, 'flush'):
+            callback.flush()
+    return stats['success'], stats['failed'] + stats['timed_out']
@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+class PollingWatcher:
+    """
+    Detecta arquivos criados, alterados ou removidos em um conjunto de
+    diretórios comparando snapshots de (mtime, tamanho). Não depende de
+    bibliotecas externas nem de notificações do sistema operacional.
+    """
+
+    def __init__(self, directories: Iterable, patterns: Iterable[str] = ("*",)):
+        self.directories = [Path(d) for d in directories]
+        self.patterns = list(patterns)
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            if not directory.is_dir():
+                continue
+            for pattern in self.patterns:
+                for path in directory.rglob(pattern):
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if path.is_file():
+                        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self) -> List[Path]:
+        """Retorna os arquivos que mudaram desde a última chamada."""
+        current = self._scan()
+        changed = [
+            path for path in current.keys() | self._snapshot.keys()
+            if current.get(path) != self._snapshot.get(path)
+        ]
+        self._snapshot = current
+        return sorted(changed)
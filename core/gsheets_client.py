@@ -5,6 +5,8 @@ import config
 
 class GSheetsClient:
     def __init__(self, credentials_path=config.CREDENTIALS_FILE):
+        # worksheets já abertos, reutilizados entre chamadas (evita um open_by_key por operação)
+        self._worksheets = {}
         try:
             creds = Credentials.from_service_account_file(credentials_path, scopes=config.GSHEETS_SCOPES)
             self.client = gspread.authorize(creds)
@@ -26,10 +28,15 @@ class GSheetsClient:
             logger.error("Spreadsheet ID and Worksheet name are required.")
             return None
 
+        cache_key = (spreadsheet_id, worksheet_name)
+        if cache_key in self._worksheets:
+            return self._worksheets[cache_key]
+
         try:
             spreadsheet = self.client.open_by_key(spreadsheet_id)
             worksheet = spreadsheet.worksheet(worksheet_name)
             logger.info(f"📄 Successfully accessed worksheet '{worksheet_name}'.")
+            self._worksheets[cache_key] = worksheet
             return worksheet
         except gspread.exceptions.SpreadsheetNotFound:
             logger.error(f"❌ Spreadsheet with ID '{spreadsheet_id}' not found.")
@@ -39,6 +46,10 @@ class GSheetsClient:
             logger.error(f"❌ Error accessing worksheet '{worksheet_name}': {e}", exc_info=True)
         return None
 
+    def forget_worksheet(self, spreadsheet_id, worksheet_name):
+        """Removes a cached worksheet so the next access reopens it."""
+        self._worksheets.pop((spreadsheet_id, worksheet_name), None)
+
     def ensure_headers(self, spreadsheet_id, worksheet_name, headers):
         """Checks if the A1 cell is empty and adds headers if needed."""
         worksheet = self.get_worksheet(spreadsheet_id, worksheet_name)
@@ -55,6 +66,19 @@ class GSheetsClient:
         except Exception as e:
             logger.error(f"❌ Failed to ensure headers on worksheet '{worksheet_name}': {e}", exc_info=True)
 
+    def read_rows(self, spreadsheet_id, worksheet_name):
+        """Reads all rows (header included) of a worksheet as text; None on error."""
+        worksheet = self.get_worksheet(spreadsheet_id, worksheet_name)
+        if not worksheet:
+            return None
+
+        try:
+            return worksheet.get_all_values()
+        except Exception as e:
+            logger.error(f"❌ Error reading rows from Google Sheets: {e}", exc_info=True)
+            self.forget_worksheet(spreadsheet_id, worksheet_name)
+            return None
+
     def append_rows(self, spreadsheet_id, worksheet_name, data_rows):
         """Appends multiple rows to a worksheet."""
         worksheet = self.get_worksheet(spreadsheet_id, worksheet_name)
@@ -67,6 +91,7 @@ class GSheetsClient:
             return True
         except Exception as e:
             logger.error(f"❌ Error appending rows to Google Sheets: {e}", exc_info=True)
+            self.forget_worksheet(spreadsheet_id, worksheet_name)
             return False
 
     def clear_and_write_rows(self, spreadsheet_id, worksheet_name, data_rows):
@@ -82,6 +107,7 @@ class GSheetsClient:
             return True
         except Exception as e:
             logger.error(f"❌ Error clearing and writing to Google Sheets: {e}", exc_info=True)
+            self.forget_worksheet(spreadsheet_id, worksheet_name)
             return False
 
 
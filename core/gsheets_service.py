@@ -29,7 +29,32 @@ def carregar_dados_funcionarios(spreadsheet_id, worksheet_name) -> pd.DataFrame
         return None
 
 
-def log_dataframe_to_sheet(df: pd.DataFrame, spreadsheet_id: str, worksheet_name: str, mode: str = 'append') -> bool:
+def _upsert_rows(existing: list, headers: list, data_rows: list, key_column: str) -> list:
+    """
+    Junta as linhas atuais da aba com as novas: uma linha com a mesma chave é
+    substituída no lugar, as demais novas vão para o fim. Chaves repetidas na
+    aba ficam só com a primeira ocorrência.
+    """
+    key_index = headers.index(key_column)
+    new_rows = {row[key_index]: row for row in data_rows}
+    merged, seen = [], set()
+    for row in existing[1:]:
+        key = row[key_index] if len(row) > key_index else None
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(new_rows.pop(key, row))
+    merged.extend(new_rows.values())
+    return [headers] + merged
+
+
+def log_dataframe_to_sheet(
+    df: pd.DataFrame,
+    spreadsheet_id: str,
+    worksheet_name: str,
+    mode: str = 'append',
+    key_column: str | None = None
+) -> bool:
     """
     Registra um DataFrame em uma aba específica do Google Sheets.
 
@@ -37,7 +62,10 @@ def log_dataframe_to_sheet(df: pd.DataFrame, spreadsheet_id: str, worksheet_name
         df: O DataFrame a ser registrado.
         spreadsheet_id: O ID da planilha.
         worksheet_name: O nome da aba.
-        mode: 'append' para adicionar linhas ou 'overwrite' para limpar e escrever.
+        mode: 'append' para adicionar linhas, 'overwrite' para limpar e escrever ou
+              'upsert' para substituir as linhas com o mesmo key_column e adicionar as novas
+              (lê a aba inteira; use só quando alguma linha pode já estar lá).
+        key_column: Coluna que identifica a linha no modo 'upsert' (ex: 'EMPLOYEE_ID').
     """
     try:
         if df.empty:
@@ -50,6 +78,12 @@ def log_dataframe_to_sheet(df: pd.DataFrame, spreadsheet_id: str, worksheet_name
             # Para sobrescrever, a lista completa inclui os cabeçalhos
             data_rows_with_headers = [df.columns.tolist()] + data_only_rows
             success = gsheets_client.clear_and_write_rows(spreadsheet_id, worksheet_name, data_rows_with_headers)
+        elif mode == 'upsert':
+            existing = gsheets_client.read_rows(spreadsheet_id, worksheet_name)
+            if existing is None:
+                return False
+            merged_rows = _upsert_rows(existing, df.columns.tolist(), data_only_rows, key_column)
+            success = gsheets_client.clear_and_write_rows(spreadsheet_id, worksheet_name, merged_rows)
         else: # O padrão é 'append'
             headers = df.columns.tolist()
             # Garante os cabeçalhos primeiro, depois adiciona apenas os dados
@@ -0,0 +1,231 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from core.logger_config import logger
+
+# nível -> (coluna da chave, coluna do nome exibido ou None)
+LEVELS = {
+    'manager': ('MANAGER_EMAIL', 'MANAGER_NAME'),
+    'coordinator': ('COORDINATOR_EMAIL', 'COORDINATOR_NAME'),
+    'area': ('AREA', None),
+    'team': ('TEAM', None),
+    'cost_center': ('COST_CENTER', None),
+}
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class _Level:
+    """Tabela codificada de um nível: chave <-> código inteiro, nome e membros (posições)."""
+
+    def __init__(self, key_column: str, name_column: Optional[str]):
+        self.key_column = key_column
+        self.name_column = name_column
+        self.keys: List = []
+        self.names: List = []
+        self.key_to_code: Dict = {}
+        self.members: List[np.ndarray] = []
+        self.codes = _EMPTY
+
+    def build(self, df: pd.DataFrame) -> None:
+        codes, uniques = pd.factorize(df[self.key_column], use_na_sentinel=True)
+        self.codes = codes.astype(np.int64)
+        self.keys = list(uniques)
+        self.key_to_code = {key: code for code, key in enumerate(self.keys)}
+
+        # membros de todos os grupos de uma vez: ordena as posições por código e corta nos limites
+        valid = np.flatnonzero(self.codes >= 0)
+        order = valid[np.argsort(self.codes[valid], kind='stable')]
+        counts = np.bincount(self.codes[valid], minlength=len(self.keys))
+        self.members = np.split(order, np.cumsum(counts)[:-1]) if len(self.keys) else []
+
+        if self.name_column:
+            # o nome exibido é o da primeira linha de cada grupo (como o antigo .iloc[0])
+            first_rows = [members[0] for members in self.members]
+            self.names = list(df[self.name_column].to_numpy()[first_rows])
+        else:
+            self.names = list(self.keys)
+
+    def code_for(self, key, name) -> int:
+        code = self.key_to_code.get(key)
+        if code is None:
+            code = len(self.keys)
+            self.key_to_code[key] = code
+            self.keys.append(key)
+            self.names.append(name if self.name_column else key)
+            self.members.append(_EMPTY)
+        return code
+
+
+class HierarchyIndex:
+    """
+    Índice da hierarquia (gestor, coordenador, área, time e centro de custo)
+    montado uma vez por carga de dados.
+
+    Cada nível é uma tabela com códigos inteiros e a lista de membros (posições
+    das linhas) de cada grupo já calculada, então consultar um grupo custa
+    O(membros) em vez de um groupby/filtro sobre o DataFrame inteiro. Linhas
+    alteradas podem ser aplicadas com update() sem reconstruir o índice.
+    """
+
+    def __init__(self, df: pd.DataFrame, levels: Optional[Sequence[str]] = None):
+        level_names = [name for name in (levels or LEVELS) if LEVELS[name][0] in df.columns]
+        self.levels: Dict[str, _Level] = {name: _Level(*LEVELS[name]) for name in level_names}
+        self.employee_ids = df['EMPLOYEE_ID'].to_numpy() if 'EMPLOYEE_ID' in df.columns else np.arange(len(df))
+        self._position = {employee_id: pos for pos, employee_id in enumerate(self.employee_ids)}
+
+        for level in self.levels.values():
+            level.build(df)
+        logger.info(
+            f"Hierarchy index built for {len(self.employee_ids)} rows: "
+            + ", ".join(f"{len(level.keys)} {name}" for name, level in self.levels.items())
+        )
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    def __contains__(self, employee_id) -> bool:
+        return employee_id in self._position
+
+    def keys(self, level: str) -> List:
+        return list(self.levels[level].keys)
+
+    def name(self, level: str, key) -> Optional[str]:
+        table = self.levels[level]
+        code = table.key_to_code.get(key)
+        return None if code is None else table.names[code]
+
+    def members(self, level: str, key) -> np.ndarray:
+        """Posições (linhas do DataFrame indexado) dos membros do grupo, em ordem."""
+        table = self.levels[level]
+        code = table.key_to_code.get(key)
+        return _EMPTY if code is None else table.members[code]
+
+    def groups(self, level: str):
+        """Itera (chave, nome, posições dos membros) dos grupos não vazios de um nível."""
+        table = self.levels[level]
+        for key, name, members in zip(table.keys, table.names, table.members):
+            if len(members):
+                yield key, name, members
+
+    def lookup(self, employee_id) -> Optional[Dict]:
+        """Chaves de todos os níveis (gestor, coordenador, centro de custo...) de um colaborador."""
+        pos = self._position.get(employee_id)
+        if pos is None:
+            return None
+        result = {}
+        for name, table in self.levels.items():
+            code = table.codes[pos]
+            result[name] = table.keys[code] if code >= 0 else None
+        return result
+
+    def group_rows(self, level: str, employee_ids: Iterable) -> Iterator[Tuple]:
+        """
+        Agrupa linhas de fora do índice (ex: o resultado de uma regra) pelo grupo
+        de cada colaborador neste índice. Itera (chave, nome, posições em
+        employee_ids) em ordem de código; colaboradores fora do índice ou sem
+        grupo no nível ficam de fora.
+        """
+        table = self.levels[level]
+        positions = np.array([self._position.get(employee_id, -1) for employee_id in employee_ids], dtype=np.int64)
+        codes = np.full(len(positions), -1, dtype=np.int64)
+        known = positions >= 0
+        codes[known] = table.codes[positions[known]]
+
+        valid = np.flatnonzero(codes >= 0)
+        order = valid[np.argsort(codes[valid], kind='stable')]
+        group_codes, starts = np.unique(codes[order], return_index=True)
+        for code, rows in zip(group_codes, np.split(order, starts[1:])):
+            yield table.keys[code], table.names[code], rows
+
+    def rollup_group(self, level: str, key, values: np.ndarray) -> Dict:
+        """count/sum/max de 'values' (alinhado às linhas do índice) para um grupo, em O(membros)."""
+        group_values = np.asarray(values, dtype=float)[self.members(level, key)]
+        group_values = group_values[~np.isnan(group_values)]
+        if not len(group_values):
+            return {'count': 0, 'sum': 0.0, 'max': None}
+        return {'count': len(group_values), 'sum': float(group_values.sum()), 'max': float(group_values.max())}
+
+    def rollup(self, level: str, values: np.ndarray) -> pd.DataFrame:
+        """count/sum/max de 'values' para todos os grupos de um nível, em uma passada vetorizada."""
+        table = self.levels[level]
+        values = np.asarray(values, dtype=float)
+        mask = (table.codes >= 0) & ~np.isnan(values)
+        codes, group_values = table.codes[mask], values[mask]
+
+        size = len(table.keys)
+        maxima = np.full(size, -np.inf)
+        np.maximum.at(maxima, codes, group_values)
+        result = pd.DataFrame({
+            'count': np.bincount(codes, minlength=size),
+            'sum': np.bincount(codes, weights=group_values, minlength=size),
+            'max': np.where(np.isfinite(maxima), maxima, np.nan),
+        }, index=pd.Index(table.keys, name=table.key_column))
+        return result[result['count'] > 0]
+
+    def update(self, changed_df: pd.DataFrame) -> np.ndarray:
+        """
+        Aplica linhas novas ou alteradas (identificadas por EMPLOYEE_ID): move
+        cada linha alterada só entre os grupos afetados e adiciona as novas ao
+        final. Retorna as posições das linhas no índice, na ordem de changed_df.
+        """
+        changed_ids = changed_df['EMPLOYEE_ID'].to_numpy()
+        positions = np.empty(len(changed_ids), dtype=np.int64)
+        next_pos = len(self.employee_ids)
+        new_ids = []
+        for i, employee_id in enumerate(changed_ids):
+            pos = self._position.get(employee_id)
+            if pos is None:
+                pos = next_pos
+                next_pos += 1
+                self._position[employee_id] = pos
+                new_ids.append(employee_id)
+            positions[i] = pos
+
+        if new_ids:
+            self.employee_ids = np.concatenate([self.employee_ids, np.array(new_ids, dtype=self.employee_ids.dtype)])
+
+        for table in self.levels.values():
+            if len(table.codes) < next_pos:
+                table.codes = np.concatenate([table.codes, np.full(next_pos - len(table.codes), -1, dtype=np.int64)])
+
+            names = changed_df[table.name_column].to_numpy() if table.name_column else None
+            new_codes = np.array([
+                table.code_for(key, names[i] if names is not None else key) if pd.notna(key) else -1
+                for i, key in enumerate(changed_df[table.key_column].to_numpy())
+            ], dtype=np.int64)
+
+            old_codes = table.codes[positions]
+            moved = old_codes != new_codes
+            if not moved.any():
+                continue
+
+            # só os grupos que perderam ou ganharam membros são recalculados
+            moved_positions, moved_old, moved_new = positions[moved], old_codes[moved], new_codes[moved]
+            for code in np.unique(moved_old[moved_old >= 0]):
+                table.members[code] = np.setdiff1d(table.members[code], moved_positions[moved_old == code])
+            for code in np.unique(moved_new[moved_new >= 0]):
+                table.members[code] = np.union1d(table.members[code], moved_positions[moved_new == code])
+            table.codes[moved_positions] = moved_new
+
+        return positions
+
+
+def result_groups(df: pd.DataFrame, level: str, index: Optional[HierarchyIndex] = None) -> List[Tuple]:
+    """
+    Grupos (chave, nome, posições em df) de um nível para as linhas de um
+    resultado (ex: os colaboradores com horas extras), em ordem de chave.
+
+    Com o índice do dataset (ver parallel_loader.dataset_hierarchy), cada
+    colaborador é mapeado ao seu grupo pelo índice já montado; se ele não
+    cobrir todos os colaboradores de df, monta um índice só com as linhas de df.
+    """
+    if (
+        index is not None and level in index.levels and 'EMPLOYEE_ID' in df.columns
+        and all(employee_id in index for employee_id in df['EMPLOYEE_ID'])
+    ):
+        groups = index.group_rows(level, df['EMPLOYEE_ID'])
+    else:
+        groups = HierarchyIndex(df, levels=[level]).groups(level)
+    return sorted(groups, key=lambda group: group[0])
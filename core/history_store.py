@@ -0,0 +1,239 @@
+import os
+import time
+import uuid
+import socket
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import pandas as pd
+import pyarrow.parquet as pq
+
+import config
+from core.logger_config import logger
+from core.utils import ensure_dir, read_json, write_json
+
+PART_PREFIX = "part-"
+PART_SUFFIX = ".parquet"
+COMPACTED_PREFIX = "compacted-"
+MANIFEST_NAME = "_manifest.json"
+# tentativas de leitura de uma partição que foi compactada durante a leitura
+READ_ATTEMPTS = 3
+
+
+class HistoryStore:
+    """
+    Histórico local das execuções em Parquet, particionado por automação e data
+    (layout hive: <root>/automation=<nome>/date=YYYY-MM-DD/part-*.parquet).
+
+    Cada execução grava um arquivo novo (com rename atômico), então nunca há
+    leitura de arquivo pela metade. As consultas listam só os diretórios das
+    automações e datas pedidas e aplicam os filtros de coluna na leitura de
+    cada arquivo, sem varrer o resto do histórico.
+
+    compact() junta os arquivos de cada partição em um compacted-*.parquet e
+    o publica trocando o _manifest.json da partição, que aponta o arquivo
+    compactado e os arquivos que ele substitui. Os leitores seguem o manifesto,
+    então a troca é atômica: cada leitura vê ou só os arquivos antigos ou só
+    o compactado, nunca os dois nem nenhum.
+    """
+
+    def __init__(self, root=None):
+        self.root = str(root or config.HISTORY_DIR)
+
+    def _partition_dir(self, automation: str, day: date) -> str:
+        return os.path.join(self.root, f"automation={automation}", f"date={day.isoformat()}")
+
+    @staticmethod
+    def _unique_name(prefix: str = PART_PREFIX) -> str:
+        return f"{prefix}{time.time_ns()}.{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex[:8]}{PART_SUFFIX}"
+
+    @staticmethod
+    def _part_files(partition_dir: str) -> List[str]:
+        try:
+            names = sorted(os.listdir(partition_dir))
+        except FileNotFoundError:
+            return []
+        return [
+            os.path.join(partition_dir, name) for name in names
+            if name.startswith(PART_PREFIX) and name.endswith(PART_SUFFIX)
+        ]
+
+    @staticmethod
+    def _read_manifest(partition_dir: str) -> Dict:
+        return read_json(os.path.join(partition_dir, MANIFEST_NAME)) or {}
+
+    def _live_files(self, partition_dir: str) -> List[str]:
+        """
+        Arquivos visíveis da partição segundo o manifesto: o compactado atual mais as
+        gravações que ele não substituiu. Arquivos compactados fora do manifesto
+        (ex: de uma compactação interrompida) são ignorados.
+        """
+        # lista antes de ler o manifesto: a compactação só apaga arquivos depois de trocar o
+        # manifesto, então ou os arquivos listados ainda existem ou o manifesto lido os substitui
+        parts = self._part_files(partition_dir)
+        manifest = self._read_manifest(partition_dir)
+        replaced = set(manifest.get("replaces", []))
+        files = [path for path in parts if os.path.basename(path) not in replaced]
+        if manifest.get("compacted"):
+            files.insert(0, os.path.join(partition_dir, manifest["compacted"]))
+        return files
+
+    def _write_part(self, df: pd.DataFrame, partition_dir: str, prefix: str = PART_PREFIX) -> str:
+        """Grava em um arquivo oculto e o publica com rename: leitores só veem arquivos completos."""
+        ensure_dir(partition_dir)
+        name = self._unique_name(prefix)
+        tmp_path = os.path.join(partition_dir, f".{name}.tmp")
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        path = os.path.join(partition_dir, name)
+        os.replace(tmp_path, path)
+        return path
+
+    def append(self, df: pd.DataFrame, automation: str, day: date) -> Optional[str]:
+        """
+        Adiciona as linhas de uma execução à partição (automation, day).
+        Retorna o arquivo gravado, ou None se não houver linhas ou em caso de erro.
+        """
+        if df is None or df.empty:
+            return None
+        try:
+            path = self._write_part(df.reset_index(drop=True), self._partition_dir(automation, day))
+            logger.info(f"{len(df)} rows appended to history ({automation}, {day.isoformat()}).")
+            return path
+        except Exception as e:
+            logger.error(f"Failed to append rows to history ({automation}, {day}): {e}", exc_info=True)
+            return None
+
+    def partitions(
+        self,
+        automations: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[Tuple[str, date, str]]:
+        """Lista (automação, data, diretório) das partições no intervalo [start, end], só pelos nomes dos diretórios."""
+        result = []
+        try:
+            automation_dirs = sorted(os.listdir(self.root))
+        except FileNotFoundError:
+            return result
+
+        for automation_dir in automation_dirs:
+            if not automation_dir.startswith("automation="):
+                continue
+            automation = automation_dir.split("=", 1)[1]
+            if automations and automation not in automations:
+                continue
+            for date_dir in sorted(os.listdir(os.path.join(self.root, automation_dir))):
+                if not date_dir.startswith("date="):
+                    continue
+                try:
+                    day = date.fromisoformat(date_dir.split("=", 1)[1])
+                except ValueError:
+                    continue
+                if (start and day < start) or (end and day > end):
+                    continue
+                result.append((automation, day, os.path.join(self.root, automation_dir, date_dir)))
+        return result
+
+    def query(
+        self,
+        automations: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        filters: Optional[Dict[str, Iterable]] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Lê o histórico das automações e do intervalo de datas pedidos.
+
+        Args:
+            automations: Nomes das automações (ex: ['d1_individual_contributor']); padrão todas.
+            start, end: Intervalo de datas (inclusivo) das partições lidas.
+            filters: Valores aceitos por coluna, ex: {'TEAM': ['Vendas'], 'AREA': ['Comercial']}.
+                     São aplicados na leitura de cada arquivo (pula row groups sem esses valores).
+            columns: Colunas a ler; padrão todas.
+
+        Returns:
+            DataFrame com as colunas pedidas mais 'automation' e 'date', ou None em caso de erro.
+        """
+        pyarrow_filters = [(column, "in", list(values)) for column, values in (filters or {}).items()] or None
+        frames = []
+        try:
+            for automation, day, partition_dir in self.partitions(automations, start, end):
+                for df in self._read_partition(partition_dir, filters, pyarrow_filters, columns):
+                    df["automation"] = automation
+                    df["date"] = pd.Timestamp(day)
+                    frames.append(df)
+        except Exception as e:
+            logger.error(f"Failed to query history in {self.root}: {e}", exc_info=True)
+            return None
+
+        if not frames:
+            return pd.DataFrame(columns=list(columns or []) + ["automation", "date"])
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_partition(self, partition_dir: str, filters, pyarrow_filters, columns) -> List[pd.DataFrame]:
+        """
+        Lê os arquivos visíveis de uma partição. Se uma compactação apagar um arquivo
+        durante a leitura, relê a partição pelo manifesto novo.
+        """
+        for attempt in range(READ_ATTEMPTS):
+            frames = []
+            try:
+                for path in self._live_files(partition_dir):
+                    names = pq.read_schema(path).names
+                    # arquivos sem a coluna filtrada não têm linhas que atendam ao filtro
+                    if filters and any(column not in names for column in filters):
+                        continue
+                    read_columns = [c for c in columns if c in names] if columns else None
+                    df = pq.read_table(path, columns=read_columns, filters=pyarrow_filters).to_pandas()
+                    if not df.empty:
+                        frames.append(df)
+                return frames
+            except FileNotFoundError:
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+                logger.debug(f"History partition {partition_dir} changed while reading; retrying.")
+        return []
+
+    @staticmethod
+    def _remove_files(partition_dir: str, names: Iterable[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(partition_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def compact(
+        self,
+        automations: Optional[Sequence[str]] = None,
+        before: Optional[date] = None,
+        min_files: int = 2
+    ) -> int:
+        """
+        Junta os arquivos visíveis de cada partição com pelo menos 'min_files' arquivos em um só.
+        Use 'before' (ex: hoje) para não mexer em partições que ainda recebem gravações.
+        Retorna quantas partições foram compactadas.
+        """
+        end = date.fromordinal(before.toordinal() - 1) if before else None
+        compacted = 0
+        for automation, day, partition_dir in self.partitions(automations, end=end):
+            try:
+                # sobras de uma compactação anterior interrompida antes de apagar os substituídos
+                self._remove_files(partition_dir, self._read_manifest(partition_dir).get("replaces", []))
+                parts = self._live_files(partition_dir)
+                if len(parts) < max(min_files, 2):
+                    continue
+                merged = pd.concat([pd.read_parquet(path, engine="pyarrow") for path in parts], ignore_index=True)
+                # o compactado fica invisível até o manifesto apontá-lo; a troca do manifesto
+                # (os.replace) publica o arquivo novo e esconde os antigos de uma só vez
+                merged_path = self._write_part(merged, partition_dir, prefix=COMPACTED_PREFIX)
+                replaced = [os.path.basename(path) for path in parts]
+                write_json(
+                    os.path.join(partition_dir, MANIFEST_NAME),
+                    {"compacted": os.path.basename(merged_path), "replaces": replaced}
+                )
+                self._remove_files(partition_dir, replaced)
+                compacted += 1
+                logger.info(f"History partition {automation}/{day.isoformat()} compacted: {len(parts)} files, {len(merged)} rows.")
+            except Exception as e:
+                logger.error(f"Failed to compact history partition {partition_dir}: {e}", exc_info=True)
+        return compacted
@@ -0,0 +1,188 @@
+import os
+import uuid
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+import pandas as pd
+
+import config
+from core.logger_config import logger
+from core.hierarchy import HierarchyIndex, LEVELS
+from core.utils import ensure_dir
+
+# níveis agregados e as colunas guardadas por colaborador no livro diário
+ROLLUP_LEVELS = ['team', 'area', 'cost_center', 'manager']
+LEDGER_COLUMNS = ['EMPLOYEE_ID', 'HOURS_WORKED'] + [
+    column for level in ROLLUP_LEVELS for column in LEVELS[level] if column
+]
+METRICS = ['count', 'sum', 'max']
+
+
+class KpiRollupStore:
+    """
+    Agregados diários de horas extras (count, sum e max de HOURS_WORKED) por
+    time, área, centro de custo e gestor, mantidos em ROLLUP_DIR:
+
+    - ledger/date=YYYY-MM-DD.parquet: contribuição de cada colaborador no dia,
+      chaveada por EMPLOYEE_ID (a última avaliação prevalece);
+    - <nível>/date=YYYY-MM-DD.parquet: uma linha por grupo no dia, lida pelos
+      painéis e resumos.
+
+    apply() lê e regrava só os arquivos do dia avaliado (o livro e um arquivo
+    por nível): as linhas novas substituem as anteriores do mesmo colaborador e
+    o dia é reagregado a partir do livro, então o custo depende das linhas do
+    dia e não do tamanho do histórico. Reaplicar a mesma execução produz
+    exatamente o mesmo resultado, e uma correção (ex: horas que caíram abaixo
+    do limite) remove a contribuição antiga em vez de somar de novo.
+    """
+
+    def __init__(self, root=None):
+        self.root = str(root or config.ROLLUP_DIR)
+
+    def _ledger_path(self, day: date) -> str:
+        return os.path.join(self.root, "ledger", f"date={day.isoformat()}.parquet")
+
+    def _level_path(self, level: str, day: date) -> str:
+        return os.path.join(self.root, level, f"date={day.isoformat()}.parquet")
+
+    def _level_days(self, level: str, start: Optional[date], end: Optional[date]) -> List[date]:
+        """Datas com agregados do nível no intervalo [start, end], só pelos nomes dos arquivos."""
+        try:
+            names = sorted(os.listdir(os.path.join(self.root, level)))
+        except FileNotFoundError:
+            return []
+        days = []
+        for name in names:
+            if not (name.startswith("date=") and name.endswith(".parquet")):
+                continue
+            try:
+                day = date.fromisoformat(name[len("date="):-len(".parquet")])
+            except ValueError:
+                continue
+            if (start and day < start) or (end and day > end):
+                continue
+            days.append(day)
+        return days
+
+    @staticmethod
+    def _write(df: pd.DataFrame, path: str) -> None:
+        """Grava em um arquivo temporário e troca com os.replace: leitores nunca veem arquivo pela metade."""
+        ensure_dir(os.path.dirname(path))
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, path)
+
+    def _read_ledger(self, day: date) -> pd.DataFrame:
+        path = self._ledger_path(day)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=LEDGER_COLUMNS)
+        return pd.read_parquet(path, engine="pyarrow")
+
+    def apply(
+        self,
+        overtime_df: Optional[pd.DataFrame],
+        day: date,
+        evaluated_ids: Optional[Iterable] = None
+    ) -> bool:
+        """
+        Atualiza o livro e os agregados do dia com o resultado de find_overtime_employees.
+
+        Args:
+            overtime_df: Linhas acima do limite nesta execução (None/vazio se nenhuma).
+            day: Data de referência avaliada.
+            evaluated_ids: EMPLOYEE_IDs avaliados nesta execução (ex: só os alterados, no
+                           modo incremental). Os que não estão em overtime_df saem do livro
+                           do dia; padrão: apenas os de overtime_df.
+        """
+        try:
+            if overtime_df is None:
+                overtime_df = pd.DataFrame(columns=LEDGER_COLUMNS)
+            missing = [c for c in LEDGER_COLUMNS if c not in overtime_df.columns]
+            if missing:
+                logger.error(f"KPI rollup skipped for {day.isoformat()}: missing columns {missing}.")
+                return False
+
+            new_rows = overtime_df[LEDGER_COLUMNS].drop_duplicates('EMPLOYEE_ID', keep='last')
+            replaced_ids = set(new_rows['EMPLOYEE_ID'].tolist())
+            if evaluated_ids is not None:
+                replaced_ids.update(evaluated_ids)
+            if not replaced_ids:
+                return True
+
+            ledger = self._read_ledger(day)
+            kept = ledger[~ledger['EMPLOYEE_ID'].isin(replaced_ids)]
+            frames = [frame for frame in (kept, new_rows) if not frame.empty]
+            ledger = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=LEDGER_COLUMNS)
+            self._write(ledger, self._ledger_path(day))
+
+            self._reaggregate(ledger, day)
+            logger.info(
+                f"KPI rollups updated for {day.isoformat()}: {len(new_rows)} contributions applied, "
+                f"{len(ledger)} in the day's ledger."
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update KPI rollups for {day}: {e}", exc_info=True)
+            return False
+
+    def _reaggregate(self, ledger: pd.DataFrame, day: date) -> None:
+        """Recalcula os agregados do dia a partir do livro e substitui o arquivo desse dia em cada nível."""
+        index = HierarchyIndex(ledger, levels=ROLLUP_LEVELS) if not ledger.empty else None
+        hours = pd.to_numeric(ledger['HOURS_WORKED'], errors='coerce').to_numpy(dtype=float)
+
+        for level in ROLLUP_LEVELS:
+            path = self._level_path(level, day)
+            if index is None:
+                # dia sem contribuições: o arquivo do dia some em vez de ficar vazio
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            day_rows = index.rollup(level, hours).reset_index()
+            day_rows.insert(0, 'date', pd.Timestamp(day))
+            day_rows['count'] = day_rows['count'].astype('int64')
+            self._write(day_rows.sort_values(LEVELS[level][0], kind='stable'), path)
+
+    def read(
+        self,
+        level: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        keys: Optional[Sequence] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Lê os agregados diários de um nível ('team', 'area', 'cost_center' ou 'manager').
+
+        Args:
+            start, end: Intervalo de datas (inclusivo).
+            keys: Grupos desejados (ex: ['Comercial']); padrão todos.
+
+        Returns:
+            DataFrame com date, a coluna do nível, count, sum e max; None em caso de erro.
+        """
+        if level not in ROLLUP_LEVELS:
+            logger.error(f"Unknown rollup level '{level}'. Expected one of {ROLLUP_LEVELS}.")
+            return None
+
+        key_column = LEVELS[level][0]
+        filters = [(key_column, 'in', list(keys))] if keys is not None else None
+        try:
+            # só os arquivos das datas pedidas são abertos
+            frames = [
+                pd.read_parquet(self._level_path(level, day), engine="pyarrow", filters=filters)
+                for day in self._level_days(level, start, end)
+            ]
+            frames = [frame for frame in frames if not frame.empty]
+            if not frames:
+                return pd.DataFrame(columns=['date', key_column] + METRICS)
+            return pd.concat(frames, ignore_index=True)
+        except Exception as e:
+            logger.error(f"Failed to read KPI rollup '{level}': {e}", exc_info=True)
+            return None
+
+    def totals(self, level: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """count, sum e max de cada grupo no intervalo, somando os agregados diários."""
+        daily = self.read(level, start, end)
+        if daily is None:
+            return None
+        key_column = LEVELS[level][0]
+        aggregations: Dict[str, str] = {'count': 'sum', 'sum': 'sum', 'max': 'max'}
+        return daily.groupby(key_column, sort=True).agg(aggregations).reset_index()
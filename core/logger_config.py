@@ -1,39 +1,248 @@
 import logging
+import logging.handlers
 import sys
 import os
-from datetime import datetime
+import json
+import queue
+import atexit
+import multiprocessing
+import uuid
+import copy
+from typing import Iterable, Optional
 import config
 
-def setup_logger():
-    """Configura e retorna um logger compartilhado para o projeto."""
+# identificador único desta execução (processo), anexado a todos os registros
+RUN_ID = uuid.uuid4().hex[:12]
+
+# tarefa corrente; as automações rodam em série, então um valor global basta
+_current_task_id: Optional[str] = None
+
+# listener que faz a formatação e o I/O fora das threads que geram os logs
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def set_task_id(task_id: Optional[str]) -> None:
+    """Define a tarefa corrente, anexada aos registros de log como 'task_id'."""
+    global _current_task_id
+    _current_task_id = task_id
+
+
+class ContextFilter(logging.Filter):
+    """
+    Anexa run_id e task_id a cada registro, na thread que gerou o log.
+    Registros que já os trazem (ex: vindos de um processo filho por
+    _ForwardToLogger) mantêm os valores de origem.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "run_id"):
+            record.run_id = RUN_ID
+        if not hasattr(record, "task_id"):
+            record.task_id = _current_task_id or "-"
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma única linha."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "run_id": getattr(record, "run_id", RUN_ID),
+            "task_id": getattr(record, "task_id", "-"),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
 
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que mantém o traceback fora da mensagem: o prepare() padrão
+    junta os dois em 'msg' e zera exc_info, o que deixa o JSON sem 'exception'.
+    Aqui o traceback vai para exc_text (texto, serializável entre processos),
+    que os formatadores usam no lugar de exc_info.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    if config.LOG_FORMAT == "json":
+        return JsonLinesFormatter(datefmt='%Y-%m-%d %H:%M:%S')
     # formato único de log
-    log_format = logging.Formatter(
+    return logging.Formatter(
         "%(asctime)s [%(levelname)s] - %(message)s",
         datefmt='%Y-%m-%d %H:%M:%S'  # padrão yyyy-mm-dd HH:MM:SS
     )
 
+
+def _log_file_name() -> str:
+    """
+    Nome do arquivo de log deste processo: um por ponto de entrada (ex:
+    automacao_rh.run_scheduler.log), porque a rotação não é segura com vários
+    processos gravando no mesmo arquivo. LOG_FILE_NAME substitui o padrão
+    (ex: para duas instâncias do mesmo script rodando ao mesmo tempo).
+    """
+    if config.LOG_FILE_NAME:
+        return config.LOG_FILE_NAME
+    script = sys.argv[0] if sys.argv else ""
+    entrypoint = os.path.splitext(os.path.basename(script))[0]
+    if entrypoint == "__main__":
+        # python -m <pacote>: usa o nome do pacote
+        entrypoint = os.path.basename(os.path.dirname(script))
+    return f"automacao_rh.{entrypoint or 'interactive'}.log"
+
+
+def _build_file_handler(log_filepath: str) -> logging.Handler:
+    """Cria o handler de arquivo com rotação real (por tamanho ou à meia-noite)."""
+    if config.LOG_ROTATION == "size":
+        return logging.handlers.RotatingFileHandler(
+            log_filepath,
+            maxBytes=config.LOG_MAX_BYTES,
+            backupCount=config.LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+    return logging.handlers.TimedRotatingFileHandler(
+        log_filepath,
+        when='midnight',
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+
+
+def setup_logger():
+    """
+    Configura e retorna um logger compartilhado para o projeto.
+
+    O logger só enfileira os registros (QueueHandler); um QueueListener em
+    thread própria formata e grava no console e no arquivo, para que as
+    threads de envio de e-mail não disputem locks nem façam I/O de disco.
+    """
+    global _queue_listener
+
     logger = logging.getLogger("automacao_rh")
     logger.setLevel(logging.INFO)  # N=nível fixo em INFO
 
     if not logger.handlers:
+        log_format = _build_formatter()
+
         # saída no console
         stream_handler = logging.StreamHandler(sys.stdout)
         stream_handler.setFormatter(log_format)
-        logger.addHandler(stream_handler)
 
         # saída em arquivo
         log_dir = os.path.join(config.BASE_DIR, 'logs')
         os.makedirs(log_dir, exist_ok=True)
+        log_filepath = os.path.join(log_dir, _log_file_name())
 
-        log_filename = f"log_{datetime.now().strftime('%Y-%m-%d')}.log"
-        log_filepath = os.path.join(log_dir, log_filename)
-
-        file_handler = logging.FileHandler(log_filepath, mode='a', encoding='utf-8')
+        file_handler = _build_file_handler(log_filepath)
         file_handler.setFormatter(log_format)
-        logger.addHandler(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue, stream_handler, file_handler, respect_handler_level=True
+        )
+        _queue_listener.start()
+        # garante que os registros pendentes sejam gravados ao encerrar
+        atexit.register(shutdown_logger)
 
     return logger
 
+
+def shutdown_logger() -> None:
+    """Esvazia a fila de logs e encerra o listener."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+class _ForwardToLogger(logging.Handler):
+    """Reencaminha registros vindos de processos filhos para o logger do processo principal."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger("automacao_rh").handle(record)
+
+
+def start_worker_log_forwarding():
+    """
+    Cria a fila usada pelos processos filhos (ProcessPoolExecutor) para enviar
+    seus logs ao processo principal, que grava tudo em um único lugar.
+
+    Returns:
+        Tuple: (fila a ser passada para configure_worker_logger, listener a ser parado ao final).
+    """
+    log_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(log_queue, _ForwardToLogger())
+    listener.start()
+    return log_queue, listener
+
+
+def configure_worker_logger(log_queue, run_id: str, task_id: Optional[str]) -> None:
+    """Initializer dos processos filhos: envia os logs para a fila do processo principal."""
+    global RUN_ID, _queue_listener
+    RUN_ID = run_id
+    # o listener herdado (fork) não tem thread ativa neste processo
+    _queue_listener = None
+    set_task_id(task_id)
+
+    worker_logger = logging.getLogger("automacao_rh")
+    worker_logger.handlers.clear()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    worker_logger.addHandler(queue_handler)
+    worker_logger.propagate = False
+
+
+def current_task_id() -> Optional[str]:
+    """Retorna a tarefa corrente (ver set_task_id)."""
+    return _current_task_id
+
+
+def log_aggregated(
+    level: int,
+    message: str,
+    items: Iterable,
+    sample_size: Optional[int] = None
+) -> None:
+    """
+    Emite um único registro para uma ocorrência repetida (ex: uma por linha),
+    com o total e apenas uma amostra dos itens afetados.
+
+    Args:
+        level: Nível do log (ex: logging.WARNING).
+        message: Descrição do problema, sem os itens.
+        items: Identificadores afetados (ex: EMPLOYEE_IDs).
+        sample_size: Quantos itens listar; padrão config.LOG_SAMPLE_SIZE.
+    """
+    sample_size = config.LOG_SAMPLE_SIZE if sample_size is None else sample_size
+    items = list(items)
+    if not items:
+        return
+
+    sample = ", ".join(str(item) for item in items[:sample_size])
+    remaining = len(items) - sample_size
+    suffix = f" (+{remaining} more)" if remaining > 0 else ""
+    logger.log(level, f"{message} [{len(items)} occurrence(s)]: {sample}{suffix}")
+
+
 # logger global do projeto
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
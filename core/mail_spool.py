@@ -0,0 +1,137 @@
+import os
+import time
+import uuid
+import random
+import socket
+import threading
+from collections import deque
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from typing import Optional
+
+import config
+from core.logger_config import logger
+from core.utils import ensure_dir
+
+# etapas do spool (mesma ideia do maildir): tmp -> new -> cur -> done/failed
+SPOOL_STAGES = ("tmp", "new", "cur", "done", "failed")
+
+
+class MailSpool:
+    """
+    Spool de mensagens prontas (RFC 5322) no estilo maildir.
+
+    Toda transição é um os.rename dentro do mesmo volume, que é atômico: uma
+    mensagem nunca aparece pela metade em new/ e só um processo consegue
+    movê-la de new/ para cur/, então vários drenadores (no mesmo host ou em
+    hosts que compartilham o volume) não enviam a mesma mensagem duas vezes.
+    """
+
+    def __init__(self, root=None):
+        self.root = str(root or config.SPOOL_DIR)
+        for stage in SPOOL_STAGES:
+            ensure_dir(self._dir(stage))
+        # nomes de new/ ainda não tentados, compartilhados pelas threads desta instância
+        self._backlog = deque()
+        self._backlog_lock = threading.Lock()
+
+    def _dir(self, stage: str) -> str:
+        return os.path.join(self.root, stage)
+
+    @staticmethod
+    def _unique_name() -> str:
+        # tempo + host + pid + aleatório: nomes únicos mesmo entre hosts
+        return f"{time.time_ns()}.{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex[:8]}.eml"
+
+    def enqueue(self, msg: EmailMessage) -> str:
+        """Grava a mensagem em tmp/ e a publica em new/ com um rename atômico."""
+        name = self._unique_name()
+        tmp_path = os.path.join(self._dir("tmp"), name)
+        with open(tmp_path, "wb") as f:
+            f.write(msg.as_bytes(policy=policy.SMTP))
+            f.flush()
+            os.fsync(f.fileno())
+        new_path = os.path.join(self._dir("new"), name)
+        os.rename(tmp_path, new_path)
+        return new_path
+
+    def _refill_backlog(self) -> None:
+        """
+        Lista new/ uma vez por lote (e não uma vez por mensagem) e embaralha os
+        nomes, para que processos diferentes não disputem sempre os mesmos
+        primeiros arquivos.
+        """
+        with self._backlog_lock:
+            if self._backlog:
+                return
+            try:
+                names = os.listdir(self._dir("new"))
+            except FileNotFoundError:
+                return
+            random.shuffle(names)
+            self._backlog.extend(names)
+
+    def claim(self) -> Optional[str]:
+        """
+        Reserva a próxima mensagem pendente movendo-a para cur/.
+        Retorna o caminho reservado ou None se não houver mensagens.
+        """
+        while True:
+            try:
+                name = self._backlog.popleft()
+            except IndexError:
+                self._refill_backlog()
+                if not self._backlog:
+                    return None
+                continue
+
+            claimed_path = os.path.join(self._dir("cur"), name)
+            try:
+                os.rename(os.path.join(self._dir("new"), name), claimed_path)
+            except FileNotFoundError:
+                # outro processo reservou antes
+                continue
+            # o rename mantém o mtime do enqueue; a idade em cur/ passa a contar da reserva
+            os.utime(claimed_path)
+            return claimed_path
+
+    @staticmethod
+    def read(path: str) -> EmailMessage:
+        with open(path, "rb") as f:
+            return BytesParser(policy=policy.default).parse(f)
+
+    def complete(self, path: str, ok: bool, error: Optional[str] = None) -> None:
+        """Move a mensagem reservada para done/ ou failed/ (com o erro ao lado, em .error)."""
+        stage = "done" if ok else "failed"
+        target = os.path.join(self._dir(stage), os.path.basename(path))
+        if not ok and error:
+            with open(f"{target}.error", "w", encoding="utf-8") as f:
+                f.write(error)
+        os.rename(path, target)
+
+    def recover_stale(self, max_age: int) -> int:
+        """
+        Devolve para new/ as mensagens presas em cur/ há mais de max_age
+        segundos (ex: drenador encerrado no meio de um envio).
+        """
+        recovered = 0
+        now = time.time()
+        for name in os.listdir(self._dir("cur")):
+            path = os.path.join(self._dir("cur"), name)
+            try:
+                stat = os.stat(path)
+                # no POSIX o rename atualiza o ctime: cobre o instante entre o rename e o utime do claim()
+                claimed_at = max(stat.st_mtime, stat.st_ctime) if os.name == "posix" else stat.st_mtime
+                if now - claimed_at < max_age:
+                    continue
+                os.rename(path, os.path.join(self._dir("new"), name))
+            except FileNotFoundError:
+                continue
+            recovered += 1
+        if recovered:
+            logger.warning(f"Recovered {recovered} stale messages from {self._dir('cur')}.")
+        return recovered
+
+    def pending_count(self) -> int:
+        return len(os.listdir(self._dir("new")))
@@ -0,0 +1,251 @@
+import os
+import glob
+import functools
+import threading
+import concurrent.futures
+from datetime import date
+from typing import Callable, List, Optional, Sequence, Tuple
+import pandas as pd
+
+import config
+from core import data_loader
+from core.hierarchy import HierarchyIndex
+from core.logger_config import (
+    logger, RUN_ID, current_task_id, start_worker_log_forwarding, configure_worker_logger
+)
+
+# colunas que identificam a versão de cada linha (ver core/state_store.py)
+KEY_COLUMNS = ['EMPLOYEE_ID', 'LAST_UPDATE']
+
+Rule = Callable[[pd.DataFrame, date], Optional[pd.DataFrame]]
+RowFilter = Callable[[pd.DataFrame], pd.DataFrame]
+
+# acima desta fração de linhas alteradas, o índice da hierarquia é reconstruído
+# (vetorizado) em vez de atualizado linha a linha
+HIERARCHY_REBUILD_FRACTION = 0.1
+
+# índice da hierarquia do dataset carregado no processo principal: (arquivos,
+# assinaturas dos arquivos, índice); ver dataset_hierarchy()
+_hierarchy: Optional[Tuple[List[str], list, HierarchyIndex]] = None
+_hierarchy_lock = threading.Lock()
+
+
+def resolve_input_files(source: str) -> List[str]:
+    """
+    Converte a origem configurada em uma lista ordenada de arquivos: aceita
+    um arquivo, um diretório (todos os .csv dentro dele) ou um padrão glob.
+    """
+    source = str(source)
+    if os.path.isdir(source):
+        files = glob.glob(os.path.join(source, "*.csv"))
+    elif glob.has_magic(source):
+        files = glob.glob(source)
+    else:
+        files = [source]
+    return sorted(files)
+
+
+def _apply_rule(
+    pending_df: pd.DataFrame,
+    total_rows: int,
+    rule: Rule,
+    target_date: date,
+    columns: Optional[Sequence[str]]
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], int]:
+    """
+    Aplica a regra de negócio às linhas pendentes de um arquivo e devolve
+    apenas dados compactos: as colunas pedidas das linhas selecionadas e as
+    chaves das linhas avaliadas.
+    """
+    result_df = rule(pending_df, target_date) if not pending_df.empty else None
+    if result_df is not None and columns:
+        result_df = result_df[list(columns)]
+    return result_df, pending_df[KEY_COLUMNS], total_rows
+
+
+def _evaluate(
+    df: pd.DataFrame,
+    rule: Rule,
+    target_date: date,
+    columns: Optional[Sequence[str]],
+    row_filter: Optional[RowFilter]
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], int]:
+    """Aplica o filtro e a regra de negócio a um arquivo já carregado."""
+    pending_df = row_filter(df) if row_filter else df
+    return _apply_rule(pending_df, len(df), rule, target_date, columns)
+
+
+def _load_and_evaluate(
+    filepath: str,
+    rule: Rule,
+    target_date: date,
+    columns: Optional[Sequence[str]],
+    row_filter: Optional[RowFilter]
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], int]:
+    """Carrega um arquivo e aplica a regra de negócio. Roda dentro de um processo filho."""
+    df = data_loader.load_processed_data(filepath, use_cache=False)
+    if df is None:
+        return None, None, 0
+    return _evaluate(df, rule, target_date, columns, row_filter)
+
+
+def _map_in_processes(func: Callable, files: List[str], args: Sequence, max_workers: Optional[int]) -> list:
+    """
+    Executa func(arquivo, *args) para cada arquivo em um ProcessPoolExecutor,
+    com os logs dos filhos encaminhados ao processo principal. O resultado
+    segue a ordem de 'files', independente de qual termina primeiro.
+    """
+    max_workers = min(max_workers or config.MAX_PROCESS_WORKERS, len(files))
+    logger.info(f"Processing {len(files)} contributors files with {max_workers} processes.")
+
+    log_queue, log_listener = start_worker_log_forwarding()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=configure_worker_logger,
+            initargs=(log_queue, RUN_ID, current_task_id())
+        ) as executor:
+            return list(executor.map(func, files, *[[arg] * len(files) for arg in args]))
+    finally:
+        log_listener.stop()
+
+
+def _load_frames(files: List[str], signatures: list, max_workers: Optional[int]) -> List[Optional[pd.DataFrame]]:
+    """
+    Carrega os arquivos no processo principal. Com o cache ligado (ex: no
+    scheduler), os arquivos inalterados saem do cache e só os que mudaram são
+    lidos (nos processos filhos, se forem vários), voltando para serem
+    guardados aqui, onde o cache vive.
+    """
+    frames = [data_loader.get_cached(filepath, signature) for filepath, signature in zip(files, signatures)]
+    missing = [i for i, df in enumerate(frames) if df is None]
+
+    if len(missing) == 1:
+        loaded = [data_loader.load_processed_data(files[missing[0]], use_cache=False)]
+    elif missing:
+        loaded = _map_in_processes(
+            functools.partial(data_loader.load_processed_data, use_cache=False),
+            [files[i] for i in missing], (), max_workers
+        )
+    else:
+        loaded = []
+
+    for i, df in zip(missing, loaded):
+        if df is not None:
+            frames[i] = data_loader.put_cached(files[i], signatures[i], df)
+    return frames
+
+
+def _refresh_hierarchy(
+    files: List[str],
+    signatures: list,
+    frames: List[pd.DataFrame],
+    pending_frames: List[pd.DataFrame]
+) -> None:
+    """
+    Mantém o índice da hierarquia do dataset: montado na primeira carga (ou
+    quando a lista de arquivos muda) e, nas seguintes, atualizado só com as
+    linhas pendentes (novas ou alteradas, ex: as do WatermarkStore) dos
+    arquivos que mudaram desde então.
+    """
+    global _hierarchy
+    with _hierarchy_lock:
+        index = None
+        if _hierarchy is not None and _hierarchy[0] == files:
+            _, previous_signatures, index = _hierarchy
+            changed = [
+                pending for pending, previous, current in zip(pending_frames, previous_signatures, signatures)
+                if previous != current and not pending.empty
+            ]
+            changed_rows = sum(len(pending) for pending in changed)
+            if changed_rows > HIERARCHY_REBUILD_FRACTION * len(index):
+                index = None
+            elif changed_rows:
+                index.update(pd.concat(changed, ignore_index=True))
+                logger.info(f"Hierarchy index updated with {changed_rows} new or changed rows.")
+
+        if index is None:
+            index = HierarchyIndex(pd.concat(frames, ignore_index=True))
+        _hierarchy = (files, signatures, index)
+
+
+def _clear_hierarchy() -> None:
+    """Descarta o índice: o dataset desta carga não passa pelo processo principal."""
+    global _hierarchy
+    with _hierarchy_lock:
+        _hierarchy = None
+
+
+def dataset_hierarchy() -> Optional[HierarchyIndex]:
+    """
+    Índice da hierarquia (gestor, coordenador, centro de custo...) de todo o
+    dataset da última carga feita no processo principal (um arquivo, ou vários
+    com o cache do data_loader ligado); None se ainda não houve uma. Mapeia
+    cada colaborador (EMPLOYEE_ID) aos seus grupos; ver HierarchyIndex.group_rows.
+    """
+    with _hierarchy_lock:
+        return _hierarchy[2] if _hierarchy is not None else None
+
+
+def evaluate_sources(
+    source: str,
+    rule: Rule,
+    target_date: date,
+    columns: Optional[Sequence[str]] = None,
+    row_filter: Optional[RowFilter] = None,
+    max_workers: Optional[int] = None
+) -> Tuple[Optional[pd.DataFrame], pd.DataFrame, int]:
+    """
+    Carrega e avalia uma ou várias exportações de colaboradores.
+
+    Com mais de um arquivo, cada um é processado em um ProcessPoolExecutor; o
+    processo principal só recebe as linhas resultantes e as junta na ordem dos
+    arquivos, de modo que o resultado é idêntico ao de uma execução em série.
+    Com o cache do data_loader ligado, os filhos só leem os arquivos que
+    mudaram e a avaliação acontece no processo principal, que guarda o cache
+    e mantém o índice da hierarquia do dataset (ver dataset_hierarchy).
+
+    Args:
+        source: Arquivo, diretório ou padrão glob (ex: config.CONTRIBUTORS_FILE).
+        rule: Regra de negócio, ex: find_overtime_employees.
+        target_date: Data de referência passada para a regra.
+        columns: Colunas a devolver do resultado; None devolve todas.
+        row_filter: Filtro aplicado antes da regra (ex: WatermarkStore.filter_pending).
+        max_workers: Número de processos; padrão config.MAX_PROCESS_WORKERS.
+
+    Returns:
+        Tuple: (linhas selecionadas ou None, chaves das linhas avaliadas,
+        total de linhas lidas).
+    """
+    files = resolve_input_files(source)
+    if not files:
+        logger.error(f"No contributors files found for '{source}'.")
+        return None, pd.DataFrame(columns=KEY_COLUMNS), 0
+
+    if len(files) == 1 or data_loader.cache_enabled():
+        # a avaliação fica no processo principal, onde estão o cache e o índice da
+        # hierarquia; só a leitura dos arquivos alterados vai para os processos filhos
+        signatures = [data_loader.file_signature(filepath) for filepath in files]
+        frames = _load_frames(files, signatures, max_workers)
+        pending_frames = [
+            (row_filter(df) if row_filter else df) if df is not None else None for df in frames
+        ]
+        if all(df is not None for df in frames):
+            _refresh_hierarchy(files, signatures, frames, pending_frames)
+        outputs = [
+            _apply_rule(pending_df, len(df), rule, target_date, columns) if df is not None else (None, None, 0)
+            for df, pending_df in zip(frames, pending_frames)
+        ]
+    else:
+        _clear_hierarchy()
+        outputs = _map_in_processes(
+            _load_and_evaluate, files, (rule, target_date, columns, row_filter), max_workers
+        )
+
+    results = [result for result, _, _ in outputs if result is not None and not result.empty]
+    keys = [evaluated for _, evaluated, _ in outputs if evaluated is not None]
+    total_rows = sum(rows for _, _, rows in outputs)
+
+    merged_results = pd.concat(results, ignore_index=len(files) > 1) if results else None
+    merged_keys = pd.concat(keys, ignore_index=True) if keys else pd.DataFrame(columns=KEY_COLUMNS)
+    return merged_results, merged_keys, total_rows
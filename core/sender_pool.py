@@ -0,0 +1,414 @@
+import os
+import ssl
+import json
+import time
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+from collections import deque
+from datetime import date
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # windows: sem lock entre processos (o os.replace do write_json continua valendo)
+    fcntl = None
+
+import config
+from core.logger_config import logger
+from core.utils import read_json, write_json
+
+# códigos SMTP que indicam limite temporário (tenta outra conta e volta depois)
+THROTTLE_CODES = {421, 450, 451, 454}
+# trechos de respostas 5xx que indicam cota diária de envio esgotada (ex: Gmail 550 5.4.5);
+# só códigos e textos de cota de envio: um 552 de mensagem grande demais ou de caixa
+# do destinatário cheia ("over quota") é problema da mensagem, não da conta
+QUOTA_MARKERS = ("5.4.5", "daily quota", "sending quota", "daily sending limit", "daily user sending")
+
+
+class SMTPConnectionPool:
+    """
+    Mantém conexões SMTP autenticadas de uma conta para reutilização entre
+    envios (e entre execuções, quando o processo continua vivo), evitando um
+    handshake TLS + login por mensagem.
+    """
+
+    def __init__(
+        self,
+        account: "SenderAccount",
+        idle_timeout: int = config.SMTP_IDLE_TIMEOUT,
+        timeout: float = config.SMTP_TIMEOUT
+    ):
+        self.account = account
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+
+    def _connect(self) -> smtplib.SMTP:
+        context = ssl.create_default_context()
+        # o timeout vale para a conexão e para cada comando: uma conexão travada não prende a thread
+        server = smtplib.SMTP(self.account.server, self.account.port, timeout=self.timeout)
+        if config.SMTP_USE_TLS:
+            server.starttls(context=context)
+        server.login(self.account.user, self.account.password)
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def acquire(self) -> smtplib.SMTP:
+        """Retorna uma conexão ociosa ainda válida ou abre uma nova."""
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used > self.idle_timeout:
+                self._close(server)
+                continue
+            return server
+
+    def release(self, server: smtplib.SMTP) -> None:
+        """Devolve uma conexão saudável ao pool."""
+        self._idle.put((server, time.monotonic()))
+
+    def discard(self, server: smtplib.SMTP) -> None:
+        """Fecha uma conexão que apresentou erro."""
+        self._close(server)
+
+    def keepalive(self) -> None:
+        """
+        Envia NOOP às conexões ociosas para mantê-las abertas; descarta as que
+        falharem e as que já passaram de idle_timeout sem envio. O NOOP não conta
+        como uso: a conexão volta ao pool com o mesmo horário do último envio,
+        senão o keepalive periódico impediria o idle_timeout de vencer.
+        """
+        alive = []
+        now = time.monotonic()
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if now - last_used <= self.idle_timeout:
+                try:
+                    if server.noop()[0] == 250:
+                        alive.append((server, last_used))
+                        continue
+                except Exception:
+                    pass
+            self._close(server)
+        # devolve na ordem original da pilha (a mais recente volta para o topo)
+        for item in reversed(alive):
+            self._idle.put(item)
+
+    def close_all(self) -> None:
+        """Fecha todas as conexões ociosas."""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(server)
+
+
+class SenderAccount:
+    """Uma conta/relay de envio com seus próprios limites por minuto e por dia."""
+
+    def __init__(
+        self,
+        name: str,
+        server: str,
+        port: int,
+        user: str,
+        password: str,
+        weight: int = 1,
+        per_minute: Optional[int] = None,
+        daily_quota: Optional[int] = None,
+        from_address: Optional[str] = None
+    ):
+        self.name = name
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.weight = max(1, weight)
+        self.per_minute = per_minute
+        self.daily_quota = daily_quota
+        self.from_address = from_address or user
+
+        self.connections = SMTPConnectionPool(self)
+        self.throttled_until = 0.0
+        self.exhausted_on: Optional[date] = None
+        self.in_flight = 0
+        self.current_weight = 0
+        self._recent_sends = deque()
+
+    @property
+    def exhausted(self) -> bool:
+        """Conta fora de uso até o fim do dia (cota esgotada ou login recusado)."""
+        return self.exhausted_on == date.today()
+
+    def _prune_recent(self, now: float) -> None:
+        while self._recent_sends and now - self._recent_sends[0] >= 60:
+            self._recent_sends.popleft()
+
+    def available(self, used_today: int, now: float) -> bool:
+        """Indica se a conta pode receber mais um envio agora."""
+        if self.exhausted or now < self.throttled_until:
+            return False
+        if self.daily_quota is not None and used_today + self.in_flight >= self.daily_quota:
+            return False
+        self._prune_recent(now)
+        if self.per_minute is not None and len(self._recent_sends) >= self.per_minute:
+            return False
+        return True
+
+    def next_slot_in(self, now: float) -> float:
+        """Segundos até a conta voltar a ter capacidade (limite por minuto ou pausa)."""
+        waits = [self.throttled_until - now]
+        if self.per_minute is not None and len(self._recent_sends) >= self.per_minute:
+            waits.append(60 - (now - self._recent_sends[0]))
+        return max(0.0, max(waits))
+
+    def record_attempt(self, now: float) -> None:
+        self._recent_sends.append(now)
+
+
+class UsageTracker:
+    """
+    Contagem persistida de envios por conta e por dia (ver config.SENDER_USAGE_FILE).
+    Cada flush soma ao arquivo apenas os envios ainda não gravados, para que
+    vários processos possam compartilhar o mesmo arquivo: a leitura e a
+    gravação acontecem sob um lock de arquivo (fcntl) e o arquivo é trocado
+    de forma atômica, então nenhum processo lê um arquivo pela metade nem
+    sobrescreve a soma de outro.
+    """
+
+    def __init__(self, path=None, flush_every: int = 50):
+        self.path = str(path or config.SENDER_USAGE_FILE)
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._day = date.today().isoformat()
+        self._counts: Dict[str, int] = self._read_stored().get(self._day, {})
+        self._unflushed: Dict[str, int] = {}
+
+    def _read_stored(self) -> Dict[str, Dict[str, int]]:
+        try:
+            return read_json(self.path) or {}
+        except ValueError:
+            logger.warning(f"Sender usage file {self.path} is corrupted. Starting from zero.")
+            return {}
+
+    @contextmanager
+    def _file_lock(self):
+        """Lock exclusivo entre processos, em um arquivo .lock ao lado do arquivo de uso."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _roll_day(self) -> None:
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day, self._counts, self._unflushed = today, {}, {}
+
+    def used(self, account_name: str) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._counts.get(account_name, 0)
+
+    def increment(self, account_name: str) -> None:
+        with self._lock:
+            self._roll_day()
+            self._counts[account_name] = self._counts.get(account_name, 0) + 1
+            self._unflushed[account_name] = self._unflushed.get(account_name, 0) + 1
+            should_flush = sum(self._unflushed.values()) >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Soma os envios pendentes ao arquivo (guardando só o dia corrente)."""
+        # a leitura e a gravação do arquivo acontecem fora de self._lock: used() e
+        # increment() são chamados sob o lock do SenderPool e não devem esperar pelo disco
+        with self._flush_lock:
+            with self._lock:
+                if not self._unflushed:
+                    return
+                day, pending, self._unflushed = self._day, self._unflushed, {}
+            try:
+                with self._file_lock():
+                    stored = self._read_stored().get(day, {})
+                    for account_name, count in pending.items():
+                        stored[account_name] = stored.get(account_name, 0) + count
+                    write_json(self.path, {day: stored})
+            except Exception:
+                # devolve os envios para o próximo flush
+                with self._lock:
+                    if self._day == day:
+                        for account_name, count in pending.items():
+                            self._unflushed[account_name] = self._unflushed.get(account_name, 0) + count
+                raise
+            with self._lock:
+                if self._day != day:
+                    return
+                # o arquivo pode ter envios de outros processos; passa a valer o maior valor
+                for account_name, count in stored.items():
+                    self._counts[account_name] = max(count, self._counts.get(account_name, 0))
+
+
+class SenderPool:
+    """
+    Distribui os envios entre várias contas por round-robin ponderado, pulando
+    contas em pausa (throttling), no limite por minuto ou com a cota do dia
+    esgotada.
+    """
+
+    def __init__(self, accounts: List[SenderAccount], usage: Optional[UsageTracker] = None):
+        self.accounts = accounts
+        self.usage = usage or UsageTracker()
+        self._lock = threading.Lock()
+
+    def _select(self, now: float, exclude) -> Optional[SenderAccount]:
+        # smooth weighted round-robin (mesmo algoritmo do nginx)
+        candidates = [
+            account for account in self.accounts
+            if account.name not in exclude and account.available(self.usage.used(account.name), now)
+        ]
+        if not candidates:
+            return None
+        total = sum(account.weight for account in candidates)
+        for account in candidates:
+            account.current_weight += account.weight
+        chosen = max(candidates, key=lambda account: account.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    def acquire(self, exclude=()) -> Optional[SenderAccount]:
+        """
+        Reserva uma conta para um envio. Espera se todas estiverem apenas no
+        limite por minuto ou em pausa; retorna None se nenhuma puder enviar hoje.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                account = self._select(now, exclude)
+                if account:
+                    account.in_flight += 1
+                    account.record_attempt(now)
+                    return account
+
+                waiting = [
+                    account for account in self.accounts
+                    if account.name not in exclude and not account.exhausted
+                    and (account.daily_quota is None
+                         or self.usage.used(account.name) + account.in_flight < account.daily_quota)
+                ]
+                if not waiting:
+                    return None
+                wait = min(account.next_slot_in(now) for account in waiting)
+            time.sleep(min(max(wait, 0.05), 5))
+
+    def release(self, account: SenderAccount, sent: bool) -> None:
+        """Libera a reserva; se o envio foi aceito, conta na cota do dia."""
+        with self._lock:
+            account.in_flight -= 1
+        if sent:
+            self.usage.increment(account.name)
+
+    def throttle(self, account: SenderAccount, seconds: int = None) -> None:
+        seconds = config.SMTP_THROTTLE_COOLDOWN if seconds is None else seconds
+        with self._lock:
+            account.throttled_until = time.monotonic() + seconds
+        logger.warning(f"Sender account '{account.name}' throttled. Pausing it for {seconds}s.")
+
+    def exhaust(self, account: SenderAccount) -> None:
+        with self._lock:
+            account.exhausted_on = date.today()
+        logger.warning(f"Sender account '{account.name}' reached its daily quota or was rejected. Disabled for today.")
+
+    def keepalive(self) -> None:
+        for account in self.accounts:
+            account.connections.keepalive()
+
+    def close_all(self) -> None:
+        for account in self.accounts:
+            account.connections.close_all()
+        self.usage.flush()
+
+
+def classify_smtp_error(error: Exception) -> str:
+    """
+    Classifica um erro de envio para decidir o failover:
+    'throttled' (tentar outra conta), 'exhausted' (conta fora até amanhã),
+    'connection' (tentar outra conta) ou 'permanent' (problema da mensagem).
+    """
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return 'exhausted'
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return 'permanent'
+    if isinstance(error, smtplib.SMTPConnectError):
+        return 'throttled' if error.smtp_code in THROTTLE_CODES else 'connection'
+    if isinstance(error, smtplib.SMTPResponseException):
+        text = error.smtp_error.decode(errors='ignore') if isinstance(error.smtp_error, bytes) else str(error.smtp_error)
+        # os marcadores só valem para recusas permanentes (5xx): um 4xx com "limit" ou
+        # "daily" no texto é temporário e não deve tirar a conta de uso pelo resto do dia
+        is_permanent = 500 <= error.smtp_code < 600
+        if error.smtp_code == 452 or (is_permanent and any(marker in text.lower() for marker in QUOTA_MARKERS)):
+            return 'exhausted'
+        if error.smtp_code in THROTTLE_CODES:
+            return 'throttled'
+        return 'permanent'
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)):
+        return 'connection'
+    return 'permanent'
+
+
+def load_sender_accounts() -> List[SenderAccount]:
+    """
+    Lê as contas de envio de config.SMTP_SENDERS_FILE (lista JSON). As senhas
+    não ficam no arquivo: cada conta indica a variável de ambiente que a contém
+    ('password_env'). Sem o arquivo, usa a conta única de SMTP_SERVER/EMAIL_SENDER.
+    """
+    senders_file = config.SMTP_SENDERS_FILE
+    if not senders_file or not os.path.exists(senders_file):
+        return [SenderAccount(
+            name='default',
+            server=os.getenv('SMTP_SERVER'),
+            port=int(os.getenv('SMTP_PORT', '587')),
+            user=os.getenv('EMAIL_SENDER'),
+            password=os.getenv('EMAIL_PASSWORD'),
+            per_minute=config.SMTP_PER_MINUTE,
+            daily_quota=config.SMTP_DAILY_QUOTA
+        )]
+
+    with open(senders_file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    accounts = []
+    for entry in entries:
+        accounts.append(SenderAccount(
+            name=entry['name'],
+            server=entry.get('server', os.getenv('SMTP_SERVER')),
+            port=int(entry.get('port', 587)),
+            user=entry['user'],
+            password=os.getenv(entry.get('password_env', ''), ''),
+            weight=int(entry.get('weight', 1)),
+            per_minute=entry.get('per_minute'),
+            daily_quota=entry.get('daily_quota'),
+            from_address=entry.get('from')
+        ))
+    logger.info(f"Loaded {len(accounts)} sender accounts from {senders_file}.")
+    return accounts
@@ -0,0 +1,179 @@
+import os
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+
+import config
+from core.logger_config import logger
+from core.utils import read_json, write_json
+
+
+def _row_keys(df: pd.DataFrame) -> pd.Series:
+    """EMPLOYEE_ID de cada linha como texto, para comparação com o estado salvo."""
+    return df['EMPLOYEE_ID'].astype(str)
+
+
+def _row_versions(df: pd.DataFrame) -> pd.Series:
+    """LAST_UPDATE de cada linha como texto; identifica a versão do registro."""
+    return df['LAST_UPDATE'].astype(str)
+
+
+class WatermarkStore:
+    """
+    Estado persistido por automação com os pares (EMPLOYEE_ID, LAST_UPDATE)
+    já tratados para uma data de referência.
+
+    - 'evaluated': linhas que já passaram pelas regras de negócio; numa nova
+      execução, só linhas novas ou alteradas são avaliadas novamente.
+    - 'notified': linhas que já geraram um e-mail; nunca são reenviadas.
+    - 'published': linhas já publicadas no relatório do dia (ex: o dashboard),
+      para que as execuções incrementais só adicionem o que falta.
+
+    A cada config.REPROCESS_INTERVAL é feita uma avaliação completa (ex: para
+    refletir mudanças em HOURS_LIMIT), mas 'notified' continua valendo, então
+    nada é enviado duas vezes. Uma nova data de referência começa do zero.
+    """
+
+    def __init__(self, automation_name: str, target_date: date, state_dir=None):
+        self.automation_name = automation_name
+        self.target_date = target_date
+        self.path = os.path.join(state_dir or config.STATE_DIR, f"{automation_name}.json")
+        self.full_refresh = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            state = read_json(self.path)
+        except ValueError:
+            logger.warning(f"State file {self.path} is corrupted. Starting a fresh state.")
+            state = None
+
+        if not state or state.get('target_date') != self.target_date.isoformat():
+            state = {'target_date': self.target_date.isoformat(), 'evaluated': {}, 'notified': {}}
+
+        last_full_refresh = state.get('last_full_refresh')
+        if (
+            not last_full_refresh
+            or datetime.now() - datetime.fromisoformat(last_full_refresh) >= config.REPROCESS_INTERVAL
+        ):
+            self.full_refresh = True
+            state['evaluated'] = {}
+            state['last_full_refresh'] = datetime.now().isoformat(timespec='seconds')
+
+        self._state = state
+
+    @staticmethod
+    def _unseen(df: pd.DataFrame, seen: Dict[str, str]) -> pd.Series:
+        """Máscara das linhas cujo par (id, versão) não está em 'seen'."""
+        return _row_keys(df).map(seen).ne(_row_versions(df)).to_numpy()
+
+    def filter_pending(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Retorna só as linhas novas ou alteradas desde a última execução."""
+        pending = df[self._unseen(df, self._state['evaluated'])]
+        mode = "full refresh" if self.full_refresh else "incremental"
+        logger.info(f"[{self.automation_name}] {mode}: {len(pending)} of {len(df)} rows to evaluate.")
+        return pending
+
+    def exclude_notified(self, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Remove do resultado as linhas que já geraram notificação."""
+        if df is None or df.empty:
+            return df
+        remaining = df[self._unseen(df, self._state['notified'])]
+        skipped = len(df) - len(remaining)
+        if skipped:
+            logger.info(f"[{self.automation_name}] Skipping {skipped} rows already notified.")
+        return remaining
+
+    def mark_evaluated(self, df: pd.DataFrame, exclude: Optional[pd.DataFrame] = None) -> None:
+        """
+        Marca as linhas como avaliadas, exceto as de 'exclude' (ex: as que ainda
+        vão ser notificadas): essas só são marcadas depois de um envio com
+        sucesso (ver notification_tracker), para que voltem na próxima execução
+        se o envio falhar ou ficarem de fora do limite de teste.
+        """
+        keys, versions = _row_keys(df), _row_versions(df)
+        if exclude is not None and not exclude.empty:
+            keep = ~keys.isin(set(_row_keys(exclude))).to_numpy()
+            keys, versions = keys[keep], versions[keep]
+        self._state['evaluated'].update(zip(keys, versions))
+
+    def mark_notified(self, df: Optional[pd.DataFrame]) -> None:
+        if df is not None and not df.empty:
+            keys, versions = _row_keys(df), _row_versions(df)
+            self._state['notified'].update(zip(keys, versions))
+            self._state['evaluated'].update(zip(keys, versions))
+
+    def exclude_published(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Remove as linhas (na mesma versão) já publicadas no relatório do dia (ex: o dashboard)."""
+        return df[self._unseen(df, self._state.setdefault('published', {}))]
+
+    def previously_published(self, df: pd.DataFrame) -> pd.Series:
+        """Máscara das linhas cujo EMPLOYEE_ID já foi publicado (em qualquer versão)."""
+        return _row_keys(df).isin(self._state.setdefault('published', {}).keys())
+
+    def mark_published(self, df: pd.DataFrame, replace: bool = False) -> None:
+        """Registra as linhas publicadas; replace=True quando o relatório foi sobrescrito com elas."""
+        published = {} if replace else self._state.setdefault('published', {})
+        published.update(zip(_row_keys(df), _row_versions(df)))
+        self._state['published'] = published
+
+    def notification_tracker(
+        self,
+        df: pd.DataFrame,
+        on_sent: Optional[Callable[[pd.DataFrame], None]] = None
+    ) -> "NotificationTracker":
+        """Callback on_result que marca como notificadas só as linhas de df enviadas com sucesso."""
+        return NotificationTracker(self, df, on_sent)
+
+    def save(self) -> None:
+        write_json(self.path, self._state)
+
+
+class NotificationTracker:
+    """
+    on_result para os envios (ver email_service.send_bulk_notifications_from_frame):
+    a cada SendResult com sucesso, marca a linha de origem (posição result.key
+    em df) como notificada e avaliada. Falhas, timeouts e linhas puladas não
+    são marcadas e voltam na próxima execução.
+
+    flush() repassa a on_sent as linhas enviadas desde o flush anterior (ex:
+    para o log de alertas e o histórico, que assim só recebem o que de fato
+    saiu e não se repetem quando as falhas voltam na execução seguinte) e
+    grava o estado. A automação chama flush() ao fim do envio; mensagens
+    retidas pelo digest só têm resultado no fim da execução, e
+    send_pending_digests chama flush() de novo.
+
+    Sem watermark (execução não incremental), só as linhas enviadas são
+    repassadas a on_sent.
+    """
+
+    def __init__(
+        self,
+        watermark: Optional[WatermarkStore],
+        df: pd.DataFrame,
+        on_sent: Optional[Callable[[pd.DataFrame], None]] = None
+    ):
+        self.watermark = watermark
+        self.df = df
+        self.on_sent = on_sent
+        self._keys = _row_keys(df).tolist()
+        self._versions = _row_versions(df).tolist()
+        self._sent: List[int] = []
+        self.notified = 0
+
+    def __call__(self, result) -> None:
+        if result.status != "Success" or result.key is None:
+            return
+        if self.watermark is not None:
+            key, version = self._keys[result.key], self._versions[result.key]
+            self.watermark._state['notified'][key] = version
+            self.watermark._state['evaluated'][key] = version
+        self._sent.append(result.key)
+        self.notified += 1
+
+    def flush(self) -> None:
+        sent, self._sent = sorted(self._sent), []
+        if sent and self.on_sent is not None:
+            self.on_sent(self.df.iloc[sent])
+        if self.watermark is not None:
+            self.watermark.save()
@@ -0,0 +1,473 @@
+import os
+import re
+import hashlib
+import json
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from jinja2 import BaseLoader, FileSystemLoader, TemplateNotFound
+
+import config
+from core.logger_config import logger
+
+MANIFEST_NAME = "manifest.json"
+
+_EXTENDS_RE = re.compile(r"\{%-?\s*extends\s+[\"']([^\"']+)[\"']\s*-?%\}")
+_BLOCK_TAG_RE = re.compile(r"\{%-?\s*(block\s+(\w+)|endblock(?:\s+\w+)?)\s*-?%\}")
+_STYLE_BLOCK_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.IGNORECASE | re.DOTALL)
+_SIMPLE_SELECTOR_RE = re.compile(r"^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$")
+
+# elementos em que espaços entre tags não afetam a renderização
+_BLOCK_TAGS = {
+    "html", "head", "body", "title", "meta", "link", "style", "div", "p",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "br", "center",
+}
+_VOID_TAGS = {"area", "base", "br", "col", "img", "input", "link", "meta", "hr", "source", "wbr"}
+_RAW_TAGS = {"pre", "textarea", "script", "style"}
+
+
+# herança de templates
+def _split_blocks(source: str) -> Dict[str, str]:
+    """Retorna o conteúdo dos blocos de primeiro nível de um template filho."""
+    blocks = {}
+    depth = 0
+    current_name, content_start = None, 0
+    for match in _BLOCK_TAG_RE.finditer(source):
+        if match.group(2):
+            if depth == 0:
+                current_name, content_start = match.group(2), match.end()
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0 and current_name:
+                blocks[current_name] = source[content_start:match.start()]
+    return blocks
+
+
+def _fill_blocks(source: str, overrides: Dict[str, str], keep_tags: bool) -> str:
+    """Substitui os blocos do template pai pelos do filho, mantendo ou removendo as tags de bloco."""
+    match = _BLOCK_TAG_RE.search(source)
+    if not match or not match.group(2):
+        # sem blocos (ou endblock sem bloco aberto); devolve como está
+        return source
+
+    depth, end_match = 0, None
+    for candidate in _BLOCK_TAG_RE.finditer(source, match.start()):
+        depth += 1 if candidate.group(2) else -1
+        if depth == 0:
+            end_match = candidate
+            break
+    if end_match is None:
+        return source
+
+    name = match.group(2)
+    inner = source[match.end():end_match.start()]
+    replacement = overrides[name] if name in overrides else _fill_blocks(inner, overrides, keep_tags)
+    if keep_tags:
+        replacement = f"{{% block {name} %}}{replacement}{{% endblock %}}"
+    rest = _fill_blocks(source[end_match.end():], overrides, keep_tags)
+    return source[:match.start()] + replacement + rest
+
+
+def _resolve_inheritance(template_name: str, loader: FileSystemLoader) -> Tuple[str, List[str]]:
+    """Aplica recursivamente os blocos de cada filho sobre o pai, mantendo as tags de bloco."""
+    source, _, _ = loader.get_source(None, template_name)
+    parent = _EXTENDS_RE.search(source)
+    if not parent:
+        return source, [template_name]
+
+    child_blocks = _split_blocks(source)
+    if any("super()" in content for content in child_blocks.values()):
+        raise ValueError(f"Template {template_name} uses super(); it cannot be flattened.")
+
+    parent_source, dependencies = _resolve_inheritance(parent.group(1), loader)
+    return _fill_blocks(parent_source, child_blocks, keep_tags=True), [template_name] + dependencies
+
+
+def flatten_inheritance(template_name: str, loader: FileSystemLoader) -> Tuple[str, List[str]]:
+    """
+    Resolve '{% extends %}' gerando um único template sem herança.
+
+    Returns:
+        Tuple[str, List[str]]: O código-fonte achatado e a lista de templates
+        dos quais ele depende (incluindo o próprio).
+    """
+    try:
+        resolved, dependencies = _resolve_inheritance(template_name, loader)
+    except ValueError as e:
+        # super() depende da herança em tempo de execução; mantém o original
+        logger.warning(f"{e} Keeping inheritance as is.")
+        return loader.get_source(None, template_name)[0], [template_name]
+    return _fill_blocks(resolved, {}, keep_tags=False), dependencies
+
+
+# css
+def _split_declarations(style: str) -> List[Tuple[str, str]]:
+    """Divide 'a: b; c: d' em pares, sem quebrar expressões Jinja."""
+    declarations = []
+    for part in re.split(r";(?![^{]*\}\})", style):
+        if ":" not in part:
+            continue
+        prop, value = part.split(":", 1)
+        prop, value = prop.strip().lower(), " ".join(value.split())
+        if prop and value:
+            declarations.append((prop, value))
+    return declarations
+
+
+def _selector_specificity(selector: str) -> Optional[Tuple[int, int, int]]:
+    """Especificidade de um seletor simples (tag/.classe/#id e descendentes) ou None."""
+    ids = classes = tags = 0
+    for part in selector.split():
+        match = _SIMPLE_SELECTOR_RE.match(part)
+        if not match or not part:
+            return None
+        tags += 1 if match.group(1) else 0
+        ids += match.group(2).count("#")
+        classes += match.group(2).count(".")
+    return ids, classes, tags
+
+
+def parse_css(css: str) -> Tuple[List[Tuple[Tuple[int, int, int], int, str, List[Tuple[str, str]]]], str]:
+    """
+    Separa as regras do CSS que podem ser aplicadas inline das que não podem.
+
+    Returns:
+        Tuple: (regras inline como (especificidade, ordem, seletor, declarações),
+        CSS residual com @media, pseudo-classes etc).
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    rules, residual = [], []
+    position, order = 0, 0
+    while position < len(css):
+        open_brace = css.find("{", position)
+        if open_brace == -1:
+            break
+        selectors = css[position:open_brace].strip()
+
+        # encontra a chave de fechamento correspondente (at-rules podem aninhar)
+        depth, close_brace = 0, open_brace
+        for close_brace in range(open_brace, len(css)):
+            if css[close_brace] == "{":
+                depth += 1
+            elif css[close_brace] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+        body = css[open_brace + 1:close_brace]
+        position = close_brace + 1
+
+        if selectors.startswith("@"):
+            residual.append(f"{selectors}{{{body.strip()}}}")
+            continue
+
+        declarations = _split_declarations(body)
+        for selector in (s.strip() for s in selectors.split(",")):
+            specificity = _selector_specificity(selector)
+            if specificity is None:
+                formatted = ";".join(f"{p}:{v}" for p, v in declarations)
+                residual.append(f"{selector}{{{formatted}}}")
+            else:
+                rules.append((specificity, order, selector, declarations))
+            order += 1
+
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+    return rules, "".join(residual)
+
+
+def _matches(selector: str, stack: List[Tuple[str, str, set]]) -> bool:
+    """Verifica se o elemento no topo da pilha satisfaz o seletor (com descendentes)."""
+    parts = selector.split()
+
+    def compound_matches(part: str, element: Tuple[str, str, set]) -> bool:
+        tag, element_id, classes = element
+        match = _SIMPLE_SELECTOR_RE.match(part)
+        if match.group(1) and match.group(1).lower() != tag:
+            return False
+        for token in re.findall(r"[.#][\w-]+", match.group(2)):
+            if token[0] == "." and token[1:] not in classes:
+                return False
+            if token[0] == "#" and token[1:] != element_id:
+                return False
+        return True
+
+    if not compound_matches(parts[-1], stack[-1]):
+        return False
+    ancestor_index = len(stack) - 2
+    for part in reversed(parts[:-1]):
+        while ancestor_index >= 0 and not compound_matches(part, stack[ancestor_index]):
+            ancestor_index -= 1
+        if ancestor_index < 0:
+            return False
+        ancestor_index -= 1
+    return True
+
+
+def _merge_declarations(declaration_lists: List[List[Tuple[str, str]]]) -> str:
+    """Combina declarações em ordem de cascata, respeitando '!important'."""
+    merged: Dict[str, str] = {}
+    for declarations in declaration_lists:
+        for prop, value in declarations:
+            current = merged.get(prop)
+            if current and "!important" in current and "!important" not in value:
+                continue
+            merged.pop(prop, None)
+            merged[prop] = value
+    return ";".join(f"{prop}:{value}" for prop, value in merged.items()).replace('"', "'")
+
+
+class _InlineMinifyParser(HTMLParser):
+    """Reconstrói o HTML aplicando o CSS inline e removendo espaços redundantes."""
+
+    def __init__(self, rules, residual_css: str):
+        super().__init__(convert_charrefs=False)
+        self.rules = rules
+        self.residual_css = residual_css
+        self.output: List[str] = []
+        self.stack: List[Tuple[str, str, set]] = []
+        self.text_buffer: List[str] = []
+        self.last_tag: Optional[str] = None
+        self.raw_depth = 0
+        self.in_style = False
+
+    def _flush_text(self, next_tag: Optional[str]) -> None:
+        text = "".join(self.text_buffer)
+        self.text_buffer = []
+        if not text:
+            return
+        if self.raw_depth:
+            self.output.append(text)
+            return
+
+        text = re.sub(r"\s+", " ", text)
+        if self.last_tag in _BLOCK_TAGS:
+            text = text.lstrip()
+        if next_tag in _BLOCK_TAGS:
+            text = text.rstrip()
+        if text:
+            self.output.append(text)
+
+    def _inline_style(self, tag: str, attrs, starttag_text: str) -> str:
+        attributes = dict(attrs)
+        classes = set((attributes.get("class") or "").split())
+        self.stack.append((tag, attributes.get("id") or "", classes))
+
+        matched = [declarations for _, _, selector, declarations in self.rules if _matches(selector, self.stack)]
+        if tag in _VOID_TAGS:
+            self.stack.pop()
+
+        # quebras de linha entre atributos viram um único espaço
+        starttag_text = re.sub(r"\s*\n\s*", " ", starttag_text)
+        inline = attributes.get("style")
+        if inline:
+            matched.append(_split_declarations(inline))
+        if not matched:
+            return starttag_text
+        style = _merge_declarations(matched)
+
+        style_attr = re.compile(r"""\sstyle\s*=\s*("[^"]*"|'[^']*')""", re.IGNORECASE)
+        if style_attr.search(starttag_text):
+            return style_attr.sub(lambda _: f' style="{style}"', starttag_text, count=1)
+        closing = "/>" if starttag_text.endswith("/>") else ">"
+        return f'{starttag_text[:-len(closing)].rstrip()} style="{style}"{closing}'
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text(tag)
+        starttag_text = self.get_starttag_text()
+        if tag == "style":
+            self.in_style = True
+            self.raw_depth += 1
+            if self.residual_css:
+                self.output.append(f"<style>{self.residual_css}</style>")
+            self.last_tag = tag
+            return
+
+        self.output.append(self._inline_style(tag, attrs, starttag_text))
+        if tag in _RAW_TAGS:
+            self.raw_depth += 1
+        self.last_tag = tag
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text(tag)
+        starttag_text = self.get_starttag_text()
+        self.output.append(self._inline_style(tag, attrs, starttag_text))
+        if tag not in _VOID_TAGS:
+            self.stack.pop()
+        self.last_tag = tag
+
+    def handle_endtag(self, tag):
+        if self.in_style and tag == "style":
+            # o conteúdo original do <style> é descartado: já foi aplicado inline
+            self.text_buffer = []
+            self.in_style = False
+            self.raw_depth -= 1
+            self.last_tag = tag
+            return
+
+        self._flush_text(tag)
+        self.output.append(f"</{tag}>")
+        if tag in _RAW_TAGS:
+            self.raw_depth = max(0, self.raw_depth - 1)
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                del self.stack[index:]
+                break
+        self.last_tag = tag
+
+    def handle_data(self, data):
+        self.text_buffer.append(data)
+
+    def handle_entityref(self, name):
+        self.text_buffer.append(f"&{name};")
+
+    def handle_charref(self, name):
+        self.text_buffer.append(f"&#{name};")
+
+    def handle_comment(self, data):
+        # mantém apenas comentários condicionais (Outlook)
+        if data.strip().startswith("[if"):
+            self._flush_text(None)
+            self.output.append(f"<!--{data}-->")
+
+    def handle_decl(self, decl):
+        self._flush_text(None)
+        self.output.append(f"<!{decl}>")
+        self.last_tag = "html"
+
+    def close(self):
+        super().close()
+        self._flush_text(None)
+
+
+def inline_and_minify(source: str) -> str:
+    """Aplica o CSS dos blocos <style> inline e remove espaços redundantes."""
+    css = "\n".join(_STYLE_BLOCK_RE.findall(source))
+    rules, residual_css = parse_css(css)
+
+    parser = _InlineMinifyParser(rules, residual_css)
+    parser.feed(source)
+    parser.close()
+    return "".join(parser.output)
+
+
+# compilação e carregamento
+def _hash_source(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def compile_template(template_name: str, loader: FileSystemLoader) -> Tuple[str, Dict[str, str]]:
+    """
+    Compila um template: resolve herança, aplica CSS inline e minifica.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: O código compilado e o hash de cada
+        template de origem, usado para detectar templates desatualizados.
+    """
+    flattened, dependencies = flatten_inheritance(template_name, loader)
+    compiled = inline_and_minify(flattened)
+    hashes = {name: _hash_source(loader.get_source(None, name)[0]) for name in dependencies}
+    return compiled, hashes
+
+
+def build_compiled_templates(
+    source_dir: Path = config.TEMPLATES_DIR,
+    output_dir: Path = config.COMPILED_TEMPLATES_DIR,
+    pattern: str = "email/**/*.html"
+) -> Dict[str, Dict]:
+    """
+    Compila todos os templates que casam com o padrão e grava o manifesto.
+
+    Returns:
+        Dict[str, Dict]: O manifesto, com os hashes de origem de cada template.
+    """
+    loader = FileSystemLoader(source_dir)
+    manifest = {}
+
+    for template_file in sorted(Path(source_dir).glob(pattern)):
+        template_name = template_file.relative_to(source_dir).as_posix()
+        try:
+            compiled, hashes = compile_template(template_name, loader)
+        except Exception as e:
+            logger.error(f"Failed to compile template {template_name}: {e}", exc_info=True)
+            continue
+
+        output_path = Path(output_dir) / template_name
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(compiled, encoding="utf-8")
+        manifest[template_name] = {"sources": hashes}
+        logger.info(f"Compiled template {template_name}.")
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(output_dir) / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+class CompiledTemplateLoader(BaseLoader):
+    """
+    Carrega a versão compilada de um template quando ela existe e está em dia
+    com os arquivos de origem; caso contrário, usa o template original.
+    """
+
+    def __init__(self, source_dir=config.TEMPLATES_DIR, compiled_dir=config.COMPILED_TEMPLATES_DIR):
+        self.source_loader = FileSystemLoader(source_dir)
+        self.compiled_dir = Path(compiled_dir)
+        self._manifest = None
+        self._manifest_mtime = None
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        manifest_path = self.compiled_dir / MANIFEST_NAME
+        try:
+            mtime = manifest_path.stat().st_mtime
+        except FileNotFoundError:
+            return {}
+        if mtime != self._manifest_mtime:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest or {}
+
+    def _fresh_source_files(self, template_name: str) -> Optional[List[str]]:
+        """
+        Confere os hashes do manifesto com os arquivos de origem. Retorna os
+        caminhos das origens se a versão compilada estiver em dia, senão None.
+        """
+        entry = self._load_manifest().get(template_name)
+        if not entry:
+            return None
+        files = []
+        try:
+            for name, expected in entry["sources"].items():
+                source, filename, _ = self.source_loader.get_source(None, name)
+                if _hash_source(source) != expected:
+                    return None
+                files.append(filename)
+        except TemplateNotFound:
+            return None
+        return files
+
+    def get_source(self, environment, template):
+        compiled_path = self.compiled_dir / template
+        source_files = self._fresh_source_files(template) if compiled_path.is_file() else None
+        if source_files is not None:
+            source = compiled_path.read_text(encoding="utf-8")
+            # os hashes são conferidos só aqui, ao carregar; depois, como no FileSystemLoader,
+            # basta comparar os mtimes (a compilada, suas origens e o manifesto)
+            watched = source_files + [str(compiled_path), str(self.compiled_dir / MANIFEST_NAME)]
+            mtimes = {path: os.path.getmtime(path) for path in watched}
+
+            def uptodate() -> bool:
+                try:
+                    return all(os.path.getmtime(path) == mtime for path, mtime in mtimes.items())
+                except OSError:
+                    return False
+
+            return source, str(compiled_path), uptodate
+
+        logger.debug(f"No up-to-date compiled version of {template}; using the source template.")
+        return self.source_loader.get_source(environment, template)
+
+    def list_templates(self):
+        return self.source_loader.list_templates()
@@ -1,6 +1,7 @@
 import os
 import json
 import csv
+import threading
 from datetime import datetime, date
 from typing import Any, Dict, List, Optional
 
@@ -13,6 +14,11 @@ def get_today() -> date:
     return date.today() if config.DATE_MODE == "today" else config.SPECIFIC_DATE
 
 
+def get_target_date() -> date:
+    """Retorna a data de referência das automações (hoje ou SPECIFIC_DATE)."""
+    return get_today()
+
+
 def format_date(dt: date, fmt: str = "%d/%m/%Y") -> str:
     """Formata a data para string."""
     return dt.strftime(fmt)
@@ -36,10 +42,15 @@ def read_json(file_path: str) -> Optional[Dict[str, Any]]:
 
 
 def write_json(file_path: str, data: Dict[str, Any]) -> None:
-    """Grava um dicionário em um arquivo JSON."""
+    """
+    Grava um dicionário em um arquivo JSON. Escreve em um arquivo temporário e
+    o troca com os.replace, então um leitor nunca vê o arquivo pela metade.
+    """
     ensure_dir(os.path.dirname(file_path))
-    with open(file_path, "w", encoding="utf-8") as f:
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, file_path)
 
 
 def read_csv(file_path: str) -> Optional[List[Dict[str, Any]]]:
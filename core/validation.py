@@ -0,0 +1,154 @@
+import os
+import glob
+import hashlib
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+import config
+from core.logger_config import logger
+from core.utils import ensure_dir
+
+# formato simples de e-mail: algo@dominio.tld, sem espaços
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+
+
+class ValidationRule(NamedTuple):
+    """
+    Regra declarativa: 'check' recebe o DataFrame já convertido e devolve a
+    máscara das linhas que violam a regra. 'reject' manda a linha para a
+    quarentena; 'warn' só a contabiliza no resumo.
+    """
+    name: str
+    check: Callable[[pd.DataFrame], pd.Series]
+    action: str = 'reject'
+
+
+class ValidationResult(NamedTuple):
+    clean: pd.DataFrame
+    rejected: int
+    counts: Dict[str, int]
+    quarantine_file: Optional[str]
+
+
+def _invalid_email(column: str) -> Callable[[pd.DataFrame], pd.Series]:
+    return lambda df: ~df[column].astype("string").str.fullmatch(EMAIL_PATTERN).fillna(False).astype(bool)
+
+
+SCHEMA: List[ValidationRule] = [
+    ValidationRule('missing_employee_id', lambda df: df['EMPLOYEE_ID'].isna()),
+    # a última linha do arquivo prevalece sobre as anteriores do mesmo colaborador
+    ValidationRule(
+        'duplicate_employee_id',
+        lambda df: df['EMPLOYEE_ID'].duplicated(keep='last') & df['EMPLOYEE_ID'].notna()
+    ),
+    ValidationRule('invalid_contributor_email', _invalid_email('CONTRIBUTOR_EMAIL')),
+    # e-mails de gestor/coordenador só são usados nos resumos semanais (w1/w2):
+    # um valor inválido não deve tirar o colaborador dos alertas e do dashboard
+    ValidationRule('invalid_manager_email', _invalid_email('MANAGER_EMAIL'), action='warn'),
+    ValidationRule('invalid_coordinator_email', _invalid_email('COORDINATOR_EMAIL'), action='warn'),
+    ValidationRule(
+        'invalid_hours_worked',
+        lambda df: ~df['HOURS_WORKED'].between(0, config.MAX_DAILY_HOURS)
+    ),
+    ValidationRule('invalid_last_update', lambda df: df['LAST_UPDATE'].isna()),
+    # linhas sem data de admissão continuam válidas; só ficam fora dos aniversários
+    ValidationRule('invalid_admission_date', lambda df: df['ADMISSION_DATE'].isna(), action='warn'),
+]
+
+
+def _reasons(violations: np.ndarray, names: List[str], rows: np.ndarray) -> np.ndarray:
+    """Monta o texto com os motivos (separados por ';') apenas das linhas indicadas."""
+    reasons = np.full(len(rows), "", dtype=object)
+    for i, name in enumerate(names):
+        flagged = violations[rows, i]
+        reasons[flagged] = reasons[flagged] + (name + ";")
+    return np.array([reason.rstrip(";") for reason in reasons], dtype=object)
+
+
+def _write_quarantine(rejected_df: pd.DataFrame, source: str) -> Optional[str]:
+    """
+    Grava as linhas rejeitadas em config.QUARANTINE_DIR. O nome leva um hash
+    das linhas: o mesmo arquivo é validado a cada carga (várias automações por
+    execução, às vezes em processos diferentes) e, se já existe uma quarentena
+    com as mesmas linhas rejeitadas, ela é reaproveitada em vez de gravada de novo.
+    """
+    try:
+        digest = hashlib.sha1(pd.util.hash_pandas_object(rejected_df, index=False).to_numpy().tobytes()).hexdigest()[:12]
+        stem = os.path.splitext(os.path.basename(source))[0]
+        existing = sorted(glob.glob(os.path.join(glob.escape(str(config.QUARANTINE_DIR)), f"{glob.escape(stem)}_*_{digest}.csv")))
+        if existing:
+            return existing[-1]
+
+        ensure_dir(str(config.QUARANTINE_DIR))
+        path = os.path.join(config.QUARANTINE_DIR, f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{digest}.csv")
+        rejected_df.to_csv(path, index=False)
+        return path
+    except Exception as e:
+        logger.error(f"Failed to write quarantine file for {source}: {e}", exc_info=True)
+        return None
+
+
+def validate_contributors(
+    df: pd.DataFrame,
+    source: str,
+    raw: Optional[pd.DataFrame] = None,
+    schema: Optional[List[ValidationRule]] = None
+) -> ValidationResult:
+    """
+    Aplica todas as regras do schema de uma vez (cada uma é uma máscara
+    vetorizada), grava as linhas rejeitadas com os motivos em
+    config.QUARANTINE_DIR e emite um único log com o resumo. Validar de novo
+    o mesmo arquivo com as mesmas linhas rejeitadas reaproveita a quarentena
+    já gravada em vez de escrever outra.
+
+    Args:
+        df: DataFrame com as colunas já convertidas (datas, números).
+        source: Arquivo de origem, usado no nome da quarentena e no log.
+        raw: Valores originais (texto) das colunas convertidas, para que a
+             quarentena mostre o que veio no arquivo em vez de NaT/NaN.
+        schema: Regras a aplicar; padrão SCHEMA.
+
+    Returns:
+        ValidationResult: (linhas limpas, total rejeitado, violações por regra, arquivo de quarentena).
+    """
+    schema = schema or SCHEMA
+    names = [rule.name for rule in schema]
+    violations = np.column_stack(
+        [np.asarray(rule.check(df), dtype=bool) for rule in schema]
+    ) if schema else np.zeros((len(df), 0), dtype=bool)
+
+    reject_columns = [i for i, rule in enumerate(schema) if rule.action == 'reject']
+    rejected_mask = violations[:, reject_columns].any(axis=1) if reject_columns else np.zeros(len(df), dtype=bool)
+    counts = dict(zip(names, violations.sum(axis=0).tolist()))
+    rejected = int(rejected_mask.sum())
+
+    quarantine_file = None
+    if rejected:
+        rejected_rows = np.flatnonzero(rejected_mask)
+        rejected_df = df.iloc[rejected_rows].copy()
+        if raw is not None:
+            for column in raw.columns:
+                rejected_df[column] = raw[column].to_numpy()[rejected_rows]
+        rejected_df['REJECTION_REASONS'] = _reasons(violations, names, rejected_rows)
+        quarantine_file = _write_quarantine(rejected_df, source)
+
+    # um único registro com o resumo, com alguns EMPLOYEE_IDs de exemplo por regra
+    violated = [(i, name) for i, name in enumerate(names) if counts[name]]
+    if violated:
+        sample_size = config.LOG_SAMPLE_SIZE
+        details = []
+        for i, name in violated:
+            ids = df['EMPLOYEE_ID'].to_numpy()[violations[:, i]][:sample_size]
+            details.append(f"{name}={counts[name]} (e.g. {', '.join(str(x) for x in ids)})")
+        logger.warning(
+            f"Validation of {source}: {rejected} of {len(df)} rows rejected"
+            f"{f' (quarantined to {quarantine_file})' if quarantine_file else ''}. "
+            f"Violations: {'; '.join(details)}"
+        )
+    else:
+        logger.info(f"Validation of {source}: all {len(df)} rows passed.")
+
+    clean = df[~rejected_mask] if rejected else df
+    return ValidationResult(clean, rejected, counts, quarantine_file)
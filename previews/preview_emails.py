@@ -1,60 +1,277 @@
-import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import concurrent.futures
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from typing import Dict, List, Set
+from jinja2 import Environment, FileSystemLoader, meta
 
 # caminhos dinâmicos
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
 PREVIEWS_OUTPUT_DIR = PROJECT_ROOT / "previews_output"
+# hash de cada preview gerado (template + dependências + contexto)
+MANIFEST_FILE = PREVIEWS_OUTPUT_DIR / ".manifest.json"
+
+# contexto de exemplo com todas as variáveis usadas pelos templates
+SAMPLE_CONTEXT = {
+    "primary_color": "#4A1B9A", "logo_url": "https://www.google.com/images/branding/googlelogo/1x/googlelogo_color_272x92dp.png",
+    "button_url": "#", "button_text": "Ação", "dashboard_url": "#",
+    "nome": "João da Silva (Exemplo)", "horas_trabalhadas": 12.5, "data": "10/08/2025", "limite_horas": 10,
+    "anos_empresa": 3, "nome_gestor": "Ana Costa (Exemplo)", "data_resumo": "10/08/2025",
+    "tabela_horas": "<p><i>[Tabela de horas do time apareceria aqui]</i></p>",
+    "nome_coordenador": "Juliano Chaves (Exemplo)", "nome_area": "TI (Exemplo)",
+    "resumo_area": "<p><i>[Resumo da área apareceria aqui]</i></p>",
+    "secoes": [
+        {"assunto": "⚠️ Alerta de Horas Extras", "html": "<p><i>[Alerta de horas extras apareceria aqui]</i></p>"},
+        {"assunto": "🎉 Parabéns pelo seu Aniversário de Empresa!", "html": "<p><i>[Aniversário de empresa apareceria aqui]</i></p>"},
+    ],
+}
+
+# ambiente Jinja2 de cada processo de renderização
+_worker_env = None
 
 def setup_jinja_env():
     """Configura o ambiente Jinja2."""
     return Environment(loader=FileSystemLoader(TEMPLATES_DIR))
 
-def render_and_save(jinja_env: Environment, template_path: str, context: dict):
-    """Renderiza um template e o salva, garantindo que a pasta de destino exista."""
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def find_templates() -> List[str]:
+    """Templates de e-mail renderizáveis (os base.html só são usados por herança)."""
+    return sorted(
+        path.relative_to(TEMPLATES_DIR).as_posix()
+        for path in TEMPLATES_DIR.glob("**/*.html")
+        if path.name != "base.html"
+    )
+
+def dependency_graph(jinja_env: Environment) -> Dict[str, Set[str]]:
+    """
+    Mapeia cada template para todos os templates de que depende (extends,
+    include, import), de forma transitiva.
+    """
+    direct = {}
+    for path in TEMPLATES_DIR.glob("**/*.html"):
+        name = path.relative_to(TEMPLATES_DIR).as_posix()
+        source = path.read_text(encoding="utf-8")
+        direct[name] = {ref for ref in meta.find_referenced_templates(jinja_env.parse(source)) if ref}
+
+    def _closure(name: str, seen: Set[str]) -> Set[str]:
+        for dependency in direct.get(name, ()):
+            if dependency not in seen:
+                seen.add(dependency)
+                _closure(dependency, seen)
+        return seen
+
+    return {name: _closure(name, set()) for name in direct}
+
+def template_fingerprint(name: str, graph: Dict[str, Set[str]], context_hash: str) -> str:
+    """Hash do conteúdo do template, de todas as suas dependências e do contexto usado."""
+    parts = [context_hash]
+    for dependency in sorted({name} | graph.get(name, set())):
+        path = TEMPLATES_DIR / dependency
+        content = path.read_text(encoding="utf-8") if path.exists() else ""
+        parts.append(f"{dependency}:{_hash_text(content)}")
+    return _hash_text("|".join(parts))
+
+def load_manifest() -> Dict[str, str]:
     try:
-        template = jinja_env.get_template(template_path)
-        output_html = template.render(context)
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest: Dict[str, str]) -> None:
+    PREVIEWS_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
 
-        # cria um nome de arquivo seguro para o output
-        safe_name = template_path.replace(os.path.sep, "_")
-        output_filepath = PREVIEWS_OUTPUT_DIR / safe_name
+def output_path(template_path: str) -> Path:
+    # cria um nome de arquivo seguro para o output
+    return PREVIEWS_OUTPUT_DIR / template_path.replace("/", "_")
 
-        # garante que o diretório onde o arquivo será salvo exista
-        output_filepath.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_filepath, "w", encoding="utf-8") as f:
-            f.write(output_html)
-        print(f"✅ Preview gerado com sucesso: {output_filepath.name}")
+def _init_worker():
+    global _worker_env
+    _worker_env = setup_jinja_env()
 
+def render_and_save(template_path: str, contexts: List[dict], output_dir: Path) -> dict:
+    """
+    Renderiza um template com cada contexto e salva o resultado. Roda em um
+    processo filho; devolve tempos e tamanhos para o relatório.
+    """
+    jinja_env = _worker_env or setup_jinja_env()
+    try:
+        template = jinja_env.get_template(template_path)
+        timings, sizes = [], []
+        for i, context in enumerate(contexts):
+            started = time.perf_counter()
+            output_html = template.render(context)
+            timings.append(time.perf_counter() - started)
+            sizes.append(len(output_html.encode("utf-8")))
+
+            # um único contexto gera o preview padrão; vários geram uma pasta por template
+            if len(contexts) == 1:
+                output_filepath = output_dir / template_path.replace("/", "_")
+            else:
+                output_filepath = output_dir / template_path.replace("/", "_").removesuffix(".html") / f"{i:05d}.html"
+            # garante que o diretório onde o arquivo será salvo exista
+            output_filepath.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_filepath, "w", encoding="utf-8") as f:
+                f.write(output_html)
+        return {"template": template_path, "timings": timings, "sizes": sizes, "error": None}
     except Exception as e:
-        print(f"❌ Falha ao gerar preview para {template_path}: {e}")
+        return {"template": template_path, "timings": [], "sizes": [], "error": str(e)}
 
-def main():
-    """Encontra todos os templates HTML e gera pré-visualizações."""
-    print("--- Gerando Previews dos Templates de E-mail ---")
-    
-    PREVIEWS_OUTPUT_DIR.mkdir(exist_ok=True)
+def render_in_parallel(tasks: Dict[str, List[dict]], output_dir: Path, workers: int) -> List[dict]:
+    """Renderiza cada template (com seus contextos) em um processo do pool."""
+    if not tasks:
+        return []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(render_and_save, name, contexts, output_dir) for name, contexts in tasks.items()]
+        return [future.result() for future in concurrent.futures.as_completed(futures)]
+
+def build_previews(force: bool = False, workers: int = None) -> None:
+    """Gera os previews com SAMPLE_CONTEXT, re-renderizando só os templates alterados."""
     jinja_env = setup_jinja_env()
+    graph = dependency_graph(jinja_env)
+    context_hash = _hash_text(json.dumps(SAMPLE_CONTEXT, sort_keys=True, ensure_ascii=False))
+
+    manifest = {} if force else load_manifest()
+    fingerprints = {name: template_fingerprint(name, graph, context_hash) for name in find_templates()}
+    stale = [
+        name for name, fingerprint in fingerprints.items()
+        if manifest.get(name) != fingerprint or not output_path(name).exists()
+    ]
+    for name in sorted(set(fingerprints) - set(stale)):
+        print(f"⏭️  Sem alterações: {name}")
+
+    PREVIEWS_OUTPUT_DIR.mkdir(exist_ok=True)
+    results = render_in_parallel({name: [SAMPLE_CONTEXT] for name in stale}, PREVIEWS_OUTPUT_DIR, workers)
+    for result in sorted(results, key=lambda r: r["template"]):
+        if result["error"]:
+            print(f"❌ Falha ao gerar preview para {result['template']}: {result['error']}")
+            continue
+        manifest[result["template"]] = fingerprints[result["template"]]
+        print(f"✅ Preview gerado com sucesso: {output_path(result['template']).name}")
+
+    # remove do manifesto templates que não existem mais
+    save_manifest({name: manifest[name] for name in fingerprints if name in manifest})
+    print(f"\n🎯 {len(results)} de {len(fingerprints)} previews gerados na pasta 'previews_output/'!")
+
+def build_data_contexts(rows: int) -> Dict[str, List[dict]]:
+    """Monta até 'rows' contextos reais por template a partir de config.CONTRIBUTORS_FILE."""
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from datetime import date
+    import config
+    from core.data_loader import load_processed_data
+    from core.parallel_loader import resolve_input_files
+    from automations.weekly import w1_consolidated_manager, w2_consolidated_coordinator
 
-    full_sample_context = {
-        "primary_color": "#4A1B9A", "logo_url": "https://www.google.com/images/branding/googlelogo/1x/googlelogo_color_272x92dp.png",
-        "button_url": "#", "button_text": "Ação", "dashboard_url": "#",
-        "nome": "João da Silva (Exemplo)", "horas_trabalhadas": 12.5, "data": "10/08/2025", "limite_horas": 10,
-        "anos_empresa": 3, "nome_gestor": "Ana Costa (Exemplo)", "data_resumo": "10/08/2025",
-        "tabela_horas": "<p><i>[Tabela de horas do time apareceria aqui]</i></p>",
-        "nome_coordenador": "Juliano Chaves (Exemplo)", "nome_area": "TI (Exemplo)",
-        "resumo_area": "<p><i>[Resumo da área apareceria aqui]</i></p>",
+    files = resolve_input_files(config.CONTRIBUTORS_FILE)
+    df = load_processed_data(files[0]) if files else None
+    if df is None or df.empty:
+        raise SystemExit(f"Nenhum dado de colaboradores em {config.CONTRIBUTORS_FILE}.")
+
+    today = date.today()
+    dashboard_url = f"https://docs.google.com/spreadsheets/d/{config.GOOGLE_SHEET_ID}"
+    # usa as linhas reais independentemente da data, para sempre haver exemplos
+    overtime = df[df['HOURS_WORKED'] > config.HOURS_LIMIT]
+    admitted = df.dropna(subset=['ADMISSION_DATE']).head(rows)
+
+    overtime_contexts = [
+        {
+            'nome': row.CONTRIBUTOR_NAME,
+            'data': today.strftime('%d/%m/%Y'),
+            'horas_trabalhadas': row.HOURS_WORKED,
+            'limite_horas': config.HOURS_LIMIT,
+            'dashboard_url': dashboard_url,
+        }
+        for row in overtime.head(rows).itertuples()
+    ]
+    return {
+        'email/alerts/overtime_alert.html': overtime_contexts,
+        'email/alerts/anniversary_alert.html': [
+            {
+                'nome': row.CONTRIBUTOR_NAME,
+                'anos_empresa': max(1, today.year - row.ADMISSION_DATE.year),
+                'dashboard_url': dashboard_url,
+            }
+            for row in admitted.itertuples()
+        ],
+        'email/reports/manager_summary.html': [
+            {
+                'nome_gestor': row.MANAGER_NAME,
+                'data_resumo': today.strftime('%d/%m/%Y'),
+                'tabela_horas': row.TEAM_SUMMARY_HTML,
+                'dashboard_url': dashboard_url,
+            }
+            for row in w1_consolidated_manager.build_summary_frame(
+                overtime[w1_consolidated_manager.RESULT_COLUMNS]
+            ).head(rows).itertuples()
+        ],
+        'email/reports/coordinator_summary.html': [
+            {
+                'nome_coordenador': row.COORDINATOR_NAME,
+                'nome_area': row.AREA,
+                'data_resumo': today.strftime('%d/%m/%Y'),
+                'resumo_area': row.AREA_SUMMARY_HTML,
+                'dashboard_url': dashboard_url,
+            }
+            for row in w2_consolidated_coordinator.build_summary_frame(
+                overtime[w2_consolidated_coordinator.RESULT_COLUMNS]
+            ).head(rows).itertuples()
+        ],
+        'email/reports/digest.html': [
+            {
+                'secoes': [
+                    {'assunto': "⚠️ Alerta de Horas Extras",
+                     'html': f"<p>{context['nome']}: {context['horas_trabalhadas']:.1f}h</p>"},
+                    {'assunto': "🎉 Parabéns pelo seu Aniversário de Empresa!",
+                     'html': f"<p>{context['nome']}</p>"},
+                ]
+            }
+            for context in overtime_contexts
+        ],
     }
 
-    for template_file in TEMPLATES_DIR.glob("**/*.html"):
-        relative_path = template_file.relative_to(TEMPLATES_DIR).as_posix()
-        if "base.html" in relative_path:
+def build_data_previews(rows: int, workers: int = None) -> None:
+    """Renderiza 'rows' contextos reais por template e mostra tempo e tamanho de cada um."""
+    tasks = build_data_contexts(rows)
+    output_dir = PREVIEWS_OUTPUT_DIR / "data"
+    results = render_in_parallel(tasks, output_dir, workers)
+
+    print(f"\n{'template':<42} {'n':>6} {'ms/render':>10} {'max ms':>8} {'avg KB':>8} {'max KB':>8}")
+    for result in sorted(results, key=lambda r: r["template"]):
+        if result["error"]:
+            print(f"{result['template']:<42} ❌ {result['error']}")
+            continue
+        timings, sizes = result["timings"], result["sizes"]
+        if not timings:
+            print(f"{result['template']:<42} {0:>6} (sem dados)")
             continue
-        render_and_save(jinja_env, relative_path, full_sample_context)
+        print(
+            f"{result['template']:<42} {len(timings):>6} {sum(timings) / len(timings) * 1000:>10.3f} "
+            f"{max(timings) * 1000:>8.3f} {sum(sizes) / len(sizes) / 1024:>8.1f} {max(sizes) / 1024:>8.1f}"
+        )
+    print(f"\n🎯 Previews gerados na pasta '{output_dir.relative_to(PROJECT_ROOT)}/'!")
 
-    print("\n🎯 Previews gerados com sucesso na pasta 'previews_output/'!")
+def main():
+    """Gera pré-visualizações dos templates HTML."""
+    parser = argparse.ArgumentParser(description="Gera previews dos templates de e-mail.")
+    parser.add_argument("--force", action="store_true", help="Ignora o manifesto e renderiza tudo.")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de renderização.")
+    parser.add_argument("--from-data", type=int, metavar="N", default=None,
+                        help="Renderiza N contextos reais por template a partir dos dados de colaboradores.")
+    args = parser.parse_args()
+
+    print("--- Gerando Previews dos Templates de E-mail ---")
+    if args.from_data:
+        build_data_previews(args.from_data, args.workers)
+    else:
+        build_previews(force=args.force, workers=args.workers)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
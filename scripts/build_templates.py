@@ -0,0 +1,58 @@
+from dotenv import load_dotenv
+import re
+import sys
+import os
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/scripts)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# pega o diretório "pai" da pasta do script (a raiz do projeto, ex: .../Automação_RH)
+project_root = os.path.dirname(script_dir)
+# adiciona a raiz do projeto à lista de caminhos do Python
+sys.path.insert(0, project_root)
+
+from jinja2 import Environment, FileSystemLoader
+
+import config
+from core.logger_config import logger
+from core.template_compiler import build_compiled_templates
+from previews.preview_emails import SAMPLE_CONTEXT
+
+
+def _visible_text(html: str) -> str:
+    """Texto visível do HTML, usado para conferir que a compilação não alterou o conteúdo."""
+    html = re.sub(r"<(style|script)[^>]*>.*?</\1>", "", html, flags=re.IGNORECASE | re.DOTALL)
+    html = re.sub(r"<[^>]+>", " ", html)
+    return " ".join(html.split())
+
+
+def main():
+    """Compila os templates de e-mail e reporta o tamanho por mensagem antes e depois."""
+    logger.info("--- Building compiled email templates ---")
+    manifest = build_compiled_templates(config.TEMPLATES_DIR, config.COMPILED_TEMPLATES_DIR)
+
+    source_env = Environment(loader=FileSystemLoader(config.TEMPLATES_DIR))
+    compiled_env = Environment(loader=FileSystemLoader(config.COMPILED_TEMPLATES_DIR))
+
+    total_before = total_after = 0
+    for template_name in manifest:
+        before = source_env.get_template(template_name).render(SAMPLE_CONTEXT)
+        after = compiled_env.get_template(template_name).render(SAMPLE_CONTEXT)
+        size_before, size_after = len(before.encode("utf-8")), len(after.encode("utf-8"))
+        total_before += size_before
+        total_after += size_after
+
+        saved = 100 * (1 - size_after / size_before) if size_before else 0
+        logger.info(f"{template_name}: {size_before} -> {size_after} bytes/message ({saved:.1f}% smaller)")
+        if _visible_text(before) != _visible_text(after):
+            logger.warning(f"{template_name}: visible text differs after compilation; review the compiled output.")
+
+    if total_before:
+        logger.info(
+            f"--- Build finished: {len(manifest)} templates, "
+            f"{total_before} -> {total_after} bytes for one message of each ---"
+        )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    main()
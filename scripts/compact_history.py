@@ -0,0 +1,36 @@
+from dotenv import load_dotenv
+import argparse
+from datetime import date
+import sys
+import os
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/scripts)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# pega o diretório "pai" da pasta do script (a raiz do projeto, ex: .../Automação_RH)
+project_root = os.path.dirname(script_dir)
+# adiciona a raiz do projeto à lista de caminhos do Python
+sys.path.insert(0, project_root)
+
+import config
+from core.logger_config import logger
+from core.history_store import HistoryStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the small daily files of the local history store.")
+    parser.add_argument("--root", default=str(config.HISTORY_DIR), help="Diretório do histórico.")
+    parser.add_argument("--automation", action="append", help="Automação a compactar (pode repetir); padrão todas.")
+    parser.add_argument(
+        "--before", type=date.fromisoformat, default=date.today(),
+        help="Só compacta partições anteriores a esta data (YYYY-MM-DD); padrão hoje, que ainda recebe gravações."
+    )
+    parser.add_argument("--min-files", type=int, default=2, help="Arquivos mínimos na partição para compactá-la.")
+    args = parser.parse_args()
+
+    compacted = HistoryStore(args.root).compact(args.automation, before=args.before, min_files=args.min_files)
+    logger.info(f"History compaction finished: {compacted} partitions compacted in {args.root}.")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    main()
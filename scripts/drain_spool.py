@@ -0,0 +1,143 @@
+from dotenv import load_dotenv
+import argparse
+import multiprocessing
+import threading
+import signal
+import time
+import sys
+import os
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/scripts)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# pega o diretório "pai" da pasta do script (a raiz do projeto, ex: .../Automação_RH)
+project_root = os.path.dirname(script_dir)
+# adiciona a raiz do projeto à lista de caminhos do Python
+sys.path.insert(0, project_root)
+
+import config
+from core.logger_config import (
+    logger, RUN_ID, start_worker_log_forwarding, configure_worker_logger
+)
+from core.mail_spool import MailSpool
+
+# sinalizado por SIGINT/SIGTERM; as mensagens em envio terminam antes de sair
+_stop_event = threading.Event()
+
+
+def _request_stop(signum, frame):
+    _stop_event.set()
+
+
+def _drain_loop(spool: MailSpool, once: bool, poll_seconds: float) -> int:
+    """Reserva, envia e finaliza mensagens até o spool esvaziar (--once) ou receber um sinal."""
+    from core.email_sender import send_prepared_message
+
+    processed = 0
+    while not _stop_event.is_set():
+        path = spool.claim()
+        if path is None:
+            if once:
+                break
+            _stop_event.wait(poll_seconds)
+            continue
+
+        try:
+            msg = spool.read(path)
+        except Exception as e:
+            logger.error(f"Could not parse spooled message {path}. Error: {e}", exc_info=True)
+            spool.complete(path, ok=False, error=f"Failed: {e}")
+            continue
+
+        _, status = send_prepared_message(msg)
+        spool.complete(path, ok=status == "Success", error=status)
+        processed += 1
+    return processed
+
+
+def _drain_worker(worker_id: int, spool_root: str, threads: int, once: bool,
+                  poll_seconds: float, log_queue, run_id: str) -> None:
+    """Processo drenador: várias threads compartilham as conexões SMTP do processo."""
+    configure_worker_logger(log_queue, run_id, f"drain-{worker_id}")
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    from core.email_sender import sender_pool
+
+    spool = MailSpool(spool_root)
+    results = []
+    workers = [
+        threading.Thread(target=lambda: results.append(_drain_loop(spool, once, poll_seconds)))
+        for _ in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    sender_pool.close_all()
+    logger.info(f"Drain worker {worker_id} finished: {sum(results)} messages processed.")
+
+
+def main():
+    """
+    Envia as mensagens gravadas no spool (EMAIL_DELIVERY_MODE=spool) com N
+    processos independentes. Pode rodar em mais de um host desde que todos
+    vejam o mesmo SPOOL_DIR.
+    """
+    parser = argparse.ArgumentParser(description="Drain the outbound mail spool.")
+    parser.add_argument("--workers", type=int, default=config.MAX_PROCESS_WORKERS,
+                        help="Número de processos de envio.")
+    parser.add_argument("--threads", type=int, default=config.MAX_PARALLEL_WORKERS,
+                        help="Threads de envio por processo.")
+    parser.add_argument("--once", action="store_true",
+                        help="Encerra quando não houver mais mensagens pendentes.")
+    parser.add_argument("--poll", type=float, default=2.0,
+                        help="Segundos entre verificações quando o spool está vazio.")
+    parser.add_argument("--stale-after", type=int, default=600,
+                        help="Segundos para considerar abandonada uma mensagem em cur/.")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    logger.info("==========================================================")
+    logger.info("  STARTING MAIL SPOOL DRAIN")
+    logger.info("==========================================================")
+
+    spool = MailSpool(config.SPOOL_DIR)
+    spool.recover_stale(args.stale_after)
+    logger.info(f"{spool.pending_count()} messages pending in {config.SPOOL_DIR}.")
+
+    log_queue, log_listener = start_worker_log_forwarding()
+    processes = [
+        multiprocessing.Process(
+            target=_drain_worker,
+            args=(i, str(config.SPOOL_DIR), args.threads, args.once, args.poll, log_queue, RUN_ID),
+            name=f"drain-{i}"
+        )
+        for i in range(max(1, args.workers))
+    ]
+    for process in processes:
+        process.start()
+
+    # repassa o pedido de parada aos processos filhos
+    def _forward_stop(signum, frame):
+        logger.info(f"Received signal {signum}. Finishing in-flight messages before shutting down...")
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, _forward_stop)
+    signal.signal(signal.SIGTERM, _forward_stop)
+
+    for process in processes:
+        process.join()
+    log_listener.stop()
+
+    logger.info("==========================================================")
+    logger.info(f"  MAIL SPOOL DRAIN FINISHED in {time.time() - start_time:.2f}s")
+    logger.info(f"  Remaining: {spool.pending_count()} pending")
+    logger.info("==========================================================")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    main()
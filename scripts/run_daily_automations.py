@@ -10,10 +10,13 @@ project_root = os.path.dirname(script_dir)
 # adiciona a raiz do projeto à lista de caminhos do Python
 sys.path.insert(0, project_root)
 
-from core.logger_config import logger
+import config
+from core.logger_config import logger, set_task_id
+from core.digest_service import digest_collector
+from core.email_service import send_pending_digests
 try:
     from automations.daily import d1_individual_contributor
-    from automations.daily import d2_work_anniversary
+    from automations.daily import d4_work_anniversary
     logger.info("Daily automation modules imported successfully.")
 except ImportError as e:
     logger.error(f"CRITICAL: Failed to import a daily automation module. Error: {e}", exc_info=True)
@@ -28,15 +31,20 @@ def main():
     
     total_success = 0
     total_failed = 0
+
+    # com o digest ativo, as automações só geram as mensagens; o envio é feito ao final
+    if config.ENABLE_EMAIL_DIGEST:
+        digest_collector.start()
     
     # lista de tarefas diárias
     automation_tasks = [
         d1_individual_contributor,
-        d2_work_anniversary
+        d4_work_anniversary
     ]
     
     for task_module in automation_tasks:
         task_name = task_module.__name__
+        set_task_id(task_name)
         try:
             logger.info(f"--- Orchestrator: Starting task {task_name} ---")
             success, failed = task_module.run()
@@ -45,6 +53,14 @@ def main():
             logger.info(f"--- Orchestrator: Task {task_name} finished. Results: {success} succeeded, {failed} failed. ---")
         except Exception as e:
             logger.error(f"A critical error occurred during task {task_name}: {e}", exc_info=True)
+        finally:
+            set_task_id(None)
+
+    if config.ENABLE_EMAIL_DIGEST:
+        success, failed = send_pending_digests(test_limit=config.EMAIL_TEST_LIMIT)
+        total_success += success
+        total_failed += failed
+        logger.info(f"--- Orchestrator: Digest delivery finished. Results: {success} succeeded, {failed} failed. ---")
 
     end_time = time.time()
     total_time = end_time - start_time
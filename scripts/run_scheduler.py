@@ -0,0 +1,106 @@
+from dotenv import load_dotenv
+from datetime import date
+import signal
+import time
+import sys
+import os
+
+# pega o caminho da pasta onde o script está (ex: .../Automação_RH/scripts)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+# pega o diretório "pai" da pasta do script (a raiz do projeto, ex: .../Automação_RH)
+project_root = os.path.dirname(script_dir)
+# adiciona a raiz do projeto à lista de caminhos do Python
+sys.path.insert(0, project_root)
+
+import schedule
+
+import config
+from core.logger_config import logger
+from core import data_loader, email_sender, email_service
+from core.file_watcher import PollingWatcher
+from core.history_store import HistoryStore
+
+import run_daily_automations
+import run_weekly_automations
+
+# sinalizado por SIGINT/SIGTERM; o job em andamento termina antes de sair
+_stop_requested = False
+
+
+def _request_stop(signum, frame):
+    global _stop_requested
+    _stop_requested = True
+    logger.info(f"Received signal {signum}. Finishing in-flight work before shutting down...")
+
+
+def _compact_history() -> None:
+    # só partições de dias anteriores: a de hoje ainda recebe gravações
+    HistoryStore().compact(before=date.today())
+
+
+def _register_jobs() -> None:
+    """Registra as automações diárias e semanais e a compactação do histórico no agendador."""
+    schedule.every().day.at(config.DAILY_RUN_TIME).do(run_daily_automations.main).tag("daily")
+    schedule.every().day.at(config.DAILY_RUN_TIME).do(_compact_history).tag("history")
+    getattr(schedule.every(), config.WEEKLY_RUN_DAY.lower()).at(config.WEEKLY_RUN_TIME).do(
+        run_weekly_automations.main
+    ).tag("weekly")
+
+    for job in schedule.get_jobs():
+        logger.info(f"Scheduled job: {job}")
+
+
+def _apply_changes(data_watcher: PollingWatcher, templates_watcher: PollingWatcher) -> None:
+    """Invalida apenas o estado afetado pelos arquivos alterados."""
+    for path in data_watcher.changes():
+        logger.info(f"Data file changed: {path}. Invalidating cached dataset.")
+        data_loader.invalidate_cache(str(path))
+
+    changed_templates = templates_watcher.changes()
+    if changed_templates:
+        logger.info(f"{len(changed_templates)} template file(s) changed. Reloading templates.")
+        email_service.reload_templates()
+
+
+def main():
+    """
+    Daemon que executa as automações no horário agendado, mantendo entre as
+    execuções o dataset processado, os templates compilados, o cliente do
+    Google Sheets e as conexões SMTP.
+    """
+    logger.info("==========================================================")
+    logger.info("  STARTING HR AUTOMATION SCHEDULER")
+    logger.info("==========================================================")
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    data_loader.enable_cache()
+    _register_jobs()
+
+    data_watcher = PollingWatcher([config.DATA_DIR], patterns=["*.csv", "*.xlsx"])
+    templates_watcher = PollingWatcher(
+        [config.TEMPLATES_DIR, config.COMPILED_TEMPLATES_DIR], patterns=["*.html", "*.json"]
+    )
+
+    last_poll = 0.0
+    while not _stop_requested:
+        if time.monotonic() - last_poll >= config.SCHEDULER_POLL_SECONDS:
+            _apply_changes(data_watcher, templates_watcher)
+            email_sender.sender_pool.keepalive()
+            last_poll = time.monotonic()
+
+        # os jobs rodam de forma síncrona: um sinal recebido durante um envio
+        # só interrompe o loop depois que o job terminar
+        schedule.run_pending()
+        time.sleep(1)
+
+    email_sender.sender_pool.close_all()
+    logger.info("==========================================================")
+    logger.info("  HR AUTOMATION SCHEDULER STOPPED")
+    logger.info("==========================================================")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    main()
@@ -0,0 +1,56 @@
+import sys
+import os
+
+import pytest
+
+# adiciona a raiz do projeto à lista de caminhos do Python (como os scripts fazem)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from core import email_sender
+from core.sender_pool import SenderAccount, SenderPool, UsageTracker
+from benchmarks.fake_smtp import FakeSMTPServer
+
+
+@pytest.fixture
+def smtp():
+    """Relay SMTP local sem latência nem erros; cada teste ajusta as taxas se precisar."""
+    with FakeSMTPServer(seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    """Fábrica de SenderPool com uma conta por relay, com o uso gravado em tmp_path."""
+    def _make(servers, **account_options) -> SenderPool:
+        return SenderPool(
+            [
+                SenderAccount(f"account-{i}", server.host, server.port, f"sender-{i}@example.com", "secret", **account_options)
+                for i, server in enumerate(servers)
+            ],
+            usage=UsageTracker(tmp_path / "sender_usage.json")
+        )
+    return _make
+
+
+@pytest.fixture
+def sending_config(monkeypatch, tmp_path):
+    """Envio direto, sem TLS, digest ou destinatário de teste, e nada gravado fora de tmp_path."""
+    monkeypatch.setattr(config, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(config, "EMAIL_DELIVERY_MODE", "direct")
+    monkeypatch.setattr(config, "EMAIL_BATCH_DEADLINE", None)
+    monkeypatch.setattr(config, "EMAIL_TEST_RECIPIENT", None)
+    monkeypatch.setattr(config, "ENABLE_EMAIL_DIGEST", False)
+    monkeypatch.setattr(config, "SMTP_THROTTLE_COOLDOWN", 60)
+    monkeypatch.setattr(config, "MAX_PARALLEL_WORKERS", 4)
+    monkeypatch.setattr(config, "QUARANTINE_DIR", str(tmp_path / "quarantine"))
+    return config
+
+
+@pytest.fixture
+def use_pool(monkeypatch):
+    """Troca o pool de contas do email_sender durante o teste."""
+    def _use(pool: SenderPool) -> SenderPool:
+        monkeypatch.setattr(email_sender, "sender_pool", pool)
+        return pool
+    return _use
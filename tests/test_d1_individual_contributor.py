@@ -0,0 +1,92 @@
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import config
+from automations.daily import d1_individual_contributor
+from core import gsheets_service
+from core.history_store import HistoryStore
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sample_data.csv")
+TARGET_DATE = date(2025, 6, 8)
+
+
+class FakeSheetsClient:
+    """gsheets_client em memória: cada aba é uma lista de linhas de texto, com o cabeçalho primeiro."""
+
+    def __init__(self):
+        self.worksheets = {}
+
+    def ensure_headers(self, spreadsheet_id, worksheet_name, headers):
+        rows = self.worksheets.setdefault(worksheet_name, [])
+        if not rows:
+            rows.append(list(headers))
+
+    def append_rows(self, spreadsheet_id, worksheet_name, data_rows):
+        self.worksheets[worksheet_name].extend(list(row) for row in data_rows)
+        return True
+
+    def clear_and_write_rows(self, spreadsheet_id, worksheet_name, data_rows):
+        self.worksheets[worksheet_name] = [list(row) for row in data_rows]
+        return True
+
+    def read_rows(self, spreadsheet_id, worksheet_name):
+        return [list(row) for row in self.worksheets.get(worksheet_name, [])]
+
+    def records(self, worksheet_name):
+        headers, *rows = self.worksheets[worksheet_name]
+        return [dict(zip(headers, row)) for row in rows]
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    client = FakeSheetsClient()
+    monkeypatch.setattr(gsheets_service, "gsheets_client", client)
+    return client
+
+
+@pytest.fixture
+def d1_config(monkeypatch, tmp_path, sending_config, use_pool, make_pool, smtp):
+    contributors_file = tmp_path / "contributors.csv"
+    contributors_file.write_text(open(SAMPLE, encoding="utf-8").read(), encoding="utf-8")
+    monkeypatch.setattr(config, "CONTRIBUTORS_FILE", str(contributors_file))
+    monkeypatch.setattr(config, "DATE_MODE", "specific")
+    monkeypatch.setattr(config, "SPECIFIC_DATE", TARGET_DATE)
+    monkeypatch.setattr(config, "INCREMENTAL_PROCESSING", True)
+    monkeypatch.setattr(config, "STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(config, "HISTORY_DIR", str(tmp_path / "history"))
+    monkeypatch.setattr(config, "ROLLUP_DIR", str(tmp_path / "rollups"))
+    monkeypatch.setattr(config, "EMAIL_TEST_LIMIT", 5)
+    use_pool(make_pool([smtp]))
+    return config
+
+
+def test_reruns_log_each_alert_once(d1_config, sheets, smtp):
+    for _ in range(3):
+        d1_individual_contributor.run()
+
+    # 5 envios por execução: o log e o histórico têm só as linhas enviadas, sem repetição
+    assert smtp.stats["delivered"] == 15
+    assert len(sheets.records('Log de Alertas')) == 15
+    history = HistoryStore().query(['d1_individual_contributor'], TARGET_DATE, TARGET_DATE)
+    assert len(history) == 15
+    assert history['EMPLOYEE_ID'].is_unique
+
+
+def test_a_changed_employee_replaces_its_dashboard_row(d1_config, sheets):
+    d1_individual_contributor.run()
+    dashboard = sheets.records('Dashboard Horas Extras')
+
+    contributors = pd.read_csv(config.CONTRIBUTORS_FILE)
+    changed = contributors['EMPLOYEE_ID'] == 1001
+    contributors.loc[changed, 'LAST_UPDATE'] = "08/06/2025 18:00:00 -03:00"
+    contributors.loc[changed, 'HOURS_WORKED'] = 14.2
+    contributors.to_csv(config.CONTRIBUTORS_FILE, index=False)
+    d1_individual_contributor.run()
+
+    updated = sheets.records('Dashboard Horas Extras')
+    assert len(updated) == len(dashboard)
+    assert len({row['EMPLOYEE_ID'] for row in updated}) == len(updated)
+    assert [row['HOURS_WORKED'] for row in updated if row['EMPLOYEE_ID'] == "1001"] == ["14.2"]
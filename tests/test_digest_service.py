@@ -0,0 +1,102 @@
+import pytest
+
+from core import email_sender, email_service
+from core.digest_service import DigestCollector, digest_collector, extract_section
+
+ALERT = "email/alerts/overtime_alert.html"
+ANNIVERSARY = "email/alerts/anniversary_alert.html"
+
+
+@pytest.fixture
+def collecting(monkeypatch):
+    """Liga o digest durante o teste e grava os jobs efetivamente enviados."""
+    sent = []
+    build_message = email_sender.build_message
+    monkeypatch.setattr(email_sender, "build_message", lambda job: sent.append(job) or build_message(job))
+    digest_collector.start()
+    yield sent
+    digest_collector.drain()
+
+
+def _alert(recipient: str, name: str) -> dict:
+    return {
+        'recipient': recipient,
+        'context': {'nome': name, 'data': "08/06/2025", 'horas_trabalhadas': 11, 'limite_horas': 10, 'dashboard_url': "#"},
+    }
+
+
+def _anniversary(recipient: str, name: str) -> dict:
+    return {'recipient': recipient, 'context': {'nome': name, 'anos_empresa': 5, 'dashboard_url': "#"}}
+
+
+def test_extract_section_keeps_only_the_content_block():
+    body = """<html><body><div class="container">
+        <div class="header">Cabeçalho</div>
+        <div class="content"><p>Olá</p><div class="box"><p>Detalhe</p></div></div>
+        <div class="footer">Rodapé</div>
+    </div></body></html>"""
+
+    assert extract_section(body) == '<p>Olá</p><div class="box"><p>Detalhe</p></div>'
+
+
+def test_extract_section_without_content_block_drops_the_footer():
+    body = '<html><body><p>Oi</p><div class="footer">Rodapé</div></body></html>'
+
+    assert extract_section(body) == "<p>Oi</p>"
+
+
+def test_collector_groups_by_recipient_in_arrival_order():
+    collector = DigestCollector()
+    collector.start()
+    collector.add("a@example.com", "s1", "b1")
+    collector.add("b@example.com", "s2", "b2")
+    collector.add("a@example.com", "s3", "b3")
+
+    assert collector.pending_count() == 3
+    pending = collector.drain()
+    assert list(pending) == ["a@example.com", "b@example.com"]
+    assert [message['subject'] for message in pending["a@example.com"]] == ["s1", "s3"]
+    assert not collector.active and collector.pending_count() == 0
+
+
+def test_messages_for_one_recipient_are_sent_as_a_single_digest(smtp, sending_config, use_pool, make_pool, collecting):
+    use_pool(make_pool([smtp]))
+    alert_results, anniversary_results = [], []
+
+    email_service.send_bulk_notifications(
+        [_alert("ana@example.com", "Ana"), _alert("bia@example.com", "Bia")], ALERT, "Alerta de {nome}",
+        coalesce=True, on_result=alert_results.append
+    )
+    email_service.send_bulk_notifications(
+        [_anniversary("ana@example.com", "Ana")], ANNIVERSARY, "Aniversário de {nome}",
+        coalesce=True, on_result=anniversary_results.append
+    )
+    assert smtp.stats["delivered"] == 0
+
+    assert email_service.send_pending_digests() == (2, 0)
+    assert smtp.stats["delivered"] == 2
+
+    by_recipient = {job['recipient']: job for job in collecting}
+    # uma única mensagem segue como foi gerada; duas viram um digest com uma seção por mensagem
+    assert by_recipient["bia@example.com"]['subject'] == "Alerta de Bia"
+    digest = by_recipient["ana@example.com"]
+    assert digest['subject'] == "📬 Suas Notificações (2)"
+    assert "Alerta de Ana" in digest['body'] and "Aniversário de Ana" in digest['body']
+    assert digest['body'].count("Esta é uma mensagem automática") == 1
+
+    # cada mensagem original recebe o resultado do e-mail que a levou, com a sua própria key
+    assert sorted((r.recipient, r.key, r.status) for r in alert_results) == [
+        ("ana@example.com", 0, "Success"), ("bia@example.com", 1, "Success")
+    ]
+    assert [(r.recipient, r.key, r.status) for r in anniversary_results] == [("ana@example.com", 0, "Success")]
+
+
+def test_opted_out_templates_are_sent_immediately(smtp, sending_config, use_pool, make_pool, collecting):
+    use_pool(make_pool([smtp]))
+
+    success, failed = email_service.send_bulk_notifications(
+        [_alert("ana@example.com", "Ana")], ALERT, "Alerta de {nome}", coalesce=False
+    )
+
+    assert (success, failed) == (1, 0)
+    assert digest_collector.pending_count() == 0
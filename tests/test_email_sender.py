@@ -0,0 +1,40 @@
+import time
+
+from core import email_sender
+
+
+def _jobs(count: int, pulled: list):
+    """Gerador de jobs que registra quantos foram lidos (cada um seria um template renderizado)."""
+    for i in range(count):
+        pulled.append(i)
+        yield {'recipient': f"p{i}@example.com", 'subject': "s", 'body': "<p>oi</p>", 'key': i}
+
+
+def test_deadline_reports_timed_out_and_abandoned_without_draining_the_jobs(smtp, sending_config, use_pool, make_pool, monkeypatch):
+    monkeypatch.setattr(sending_config, "MAX_PARALLEL_WORKERS", 1)
+    smtp.latency = 0.5
+    pool = use_pool(make_pool([smtp]))
+    pulled, results = [], []
+
+    stats = email_sender.send_emails_with_stats(_jobs(20, pulled), on_result=results.append, deadline=0.2)
+
+    # só a janela de submissão foi lida: um job enviando e os outros na fila do executor
+    assert len(pulled) == email_sender.SUBMISSION_WINDOW
+    statuses = {result.key: result.status.split(":")[0] for result in results}
+    assert statuses == {0: email_sender.ABANDONED, 1: email_sender.TIMED_OUT, 2: email_sender.TIMED_OUT, 3: email_sender.TIMED_OUT}
+    assert (stats['success'], stats['failed'], stats['timed_out'], stats['abandoned']) == (0, 0, 3, 1)
+
+    # o envio abandonado continua em segundo plano e ainda pode ser entregue
+    time.sleep(1)
+    assert smtp.stats["delivered"] == 1
+    assert pool.usage.used("account-0") == 1
+
+
+def test_without_deadline_every_job_is_sent(smtp, sending_config, use_pool, make_pool):
+    use_pool(make_pool([smtp]))
+    pulled = []
+
+    stats = email_sender.send_emails_with_stats(_jobs(20, pulled))
+
+    assert len(pulled) == 20
+    assert (stats['success'], stats['timed_out'], stats['abandoned']) == (20, 0, 0)
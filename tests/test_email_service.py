@@ -0,0 +1,120 @@
+import pandas as pd
+
+from core import email_sender, email_service
+
+TEMPLATE = "email/alerts/overtime_alert.html"
+SUBJECT = "Horas extras de {nome} em {data}"
+
+
+def _jobs(count: int):
+    return [
+        {
+            'recipient': f"person-{i}@example.com",
+            'context': {
+                'nome': f"Pessoa {i}", 'data': "08/06/2025", 'horas_trabalhadas': 10,
+                'limite_horas': 8, 'dashboard_url': "https://example.com",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def test_send_bulk_notifications_delivers_every_job(smtp, sending_config, use_pool, make_pool):
+    use_pool(make_pool([smtp]))
+    results = []
+
+    success, failed = email_service.send_bulk_notifications(_jobs(5), TEMPLATE, SUBJECT, on_result=results.append)
+
+    assert (success, failed) == (5, 0)
+    assert smtp.stats["delivered"] == 5
+    assert sorted(result.key for result in results) == [0, 1, 2, 3, 4]
+    assert all(result.status == "Success" for result in results)
+
+
+def test_send_bulk_notifications_skips_missing_recipients_and_respects_test_limit(smtp, sending_config, use_pool, make_pool):
+    use_pool(make_pool([smtp]))
+    jobs = _jobs(6)
+    jobs[0]['recipient'] = None
+    results = []
+
+    success, failed = email_service.send_bulk_notifications(jobs, TEMPLATE, SUBJECT, test_limit=3, on_result=results.append)
+
+    assert (success, failed) == (3, 0)
+    # a posição continua sendo a da lista original, mesmo com a primeira linha pulada
+    assert sorted(result.key for result in results) == [1, 2, 3]
+
+
+def test_send_bulk_notifications_reports_rejected_messages(smtp, sending_config, use_pool, make_pool):
+    smtp.error_rate = 1.0
+    use_pool(make_pool([smtp]))
+    results = []
+
+    success, failed = email_service.send_bulk_notifications(_jobs(3), TEMPLATE, SUBJECT, on_result=results.append)
+
+    assert (success, failed) == (0, 3)
+    assert smtp.stats["delivered"] == 0
+    assert all(result.status.startswith("Failed") for result in results)
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            'CONTRIBUTOR_NAME': ["Ana", "Bia", "Caio"],
+            'HOURS_WORKED': [10.5, 11.0, 12.25],
+            'CONTRIBUTOR_EMAIL': ["ana@example.com", None, "caio@example.com"],
+        },
+        # um índice que não é 0..n-1: a key continua sendo a posição da linha
+        index=[10, 20, 30]
+    )
+
+
+def _send_frame(df, **options):
+    return email_service.send_bulk_notifications_from_frame(
+        df,
+        column_mapping={'nome': 'CONTRIBUTOR_NAME', 'horas_trabalhadas': 'HOURS_WORKED'},
+        constants={'data': "08/06/2025", 'limite_horas': 8, 'dashboard_url': "https://example.com"},
+        recipient_column='CONTRIBUTOR_EMAIL',
+        template_name=TEMPLATE,
+        subject_template=SUBJECT,
+        **options
+    )
+
+
+def test_send_bulk_notifications_from_frame_renders_each_row(smtp, sending_config, use_pool, make_pool, monkeypatch):
+    use_pool(make_pool([smtp]))
+    jobs, results = [], []
+    build_message = email_sender.build_message
+    monkeypatch.setattr(email_sender, "build_message", lambda job: jobs.append(job) or build_message(job))
+
+    success, failed = _send_frame(_frame(), on_result=results.append)
+
+    # a linha sem destinatário é pulada; as outras levam as colunas e as constantes ao template
+    assert (success, failed) == (2, 0)
+    assert sorted((result.recipient, result.key) for result in results) == [
+        ("ana@example.com", 0), ("caio@example.com", 2)
+    ]
+    by_recipient = {job['recipient']: job for job in jobs}
+    assert by_recipient["caio@example.com"]['subject'] == "Horas extras de Caio em 08/06/2025"
+    assert "12.25" in by_recipient["caio@example.com"]['body']
+
+
+def test_send_bulk_notifications_from_frame_uses_the_test_recipient(smtp, sending_config, use_pool, make_pool):
+    sending_config.EMAIL_TEST_RECIPIENT = "qa@example.com"
+    use_pool(make_pool([smtp]))
+    results = []
+
+    success, _ = _send_frame(_frame(), test_limit=2, on_result=results.append)
+
+    assert success == 2
+    assert [result.recipient for result in results] == ["qa@example.com"] * 2
+
+
+def test_send_bulk_notifications_from_frame_with_an_unknown_template_fails_every_row(smtp, sending_config, use_pool, make_pool):
+    use_pool(make_pool([smtp]))
+
+    success, failed = email_service.send_bulk_notifications_from_frame(
+        _frame(), {'nome': 'CONTRIBUTOR_NAME'}, "email/missing.html", SUBJECT, 'CONTRIBUTOR_EMAIL'
+    )
+
+    assert (success, failed) == (0, 3)
+    assert smtp.stats["delivered"] == 0
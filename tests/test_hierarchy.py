@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from core.hierarchy import HierarchyIndex, result_groups
+
+
+def _contributors():
+    return pd.DataFrame({
+        'EMPLOYEE_ID': [1, 2, 3, 4],
+        'MANAGER_EMAIL': ["ana@x.com", "bia@x.com", "ana@x.com", None],
+        'MANAGER_NAME': ["Ana", "Bia", "Ana", None],
+        'COST_CENTER': ["CC-1", "CC-1", "CC-2", "CC-2"],
+        'HOURS_WORKED': [10.0, 12.0, np.nan, 9.0],
+    })
+
+
+def test_groups_and_rollups_come_from_the_precomputed_members():
+    index = HierarchyIndex(_contributors())
+
+    assert [(key, name, members.tolist()) for key, name, members in index.groups('manager')] == [
+        ("ana@x.com", "Ana", [0, 2]), ("bia@x.com", "Bia", [1])
+    ]
+    assert index.rollup_group('cost_center', "CC-2", _contributors()['HOURS_WORKED'].to_numpy()) == {
+        'count': 1, 'sum': 9.0, 'max': 9.0
+    }
+    rollup = index.rollup('manager', _contributors()['HOURS_WORKED'].to_numpy())
+    assert rollup.loc["ana@x.com", 'count'] == 1 and rollup.loc["bia@x.com", 'sum'] == 12.0
+
+
+def test_lookup_maps_an_employee_to_each_level():
+    index = HierarchyIndex(_contributors())
+
+    assert index.lookup(4) == {'manager': None, 'cost_center': "CC-2"}
+    assert index.lookup(99) is None
+
+
+def test_update_moves_only_the_changed_rows():
+    index = HierarchyIndex(_contributors())
+    changed = pd.DataFrame({
+        'EMPLOYEE_ID': [3, 5],
+        'MANAGER_EMAIL': ["bia@x.com", "caio@x.com"],
+        'MANAGER_NAME': ["Bia", "Caio"],
+        'COST_CENTER': ["CC-2", "CC-1"],
+    })
+
+    positions = index.update(changed)
+
+    assert positions.tolist() == [2, 4]
+    assert index.members('manager', "ana@x.com").tolist() == [0]
+    assert index.members('manager', "bia@x.com").tolist() == [1, 2]
+    assert index.name('manager', "caio@x.com") == "Caio"
+    assert index.lookup(5) == {'manager': "caio@x.com", 'cost_center': "CC-1"}
+    # o resultado é o mesmo de reconstruir o índice com as linhas atualizadas
+    rebuilt = HierarchyIndex(pd.concat([_contributors().drop(index=2), changed]).sort_values('EMPLOYEE_ID'))
+    for key in rebuilt.keys('cost_center'):
+        assert index.employee_ids[index.members('cost_center', key)].tolist() == \
+            rebuilt.employee_ids[rebuilt.members('cost_center', key)].tolist()
+
+
+def test_result_rows_are_grouped_through_the_dataset_index():
+    index = HierarchyIndex(_contributors())
+    # o resultado de uma regra: outras posições e um nome de gestor diferente do da carga
+    overtime = pd.DataFrame({'EMPLOYEE_ID': [3, 2, 1], 'MANAGER_EMAIL': ["ana@x.com", "bia@x.com", "ana@x.com"],
+                             'MANAGER_NAME': ["Ana Souza", "Bia", "Ana Souza"]})
+
+    groups = [(key, name, rows.tolist()) for key, name, rows in result_groups(overtime, 'manager', index)]
+
+    assert groups == [("ana@x.com", "Ana", [0, 2]), ("bia@x.com", "Bia", [1])]
+    # colaboradores fora do índice: os grupos saem só das linhas do resultado
+    unknown = overtime.assign(EMPLOYEE_ID=[3, 2, 99])
+    assert [name for _, name, _ in result_groups(unknown, 'manager', index)] == ["Ana Souza", "Bia"]
@@ -0,0 +1,111 @@
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+from core import history_store
+from core.history_store import COMPACTED_PREFIX, MANIFEST_NAME, HistoryStore
+from core.utils import read_json
+
+AUTOMATION = "d1_individual_contributor"
+DAY = date(2025, 6, 8)
+
+
+def _rows(start: int, count: int) -> pd.DataFrame:
+    return pd.DataFrame({'EMPLOYEE_ID': range(start, start + count), 'TEAM': "Vendas"})
+
+
+def _store_with_parts(tmp_path, parts: int = 3, rows: int = 10) -> HistoryStore:
+    store = HistoryStore(tmp_path / "history")
+    for i in range(parts):
+        store.append(_rows(i * rows, rows), AUTOMATION, DAY)
+    return store
+
+
+def _ids(store: HistoryStore) -> list:
+    return sorted(store.query([AUTOMATION], DAY, DAY)['EMPLOYEE_ID'].tolist())
+
+
+def test_compaction_publishes_the_merged_file_through_the_manifest(tmp_path):
+    store = _store_with_parts(tmp_path)
+    partition_dir = store._partition_dir(AUTOMATION, DAY)
+    parts = sorted(os.listdir(partition_dir))
+
+    assert store.compact(before=date(2025, 6, 9)) == 1
+
+    manifest = read_json(os.path.join(partition_dir, MANIFEST_NAME))
+    assert manifest['compacted'].startswith(COMPACTED_PREFIX)
+    assert sorted(manifest['replaces']) == parts
+    assert sorted(os.listdir(partition_dir)) == sorted([MANIFEST_NAME, manifest['compacted']])
+    assert _ids(store) == list(range(30))
+
+
+def test_partitions_from_the_current_day_are_not_compacted(tmp_path):
+    store = _store_with_parts(tmp_path)
+
+    assert store.compact(before=DAY) == 0
+    assert len(store._live_files(store._partition_dir(AUTOMATION, DAY))) == 3
+
+
+def test_an_interrupted_compaction_does_not_duplicate_rows(tmp_path, monkeypatch):
+    store = _store_with_parts(tmp_path)
+    partition_dir = store._partition_dir(AUTOMATION, DAY)
+
+    # parou depois de trocar o manifesto, antes de apagar os arquivos substituídos
+    monkeypatch.setattr(HistoryStore, "_remove_files", staticmethod(lambda partition_dir, names: None))
+    store.compact()
+    assert _ids(store) == list(range(30))
+
+    monkeypatch.undo()
+    store.append(_rows(30, 10), AUTOMATION, DAY)
+    assert store.compact() == 1
+    assert _ids(store) == list(range(40))
+    assert len([name for name in os.listdir(partition_dir) if name.endswith(".parquet")]) == 1
+
+
+def test_a_reader_between_the_manifest_and_the_listing_sees_every_row(tmp_path, monkeypatch):
+    store = _store_with_parts(tmp_path)
+    reader = HistoryStore(store.root)
+    read_manifest = HistoryStore._read_manifest
+    compactions = []
+
+    def compact_while_reading(partition_dir):
+        manifest = read_manifest(partition_dir)
+        # a compaction completa (manifesto novo e arquivos antigos apagados) no meio da leitura
+        if not compactions:
+            compactions.append(store.compact())
+        return manifest
+    monkeypatch.setattr(reader, "_read_manifest", compact_while_reading)
+
+    assert _ids(reader) == list(range(30))
+    assert compactions == [1]
+
+
+def test_concurrent_reads_never_lose_or_duplicate_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "READ_ATTEMPTS", 20)
+    store = _store_with_parts(tmp_path, parts=2)
+    done = threading.Event()
+    errors = []
+
+    def write_and_compact():
+        try:
+            for i in range(2, 12):
+                store.append(_rows(i * 10, 10), AUTOMATION, DAY)
+                store.compact()
+        finally:
+            done.set()
+    writer = threading.Thread(target=write_and_compact)
+    writer.start()
+
+    seen = 20
+    while not done.is_set():
+        ids = _ids(HistoryStore(store.root))
+        # cada leitura é um prefixo contíguo das gravações: nada perdido, nada repetido
+        if ids != list(range(len(ids))) or len(ids) < seen:
+            errors.append(len(ids))
+        seen = max(seen, len(ids))
+    writer.join()
+
+    assert errors == []
+    assert _ids(store) == list(range(120))
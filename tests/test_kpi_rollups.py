@@ -0,0 +1,68 @@
+from datetime import date
+
+import pandas as pd
+
+from core.kpi_rollups import KpiRollupStore
+
+DAY = date(2025, 6, 8)
+
+
+def _overtime(hours):
+    count = len(hours)
+    return pd.DataFrame({
+        'EMPLOYEE_ID': list(range(1, count + 1)),
+        'HOURS_WORKED': hours,
+        'TEAM': ["Vendas" if i % 2 else "Suporte" for i in range(count)],
+        'AREA': ["Comercial"] * count,
+        'COST_CENTER': ["CC-100"] * count,
+        'MANAGER_EMAIL': ["gestor@example.com"] * count,
+        'MANAGER_NAME': ["Gestor"] * count,
+    })
+
+
+def test_apply_is_idempotent(tmp_path):
+    store = KpiRollupStore(tmp_path)
+    overtime = _overtime([9.0, 10.0, 12.5, 11.0])
+
+    assert store.apply(overtime, DAY)
+    first = {level: store.read(level) for level in ("team", "area", "manager")}
+    assert store.apply(overtime, DAY)
+
+    for level, table in first.items():
+        pd.testing.assert_frame_equal(store.read(level), table)
+    area = store.read("area").iloc[0]
+    assert (area['count'], area['sum'], area['max']) == (4, 42.5, 12.5)
+
+
+def test_reapplying_a_row_replaces_its_contribution(tmp_path):
+    store = KpiRollupStore(tmp_path)
+    store.apply(_overtime([9.0, 10.0]), DAY)
+    # incremental: só o colaborador 1 foi reavaliado, com outras horas
+    store.apply(_overtime([11.0]), DAY)
+
+    area = store.read("area").iloc[0]
+    assert (area['count'], area['sum'], area['max']) == (2, 21.0, 11.0)
+
+
+def test_rows_below_the_limit_leave_the_rollups(tmp_path):
+    store = KpiRollupStore(tmp_path)
+    store.apply(_overtime([9.0, 14.0]), DAY)
+    # o colaborador 2 foi avaliado de novo e não está mais acima do limite
+    store.apply(None, DAY, evaluated_ids=[2])
+
+    area = store.read("area").iloc[0]
+    assert (area['count'], area['sum'], area['max']) == (1, 9.0, 9.0)
+
+    store.apply(None, DAY, evaluated_ids=[1])
+    assert store.read("area").empty
+
+
+def test_days_are_kept_apart(tmp_path):
+    store = KpiRollupStore(tmp_path)
+    store.apply(_overtime([9.0, 10.0]), DAY)
+    store.apply(_overtime([12.0]), date(2025, 6, 9))
+
+    assert store.read("team", start=date(2025, 6, 9))['sum'].tolist() == [12.0]
+    totals = store.totals("area").iloc[0]
+    assert (totals['count'], totals['sum'], totals['max']) == (3, 31.0, 12.0)
+    assert store.read("team", keys=["Vendas"])['TEAM'].unique().tolist() == ["Vendas"]
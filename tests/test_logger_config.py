@@ -0,0 +1,59 @@
+import json
+import queue
+import logging
+
+import config
+from core import logger_config
+from core.logger_config import ContextFilter, JsonLinesFormatter, _QueueHandler
+
+
+def _queued(record: logging.LogRecord) -> logging.LogRecord:
+    """Passa o registro pelo mesmo QueueHandler + ContextFilter do logger e devolve o que foi enfileirado."""
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.handle(record)
+    return log_queue.get_nowait()
+
+
+def test_local_records_get_the_current_context(monkeypatch):
+    monkeypatch.setattr(logger_config, "_current_task_id", "d1")
+
+    record = _queued(logging.makeLogRecord({"msg": "hello %s", "args": ("world",)}))
+
+    assert (record.run_id, record.task_id) == (logger_config.RUN_ID, "d1")
+    assert record.getMessage() == "hello world"
+
+
+def test_records_forwarded_from_a_child_keep_its_context(monkeypatch):
+    monkeypatch.setattr(logger_config, "_current_task_id", None)
+
+    record = _queued(logging.makeLogRecord({"msg": "sent", "run_id": "child-run", "task_id": "drain-7"}))
+
+    payload = json.loads(JsonLinesFormatter().format(record))
+    assert (payload["run_id"], payload["task_id"]) == ("child-run", "drain-7")
+
+
+def test_tracebacks_stay_out_of_the_message():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("test").makeRecord(
+            "test", logging.ERROR, __file__, 1, "failed", None, logging.sys.exc_info()
+        )
+
+    payload = json.loads(JsonLinesFormatter().format(_queued(record)))
+
+    assert payload["message"] == "failed"
+    assert "ValueError: boom" in payload["exception"]
+
+
+def test_each_entrypoint_logs_to_its_own_file(monkeypatch):
+    monkeypatch.setattr(config, "LOG_FILE_NAME", None)
+    monkeypatch.setattr(logger_config.sys, "argv", ["/srv/app/scripts/drain_spool.py", "--once"])
+    assert logger_config._log_file_name() == "automacao_rh.drain_spool.log"
+    monkeypatch.setattr(logger_config.sys, "argv", ["/venv/lib/site-packages/pytest/__main__.py"])
+    assert logger_config._log_file_name() == "automacao_rh.pytest.log"
+
+    monkeypatch.setattr(config, "LOG_FILE_NAME", "drain-host-b.log")
+    assert logger_config._log_file_name() == "drain-host-b.log"
@@ -0,0 +1,54 @@
+import os
+
+from core.email_sender import build_message
+from core.mail_spool import MailSpool
+
+
+def _enqueue(spool: MailSpool, count: int):
+    return [
+        spool.enqueue(build_message({'recipient': f"p{i}@example.com", 'subject': "s", 'body': "<p>oi</p>"}))
+        for i in range(count)
+    ]
+
+
+def test_each_message_is_claimed_once_across_spools(tmp_path):
+    first, second = MailSpool(tmp_path), MailSpool(tmp_path)
+    _enqueue(first, 10)
+
+    claimed = []
+    while True:
+        path = first.claim() or second.claim()
+        if path is None:
+            break
+        claimed.append(os.path.basename(path))
+
+    assert len(claimed) == len(set(claimed)) == 10
+    assert first.pending_count() == 0
+    assert len(os.listdir(tmp_path / "cur")) == 10
+
+
+def test_complete_moves_the_message_and_keeps_the_error(tmp_path):
+    spool = MailSpool(tmp_path)
+    _enqueue(spool, 2)
+    sent, failed = spool.claim(), spool.claim()
+    recipient = spool.read(sent)['To']
+
+    spool.complete(sent, ok=True)
+    spool.complete(failed, ok=False, error="554 rejected")
+
+    assert os.listdir(tmp_path / "cur") == []
+    assert spool.read(tmp_path / "done" / os.path.basename(sent))['To'] == recipient
+    with open(tmp_path / "failed" / f"{os.path.basename(failed)}.error", encoding="utf-8") as f:
+        assert f.read() == "554 rejected"
+
+
+def test_recover_stale_returns_only_old_claims(tmp_path):
+    spool = MailSpool(tmp_path)
+    _enqueue(spool, 1)
+    path = spool.claim()
+
+    # a idade conta a partir da reserva, não do enqueue
+    assert spool.recover_stale(max_age=3600) == 0
+    assert spool.recover_stale(max_age=0) == 1
+    assert spool.pending_count() == 1
+    assert os.path.basename(spool.claim()) == os.path.basename(path)
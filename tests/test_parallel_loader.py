@@ -0,0 +1,104 @@
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import config
+from core import data_loader, parallel_loader
+from core.business_rules import find_overtime_employees
+from core.state_store import WatermarkStore
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sample_data.csv")
+TARGET_DATE = date(2025, 6, 8)
+
+
+@pytest.fixture
+def exports(tmp_path, monkeypatch):
+    """A amostra dividida em três exportações, em um diretório próprio."""
+    monkeypatch.setattr(config, "QUARANTINE_DIR", str(tmp_path / "quarantine"))
+    source_dir = tmp_path / "exports"
+    source_dir.mkdir()
+    sample = pd.read_csv(SAMPLE)
+    for i, start in enumerate(range(0, len(sample), 50)):
+        sample.iloc[start:start + 50].to_csv(source_dir / f"part-{i}.csv", index=False)
+    return source_dir
+
+
+@pytest.fixture
+def cache():
+    data_loader.enable_cache()
+    yield
+    data_loader.enable_cache(False)
+
+
+def _evaluate(source):
+    return parallel_loader.evaluate_sources(str(source), find_overtime_employees, TARGET_DATE, max_workers=2)
+
+
+def test_cached_frames_stay_in_the_parent_process(exports, cache, monkeypatch):
+    first, first_keys, total_rows = _evaluate(exports)
+    assert total_rows == 150
+    # os DataFrames lidos nos processos filhos foram guardados aqui
+    assert len(data_loader._cache) == 3
+
+    def fail(filepath):
+        raise AssertionError(f"{filepath} should have come from the cache")
+    monkeypatch.setattr(data_loader, "_read_and_process", fail)
+
+    second, second_keys, _ = _evaluate(exports)
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(first_keys, second_keys)
+
+
+def test_only_changed_files_are_parsed_again(exports, cache, monkeypatch):
+    _evaluate(exports)
+    changed = exports / "part-1.csv"
+    df = pd.read_csv(changed)
+    df.iloc[:10].to_csv(changed, index=False)
+
+    parsed = []
+    read_and_process = data_loader._read_and_process
+    monkeypatch.setattr(data_loader, "_read_and_process", lambda filepath: parsed.append(filepath) or read_and_process(filepath))
+
+    _, _, total_rows = _evaluate(exports)
+
+    assert parsed == [str(changed)]
+    assert total_rows == 50 + 10 + 50
+
+
+def test_multiple_files_give_the_same_result_as_one(exports):
+    single, single_keys, single_rows = _evaluate(SAMPLE)
+
+    merged, merged_keys, merged_rows = _evaluate(exports)
+
+    # os arquivos terminam em qualquer ordem nos processos, mas o resultado segue a ordem dos arquivos
+    assert merged_rows == single_rows
+    pd.testing.assert_frame_equal(merged, single.reset_index(drop=True))
+    pd.testing.assert_frame_equal(merged_keys, single_keys.reset_index(drop=True))
+
+
+def test_the_dataset_hierarchy_is_built_once_and_fed_the_pending_rows(exports, cache, tmp_path):
+    watermark = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path / "state")
+    _, evaluated, _ = parallel_loader.evaluate_sources(
+        str(exports), find_overtime_employees, TARGET_DATE, row_filter=watermark.filter_pending, max_workers=2
+    )
+    watermark.mark_evaluated(evaluated)
+    index = parallel_loader.dataset_hierarchy()
+    assert len(index) == 150
+
+    changed = exports / "part-0.csv"
+    df = pd.read_csv(changed)
+    df.loc[0, ['MANAGER_EMAIL', 'MANAGER_NAME', 'LAST_UPDATE']] = ["nova.gestora@example.com", "Nova Gestora", "08/06/2025 23:00:00 -03:00"]
+    df.to_csv(changed, index=False)
+    employee_id = int(df.loc[0, 'EMPLOYEE_ID'])
+
+    _, evaluated, _ = parallel_loader.evaluate_sources(
+        str(exports), find_overtime_employees, TARGET_DATE, row_filter=watermark.filter_pending, max_workers=2
+    )
+
+    # só a linha alterada foi avaliada e aplicada ao mesmo índice, sem reconstruí-lo
+    assert evaluated['EMPLOYEE_ID'].tolist() == [employee_id]
+    assert parallel_loader.dataset_hierarchy() is index
+    assert index.lookup(employee_id)['manager'] == "nova.gestora@example.com"
+    assert index.name('manager', "nova.gestora@example.com") == "Nova Gestora"
@@ -0,0 +1,146 @@
+import time
+import smtplib
+import threading
+from collections import Counter
+
+from core import email_sender, sender_pool
+from core.sender_pool import SenderAccount, SenderPool, SMTPConnectionPool, UsageTracker, classify_smtp_error
+from benchmarks.fake_smtp import FakeSMTPServer
+
+
+def _pool(tmp_path, *accounts) -> SenderPool:
+    return SenderPool(list(accounts), usage=UsageTracker(tmp_path / "sender_usage.json"))
+
+
+def test_weighted_round_robin_follows_the_weights(tmp_path):
+    pool = _pool(
+        tmp_path,
+        SenderAccount("heavy", "localhost", 25, "heavy@example.com", "x", weight=2),
+        SenderAccount("light", "localhost", 25, "light@example.com", "x"),
+    )
+    chosen = []
+    for _ in range(6):
+        account = pool.acquire()
+        chosen.append(account.name)
+        pool.release(account, sent=True)
+
+    assert Counter(chosen) == {"heavy": 4, "light": 2}
+    # o round-robin suave intercala as contas em vez de esgotar a mais pesada primeiro
+    assert chosen[:3] == ["heavy", "light", "heavy"]
+
+
+def test_accounts_over_quota_or_excluded_are_skipped(tmp_path):
+    pool = _pool(
+        tmp_path,
+        SenderAccount("small", "localhost", 25, "small@example.com", "x", daily_quota=1),
+        SenderAccount("big", "localhost", 25, "big@example.com", "x"),
+    )
+    pool.usage.increment("small")
+
+    assert pool.acquire().name == "big"
+    assert pool.acquire(exclude={"big"}) is None
+
+
+def test_usage_is_persisted_across_trackers(tmp_path):
+    usage = UsageTracker(tmp_path / "sender_usage.json", flush_every=1000)
+    for _ in range(3):
+        usage.increment("account-0")
+    usage.flush()
+
+    assert UsageTracker(tmp_path / "sender_usage.json").used("account-0") == 3
+
+
+def test_failover_to_the_next_account_when_one_is_throttled(smtp, sending_config, use_pool, make_pool):
+    with FakeSMTPServer(throttle_rate=1.0, seed=1) as throttled:
+        pool = use_pool(make_pool([throttled, smtp]))
+
+        for i in range(3):
+            recipient, status = email_sender.send_prepared_message(
+                email_sender.build_message({'recipient': f"p{i}@example.com", 'subject': "s", 'body': "<p>oi</p>"})
+            )
+            assert status == "Success"
+
+        assert throttled.stats["throttled"] == 1
+        assert smtp.stats["delivered"] == 3
+        # a conta em pausa não recebe mais envios até o fim do cooldown
+        assert pool.accounts[0].throttled_until > 0
+        pool.close_all()
+    assert pool.usage.used("account-1") == 3
+
+
+def test_classify_smtp_error():
+    assert classify_smtp_error(smtplib.SMTPResponseException(550, b"5.4.5 Daily sending quota exceeded")) == 'exhausted'
+    # um 4xx com "limit" no texto é temporário: pausa a conta, não a desativa pelo resto do dia
+    assert classify_smtp_error(smtplib.SMTPResponseException(421, b"4.7.0 Rate limit exceeded")) == 'throttled'
+    assert classify_smtp_error(smtplib.SMTPResponseException(554, b"5.6.0 Message rejected")) == 'permanent'
+    # "limit" ou "quota" fora de uma cota de envio são problema da mensagem, não da conta
+    assert classify_smtp_error(smtplib.SMTPResponseException(552, b"5.3.4 Message size exceeds fixed limit")) == 'permanent'
+    assert classify_smtp_error(smtplib.SMTPResponseException(552, b"5.2.2 Mailbox over quota")) == 'permanent'
+    assert classify_smtp_error(smtplib.SMTPAuthenticationError(535, b"bad credentials")) == 'exhausted'
+    assert classify_smtp_error(smtplib.SMTPServerDisconnected("gone")) == 'connection'
+
+
+def test_a_single_throttled_account_waits_for_the_cooldown(smtp, sending_config, use_pool, make_pool, monkeypatch):
+    monkeypatch.setattr(sending_config, "SMTP_THROTTLE_COOLDOWN", 0.2)
+    pool = use_pool(make_pool([smtp]))
+    deliver = email_sender._deliver
+    replies = [smtplib.SMTPResponseException(421, b"4.7.0 Try again later")]
+
+    def throttled_once(account, msg):
+        if replies:
+            raise replies.pop()
+        deliver(account, msg)
+    monkeypatch.setattr(email_sender, "_deliver", throttled_once)
+
+    started = time.monotonic()
+    recipient, status = email_sender.send_prepared_message(
+        email_sender.build_message({'recipient': "p@example.com", 'subject': "s", 'body': "<p>oi</p>"})
+    )
+
+    assert status == "Success"
+    assert time.monotonic() - started >= 0.2
+    assert smtp.stats["delivered"] == 1
+    pool.close_all()
+
+
+def test_flush_does_not_hold_the_usage_lock_during_file_io(tmp_path, monkeypatch):
+    usage = UsageTracker(tmp_path / "sender_usage.json", flush_every=1000)
+    usage.increment("account-0")
+    write_json = sender_pool.write_json
+    lock_free = []
+
+    def checked_write(path, data):
+        # outra thread (ex: o SenderPool escolhendo uma conta) consegue ler o uso enquanto o arquivo é gravado
+        reader = threading.Thread(target=usage.used, args=("account-0",))
+        reader.start()
+        reader.join(timeout=1)
+        lock_free.append(not reader.is_alive())
+        write_json(path, data)
+    monkeypatch.setattr(sender_pool, "write_json", checked_write)
+
+    usage.flush()
+
+    assert lock_free == [True]
+    assert UsageTracker(tmp_path / "sender_usage.json").used("account-0") == 1
+
+
+def _connections(smtp, idle_timeout: float) -> SMTPConnectionPool:
+    account = SenderAccount("account-0", smtp.host, smtp.port, "sender-0@example.com", "secret")
+    return SMTPConnectionPool(account, idle_timeout=idle_timeout)
+
+
+def test_keepalive_does_not_refresh_the_idle_clock(smtp, sending_config):
+    connections = _connections(smtp, idle_timeout=0.3)
+    connections.release(connections.acquire())
+    _, last_used = connections._idle.queue[0]
+
+    connections.keepalive()
+
+    assert connections._idle.qsize() == 1
+    assert connections._idle.queue[0][1] == last_used
+
+    time.sleep(0.4)
+    connections.keepalive()
+
+    # passou do idle_timeout sem envio: fechada em vez de receber outro NOOP
+    assert connections._idle.qsize() == 0
@@ -0,0 +1,100 @@
+from datetime import date
+
+import pandas as pd
+
+from core.email_sender import SendResult
+from core.state_store import NotificationTracker, WatermarkStore
+
+TARGET_DATE = date(2025, 6, 8)
+
+
+def _rows(versions):
+    return pd.DataFrame({
+        'EMPLOYEE_ID': list(range(1, len(versions) + 1)),
+        'LAST_UPDATE': pd.to_datetime(versions),
+    })
+
+
+def test_only_new_or_changed_rows_are_pending(tmp_path):
+    df = _rows(["2025-06-08 08:00", "2025-06-08 08:00", "2025-06-08 08:00"])
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    assert store.full_refresh
+    assert len(store.filter_pending(df)) == 3
+    store.mark_evaluated(df)
+    store.save()
+
+    changed = df.copy()
+    changed.loc[1, 'LAST_UPDATE'] = pd.Timestamp("2025-06-08 09:00")
+    changed = pd.concat([changed, _rows(["2025-06-08 08:00"] * 4).tail(1)], ignore_index=True)
+
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    assert not store.full_refresh
+    assert store.filter_pending(changed)['EMPLOYEE_ID'].tolist() == [2, 4]
+
+
+def test_a_new_target_date_starts_from_scratch(tmp_path):
+    df = _rows(["2025-06-08 08:00"])
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    store.mark_notified(df)
+    store.save()
+
+    store = WatermarkStore("test", date(2025, 6, 9), state_dir=tmp_path)
+    assert len(store.exclude_notified(df)) == 1
+    assert len(store.filter_pending(df)) == 1
+
+
+def test_rows_to_notify_stay_pending_until_sent(tmp_path):
+    df = _rows(["2025-06-08 08:00"] * 3)
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    to_notify = df.iloc[[0, 1]].reset_index(drop=True)
+    store.mark_evaluated(df, exclude=to_notify)
+
+    tracker = store.notification_tracker(to_notify)
+    tracker(SendResult("a@example.com", "Success", 0.1, 0))
+    tracker(SendResult("b@example.com", "Failed: 554", 0.1, 1))
+    tracker.flush()
+
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    assert tracker.notified == 1
+    # a linha com falha volta na próxima execução; a enviada nunca é reenviada
+    assert store.filter_pending(df)['EMPLOYEE_ID'].tolist() == [2]
+    assert store.exclude_notified(df)['EMPLOYEE_ID'].tolist() == [2, 3]
+
+
+def test_published_rows_are_not_published_again(tmp_path):
+    df = _rows(["2025-06-08 08:00"] * 2)
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    store.mark_published(df.iloc[[0]])
+
+    assert store.exclude_published(df)['EMPLOYEE_ID'].tolist() == [2]
+    store.mark_published(df.iloc[[1]], replace=True)
+    assert store.exclude_published(df)['EMPLOYEE_ID'].tolist() == [1]
+
+
+def test_only_sent_rows_reach_on_sent_and_only_once(tmp_path):
+    df = _rows(["2025-06-08 08:00"] * 3)
+    store = WatermarkStore("test", TARGET_DATE, state_dir=tmp_path)
+    logged = []
+    tracker = store.notification_tracker(df, on_sent=lambda sent_df: logged.append(sent_df['EMPLOYEE_ID'].tolist()))
+
+    tracker(SendResult("c@example.com", "Success", 0.1, 2))
+    tracker(SendResult("b@example.com", "Timed out", None, 1))
+    tracker(SendResult("a@example.com", "Success", 0.1, 0))
+    tracker.flush()
+    # o resultado de um digest chega depois, com um novo flush
+    tracker(SendResult("b@example.com", "Success", 0.1, 1))
+    tracker.flush()
+    tracker.flush()
+
+    assert logged == [[1, 3], [2]]
+
+
+def test_tracker_without_watermark_still_reports_sent_rows():
+    df = _rows(["2025-06-08 08:00"] * 2)
+    logged = []
+    tracker = NotificationTracker(None, df, on_sent=logged.append)
+
+    tracker(SendResult("a@example.com", "Success", 0.1, 1))
+    tracker.flush()
+
+    assert [sent_df['EMPLOYEE_ID'].tolist() for sent_df in logged] == [[2]]
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from jinja2 import Environment, FileSystemLoader
+
+from core import template_compiler
+from core.template_compiler import CompiledTemplateLoader, build_compiled_templates, flatten_inheritance, inline_and_minify
+
+BASE = """<html><head><style>.title{color:red} p{margin:0}</style></head>
+<body>
+    {% block content %}base{% endblock %}
+</body></html>"""
+CHILD = """{% extends "email/base.html" %}
+{% block content %}
+    <p class="title">  Olá,   {{ nome }} </p>
+{% endblock %}"""
+
+
+@pytest.fixture
+def template_dirs(tmp_path):
+    source_dir, compiled_dir = tmp_path / "templates", tmp_path / "compiled"
+    (source_dir / "email" / "alerts").mkdir(parents=True)
+    (source_dir / "email" / "base.html").write_text(BASE, encoding="utf-8")
+    (source_dir / "email" / "alerts" / "alert.html").write_text(CHILD, encoding="utf-8")
+    return source_dir, compiled_dir
+
+
+def test_inline_and_minify():
+    html = inline_and_minify(
+        """<style>.a{color:red} p{margin:0} @media (max-width:600px){p{margin:1px}}</style>
+        <p class="a" style="font-weight:bold">  hi   there </p>
+        <pre>  keep
+  this</pre>"""
+    )
+
+    # a regra mais específica vem depois, e o style da própria tag prevalece sobre as duas
+    assert '<p class="a" style="margin:0;color:red;font-weight:bold">hi there</p>' in html
+    # o que não pode ser aplicado inline (media queries) continua no <style>
+    assert "<style>@media (max-width:600px){p{margin:1px}}</style>" in html
+    assert "<pre>  keep\n  this</pre>" in html
+
+
+def test_flatten_inheritance(template_dirs):
+    source_dir, _ = template_dirs
+
+    flattened, dependencies = flatten_inheritance("email/alerts/alert.html", FileSystemLoader(source_dir))
+
+    assert dependencies == ["email/alerts/alert.html", "email/base.html"]
+    assert "extends" not in flattened and "block" not in flattened
+    assert '<p class="title">' in flattened and "base" not in flattened.replace("<body>", "")
+
+
+def test_compiled_template_is_used_while_its_sources_are_unchanged(template_dirs):
+    source_dir, compiled_dir = template_dirs
+    build_compiled_templates(source_dir, compiled_dir)
+    env = Environment(loader=CompiledTemplateLoader(source_dir, compiled_dir))
+
+    template = env.get_template("email/alerts/alert.html")
+
+    assert template.filename == str(compiled_dir / "email" / "alerts" / "alert.html")
+    assert '<p class="title" style="margin:0;color:red">Olá, Ana</p>' in template.render(nome="Ana")
+
+
+def test_a_changed_source_falls_back_to_the_source_template(template_dirs):
+    source_dir, compiled_dir = template_dirs
+    build_compiled_templates(source_dir, compiled_dir)
+    env = Environment(loader=CompiledTemplateLoader(source_dir, compiled_dir))
+    assert env.get_template("email/alerts/alert.html").filename.startswith(str(compiled_dir))
+
+    base = source_dir / "email" / "base.html"
+    base.write_text(BASE.replace("color:red", "color:blue"), encoding="utf-8")
+    # garante um mtime diferente mesmo em sistemas de arquivos com resolução grossa
+    stat = base.stat()
+    os.utime(base, (stat.st_atime, stat.st_mtime + 5))
+
+    template = env.get_template("email/alerts/alert.html")
+    assert template.filename == str(source_dir / "email" / "alerts" / "alert.html")
+
+
+def test_hashes_are_checked_only_when_loading(template_dirs, monkeypatch):
+    source_dir, compiled_dir = template_dirs
+    build_compiled_templates(source_dir, compiled_dir)
+    calls = []
+    original_hash = template_compiler._hash_source
+    monkeypatch.setattr(template_compiler, "_hash_source", lambda source: calls.append(1) or original_hash(source))
+    env = Environment(loader=CompiledTemplateLoader(source_dir, compiled_dir), auto_reload=True)
+
+    for _ in range(100):
+        env.get_template("email/alerts/alert.html").render(nome="Ana")
+
+    # um hash por origem (filho + base) no primeiro carregamento; depois só os mtimes
+    assert len(calls) == 2
@@ -0,0 +1,80 @@
+import os
+
+import pandas as pd
+
+from core.validation import validate_contributors
+
+
+def _contributors():
+    return pd.DataFrame({
+        'EMPLOYEE_ID': [1, 2, 2, 3, None, 5],
+        'CONTRIBUTOR_EMAIL': ["a@example.com", "old@example.com", "b@example.com", "c@example.com", "d@example.com", "not-an-email"],
+        'MANAGER_EMAIL': ["m@example.com"] * 6,
+        'COORDINATOR_EMAIL': ["c@example.com"] * 6,
+        'HOURS_WORKED': [9.0, 8.0, 10.0, 99.0, 8.0, 8.0],
+        'LAST_UPDATE': pd.to_datetime(["2025-06-08"] * 6),
+        'ADMISSION_DATE': pd.to_datetime(["2020-01-01", "2020-01-01", None, "2020-01-01", "2020-01-01", "2020-01-01"]),
+    })
+
+
+def test_invalid_rows_are_quarantined_with_their_reasons(sending_config):
+    result = validate_contributors(_contributors(), "contributors.csv")
+
+    # a última linha de um EMPLOYEE_ID repetido prevalece; data de admissão vazia só gera aviso
+    assert result.clean['EMPLOYEE_ID'].tolist() == [1, 2]
+    assert result.clean['CONTRIBUTOR_EMAIL'].tolist() == ["a@example.com", "b@example.com"]
+    assert result.rejected == 4
+    assert result.counts['duplicate_employee_id'] == 1
+    assert result.counts['invalid_hours_worked'] == 1
+    assert result.counts['missing_employee_id'] == 1
+    assert result.counts['invalid_contributor_email'] == 1
+    assert result.counts['invalid_admission_date'] == 1
+
+    quarantined = pd.read_csv(result.quarantine_file)
+    assert len(quarantined) == 4
+    assert "invalid_hours_worked" in quarantined.loc[quarantined['EMPLOYEE_ID'] == 3, 'REJECTION_REASONS'].iloc[0]
+
+
+def test_raw_values_are_kept_in_the_quarantine(sending_config):
+    df = _contributors().iloc[[3]].reset_index(drop=True)
+    raw = pd.DataFrame({'HOURS_WORKED': ["99 horas"]})
+
+    result = validate_contributors(df, "contributors.csv", raw=raw)
+
+    assert pd.read_csv(result.quarantine_file)['HOURS_WORKED'].tolist() == ["99 horas"]
+
+
+def test_clean_data_writes_no_quarantine(sending_config):
+    result = validate_contributors(_contributors().iloc[[0]], "contributors.csv")
+
+    assert result.rejected == 0
+    assert result.quarantine_file is None
+    assert len(result.clean) == 1
+
+
+def test_invalid_manager_or_coordinator_emails_only_warn(sending_config):
+    df = _contributors().iloc[[0]].assign(MANAGER_EMAIL="gestor sem email", COORDINATOR_EMAIL=None)
+
+    result = validate_contributors(df, "contributors.csv")
+
+    assert result.rejected == 0
+    assert len(result.clean) == 1
+    assert result.counts['invalid_manager_email'] == 1
+    assert result.counts['invalid_coordinator_email'] == 1
+
+
+def test_the_quarantine_is_written_again_only_when_the_rejected_rows_change(sending_config):
+    first = validate_contributors(_contributors(), "contributors.csv")
+    again = validate_contributors(_contributors(), "contributors.csv")
+
+    assert again.quarantine_file == first.quarantine_file
+    assert len(os.listdir(sending_config.QUARANTINE_DIR)) == 1
+
+    changed = _contributors()
+    changed.loc[0, 'HOURS_WORKED'] = -1.0
+    result = validate_contributors(changed, "contributors.csv")
+
+    assert result.rejected == 5
+    assert result.quarantine_file != first.quarantine_file
+    assert len(pd.read_csv(result.quarantine_file)) == 5
+    assert len(os.listdir(sending_config.QUARANTINE_DIR)) == 2